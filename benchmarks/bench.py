@@ -0,0 +1,207 @@
+import argparse
+import itertools
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+import timeit
+import tracemalloc
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path[:0] = [str(ROOT / 'src'), str(ROOT / 'tests')]
+
+import parameter_generator
+from acribis_scores.batch_processing import to_columns
+from acribis_scores.registry import SCORES, Score, get_score
+
+#   Performance baseline of all scores:
+#       python benchmarks/bench.py run --output before.json
+#       python benchmarks/bench.py run --output after.json
+#       python benchmarks/bench.py compare before.json after.json
+#   For each score, 'run' measures the import time (in a fresh interpreter), the latency of the scalar function and the
+#   run time and peak memory (tracemalloc) of the batch function for each cohort size. Cohorts are built by repeating
+#   'POOL_SIZE' patients synthesized by tests/parameter_generator.py. Sizes whose extrapolated run time exceeds
+#   '--max-seconds' are skipped.
+
+DEFAULT_SIZES = (1, 1000, 100000, 1000000)
+POOL_SIZE = 1000
+MIN_TIME = 0.2
+REPEAT = 5
+IMPORT_REPEAT = 5
+
+
+def _generator(score: Score) -> Callable[[], dict[str, Any]]:
+    module = score.module.rsplit('.', 1)[-1]
+    if module == 'smart':
+        return lambda: parameter_generator.generate_smart_parameters(random.uniform(0.5, 3.0))
+    return getattr(parameter_generator, f"generate_{module}_parameters")
+
+
+def _time(func: Callable[[], Any]) -> list[float]:
+    # Seconds per call for each repetition; a single repetition if one call already takes more than a second
+    timer = timeit.Timer(func)
+    number, elapsed = timer.autorange()
+    if elapsed / number > 1.0:
+        return [elapsed / number]
+    return [seconds / number for seconds in timer.repeat(max(1, min(REPEAT, int(MIN_TIME * REPEAT / elapsed))),
+                                                          number)]
+
+
+def _timing(times: list[float]) -> dict[str, float]:
+    return {'seconds': statistics.median(times), 'min_seconds': min(times)}
+
+
+def _peak_memory(func: Callable[[], Any]) -> int:
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def _import_time(module: str) -> dict[str, float]:
+    code = f"import time; start = time.perf_counter(); import {module}; print(time.perf_counter() - start)"
+    env = os.environ | {'PYTHONPATH': os.pathsep.join(filter(None, [str(ROOT / 'src'), os.environ.get('PYTHONPATH')]))}
+    times = [float(subprocess.run([sys.executable, '-c', code], env=env, capture_output=True, text=True,
+                                  check=True).stdout) for _ in range(IMPORT_REPEAT)]
+    return _timing(times)
+
+
+def _cohort(pool: dict[str, np.ndarray], size: int) -> dict[str, np.ndarray]:
+    return {name: np.resize(column, size) for name, column in pool.items()}
+
+
+def benchmark_score(score: Score, sizes: list[int], max_seconds: float) -> dict[str, Any]:
+    random.seed(0)
+    generate = _generator(score)
+    patients = [generate() for _ in range(POOL_SIZE)]
+    pool = {name: np.asarray(column) for name, column in to_columns(patients).items()}
+    result: dict[str, Any] = {'import': _import_time(score.module)}
+
+    calc, calc_batch = score.calc, score.calc_batch
+    cycle = itertools.cycle([dict(patient) for patient in patients])
+    result['scalar'] = _timing(_time(lambda: calc(next(cycle))))
+
+    result['batch'] = {}
+    seconds_per_row = 0.0
+    for size in sorted(sizes):
+        if seconds_per_row * size > max_seconds:
+            result['batch'][str(size)] = {'skipped': f"estimated {seconds_per_row * size:.0f} s > {max_seconds:g} s"}
+            continue
+        cohort = _cohort(pool, size)
+        timing = _timing(_time(lambda: calc_batch(cohort)))
+        seconds_per_row = timing['min_seconds'] / size
+        result['batch'][str(size)] = timing | {'rows_per_second': size / timing['seconds'],
+                                               'peak_bytes': _peak_memory(lambda: calc_batch(cohort))}
+    return result
+
+
+def _metadata() -> dict[str, Any]:
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=ROOT, capture_output=True, text=True,
+                                check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {'commit': commit, 'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'), 'python': platform.python_version(),
+            'numpy': np.__version__, 'platform': platform.platform(), 'processor': platform.processor(),
+            'cpu_count': os.cpu_count()}
+
+
+def run(scores: list[Score], sizes: list[int], max_seconds: float) -> dict[str, Any]:
+    results: dict[str, Any] = {'metadata': _metadata(), 'sizes': sizes, 'results': {}}
+    for score in scores:
+        print(f"{score.name}...", file=sys.stderr)
+        results['results'][score.name] = benchmark_score(score, sizes, max_seconds)
+    return results
+
+
+def _metrics(results: dict[str, Any]) -> dict[str, float]:
+    # Flat 'score/metric' view of the values that can be compared between runs (lower is better)
+    metrics: dict[str, float] = {}
+    for name, result in results['results'].items():
+        metrics[f"{name}/import"] = result['import']['seconds']
+        metrics[f"{name}/scalar"] = result['scalar']['seconds']
+        for size, batch in result['batch'].items():
+            if 'skipped' not in batch:
+                metrics[f"{name}/batch {size}"] = batch['seconds']
+                metrics[f"{name}/peak memory {size}"] = batch['peak_bytes']
+    return metrics
+
+
+def _format(metric: str, value: float) -> str:
+    if 'memory' in metric:
+        for unit, factor in (('MiB', 2 ** 20), ('KiB', 2 ** 10)):
+            if value >= factor:
+                return f"{value / factor:.3g} {unit}"
+        return f"{value:.0f} B"
+    for unit, factor in (('s', 1), ('ms', 1e3), ('µs', 1e6)):
+        if value >= 1 / factor:
+            return f"{value * factor:.3g} {unit}"
+    return f"{value * 1e9:.3g} ns"
+
+
+#   Returns the number of metrics that are slower (or use more memory) than 'threshold' allows
+def compare(old: dict[str, Any], new: dict[str, Any], threshold: float) -> int:
+    old_metrics, new_metrics = _metrics(old), _metrics(new)
+    regressions = 0
+    print(f"{'metric':<48} {'old':>12} {'new':>12} {'change':>8}")
+    for metric in [metric for metric in old_metrics if metric in new_metrics]:
+        before, after = old_metrics[metric], new_metrics[metric]
+        change = after / before - 1 if before else 0.0
+        flag = ''
+        if change > threshold:
+            flag = '  regression'
+            regressions += 1
+        elif change < -threshold:
+            flag = '  improvement'
+        print(f"{metric:<48} {_format(metric, before):>12} {_format(metric, after):>12} {change:>+8.1%}{flag}")
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description='Benchmarks of the scalar and batch functions of all scores.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    run_parser = commands.add_parser('run', help='Run the benchmarks')
+    run_parser.add_argument('--scores', nargs='+', default=list(SCORES),
+                            help='Scores to benchmark (default: all), e.g. MAGGIC chads_vasc')
+    run_parser.add_argument('--sizes', nargs='+', type=int, default=list(DEFAULT_SIZES),
+                            help=f"Cohort sizes of the batch functions (default: {' '.join(map(str, DEFAULT_SIZES))})")
+    run_parser.add_argument('--max-seconds', type=float, default=60.0,
+                            help='Skip batch sizes estimated to take longer per call (default: 60)')
+    run_parser.add_argument('--output', help='JSON file for the results (default: stdout)')
+    compare_parser = commands.add_parser('compare', help='Compare two result files')
+    compare_parser.add_argument('old')
+    compare_parser.add_argument('new')
+    compare_parser.add_argument('--threshold', type=float, default=0.1,
+                                help='Relative change reported as regression or improvement (default: 0.1)')
+    args = parser.parse_args(argv)
+
+    if args.command == 'compare':
+        with open(args.old, encoding='utf-8') as old, open(args.new, encoding='utf-8') as new:
+            return 1 if compare(json.load(old), json.load(new), args.threshold) else 0
+
+    try:
+        scores = [get_score(name) for name in args.scores]
+    except KeyError as e:
+        parser.error(e.args[0])
+    results = run(scores, args.sizes, args.max_seconds)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output:
+            json.dump(results, output, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
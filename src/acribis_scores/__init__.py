@@ -1,12 +1,23 @@
 __all__ = ["abc_af_bleeding",
            "abc_af_death",
            "abc_af_stroke",
+           "arrow_io",
+           "async_scoring",
            "barcelona_hf_v3",
            "batch_processing",
+           "caching",
            "chads_vasc",
            "charge_af",
+           "cli",
            "has_bled",
+           "instrumentation",
+           "linear_predictor",
            "maggic",
+           "panel",
+           "points",
+           "registry",
+           "server",
            "smart",
            "smart_reach",
+           "splines",
            "value_range"]
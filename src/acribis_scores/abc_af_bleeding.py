@@ -1,8 +1,14 @@
+from __future__ import annotations
+
 import math
-from typing import TypedDict, Annotated
+from typing import TYPE_CHECKING, TypedDict, Annotated
+
+from acribis_scores.batch_processing import batch_process, columnar
+from acribis_scores.linear_predictor import LinearPredictor
+from acribis_scores.value_range import ValueRange, check_ranges, ParameterError, InvalidParametersError
 
-from acribis_scores.batch_processing import batch_process
-from acribis_scores.value_range import ValueRange, check_ranges
+if TYPE_CHECKING:
+    import numpy as np
 
 # See: https://doi.org/10.1016/S0140-6736(16)00741-8
 # And: https://www.ahajournals.org/action/downloadSupplement?doi=10.1161%2FCIRCULATIONAHA.120.053100&file=Supplement_210420_final.pdf#subsection.2.1
@@ -25,21 +31,58 @@ WEIGHTS: dict[str, float] = {
     'Hemoglobin in g/dL': -0.08541
 }
 
+LINEAR_PREDICTOR = LinearPredictor.from_weights(WEIGHTS, -4.667)
 
-@batch_process
-@check_ranges
-def calc_abc_af_bleeding_score(parameters: Parameters) -> float:
-    if not any([parameters['DOAC'], parameters['Aspirin']]):
-        raise ValueError("Either 'DOAC' or 'Aspirin' must be true!")
-    if parameters['DOAC'] and parameters['Aspirin']:
-        raise ValueError("'DOAC' and 'Aspirin' cannot both be true!")
-    new_parameters = dict({key: value for key, value in parameters.items()})
-    new_parameters['log(Troponin T in ng/L)'] = math.log(parameters['Troponin T in ng/L'])
-    new_parameters['log(GDF-15 in ng/L)'] = math.log(parameters['GDF-15 in ng/L'])
-    linear_predictor = sum([new_parameters[parameter] * weight for parameter, weight in WEIGHTS.items()]) - 4.667
+TREATMENT_MISSING = "Either 'DOAC' or 'Aspirin' must be true!"
+TREATMENT_AMBIGUOUS = "'DOAC' and 'Aspirin' cannot both be true!"
+
+
+#   One year risk of major bleeding in %, for the log-transformed Troponin T and GDF-15 (see panel.py)
+def calc_score(parameters: Parameters, log_troponin_t: float, log_gdf_15: float) -> float:
+    treatment = (parameters['DOAC'], parameters['Aspirin'])
+    if not any(treatment):
+        raise InvalidParametersError([ParameterError('DOAC/Aspirin', treatment, None, TREATMENT_MISSING)])
+    if all(treatment):
+        raise InvalidParametersError([ParameterError('DOAC/Aspirin', treatment, None, TREATMENT_AMBIGUOUS)])
+    linear_predictor = LINEAR_PREDICTOR((parameters['Prior Bleeding'], parameters['Age'], log_troponin_t, log_gdf_15,
+                                         parameters['Hemoglobin in g/dL']))
     baseline_survival = 0.9766
     if parameters['Aspirin']:
         linear_predictor = 0.19965 + 1.2579 * linear_predictor
         baseline_survival = 0.9914
     one_year_risk = (1 - math.pow(baseline_survival, math.exp(linear_predictor)))
     return one_year_risk * 100
+
+
+#   Columnar version of 'calc_score'
+def calc_score_batch(columns: dict[str, np.ndarray], log_troponin_t: np.ndarray,
+                     log_gdf_15: np.ndarray) -> np.ndarray:
+    import numpy as np
+    if not np.all(columns['DOAC'] | columns['Aspirin']):
+        raise InvalidParametersError([ParameterError('DOAC/Aspirin', (False, False), None, TREATMENT_MISSING)])
+    if np.any(columns['DOAC'] & columns['Aspirin']):
+        raise InvalidParametersError([ParameterError('DOAC/Aspirin', (True, True), None, TREATMENT_AMBIGUOUS)])
+    features = LINEAR_PREDICTOR.buffer(len(columns['Age']))
+    features[0] = columns['Prior Bleeding']
+    features[1] = columns['Age']
+    features[2] = log_troponin_t
+    features[3] = log_gdf_15
+    features[4] = columns['Hemoglobin in g/dL']
+    linear_predictor = LINEAR_PREDICTOR.columns(features)
+    aspirin = columns['Aspirin']
+    linear_predictor = np.where(aspirin, 0.19965 + 1.2579 * linear_predictor, linear_predictor)
+    baseline_survival = np.where(aspirin, 0.9914, 0.9766)
+    one_year_risk = (1 - np.power(baseline_survival, np.exp(linear_predictor)))
+    return one_year_risk * 100
+
+
+@batch_process
+@check_ranges
+def calc_abc_af_bleeding_score(parameters: Parameters) -> float:
+    return calc_score(parameters, math.log(parameters['Troponin T in ng/L']), math.log(parameters['GDF-15 in ng/L']))
+
+
+@columnar(Parameters)
+def calc_abc_af_bleeding_score_batch(columns: dict[str, np.ndarray]) -> np.ndarray:
+    import numpy as np
+    return calc_score_batch(columns, np.log(columns['Troponin T in ng/L']), np.log(columns['GDF-15 in ng/L']))
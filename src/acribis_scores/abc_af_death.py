@@ -1,9 +1,17 @@
+from __future__ import annotations
+
+import functools
 import math
-from typing import TypedDict, Annotated
+from typing import TYPE_CHECKING, TypedDict, Annotated
 
-from acribis_scores.batch_processing import batch_process
+from acribis_scores.batch_processing import batch_process, columnar
+from acribis_scores.linear_predictor import LinearPredictor
+from acribis_scores.splines import SplineBasis
 from acribis_scores.value_range import ValueRange, check_ranges
 
+if TYPE_CHECKING:
+    import numpy as np
+
 # See: https://doi.org/10.1093/eurheartj/ehx584
 # Also: https://academic.oup.com/eurheartj/article/39/6/477/4554831#supplementary-data
 
@@ -71,32 +79,68 @@ MODEL_B_SPLINE_TERMS = {
     'Troponin T in ng/L': (1.705, 2.389, 3.211)
 }
 
+# The biomarker knots are the same in both models, so their log values and spline terms are shared
+BIOMARKERS = ('NT-proBNP in ng/L', 'GDF-15 in ng/L', 'Troponin T in ng/L')
+BIOMARKER_BASIS = SplineBasis.from_terms(MODEL_A_SPLINE_TERMS, BIOMARKERS)
+MODEL_A_AGE_BASIS = SplineBasis.from_terms(MODEL_A_SPLINE_TERMS, ('Age',))
+MODEL_B_AGE_BASIS = SplineBasis.from_terms(MODEL_B_SPLINE_TERMS, ('Age',))
+
+MODEL_A_PREDICTOR = LinearPredictor.from_weights(MODEL_A_WEIGHTS, -7.218)
+MODEL_B_PREDICTOR = LinearPredictor.from_weights(MODEL_B_WEIGHTS, -5.952)
+
+LOG_NT_PROBNP_MIN = math.log(200.0)
 
-def __calc_score__(parameters: dict[str, bool | float | int],
-                   weights: dict[str, float],
-                   spline_terms: dict[str, tuple[float, float, float] | tuple[int, int, int]],
-                   base: float,
-                   exponent: float) -> float:
 
-    for parameter, terms in spline_terms.items():
-        parameters |= {f"({parameter} - {x}) ^ 3": max(0.0, parameters[parameter] - x) ** 3 for x in terms}
+#   Both models stacked (coefficients, intercepts, baseline survival), for evaluating them in one pass over a batch;
+#   built on first use, so importing this module does not import numpy
+@functools.cache
+def _stacked_models() -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    import numpy as np
+    return (np.array([MODEL_A_PREDICTOR.coefficients, MODEL_B_PREDICTOR.coefficients]),
+            np.array([[MODEL_A_PREDICTOR.intercept], [MODEL_B_PREDICTOR.intercept]]),
+            np.array([[0.9763], [0.9876]]))
 
-    x = sum([parameters[parameter] * weight for parameter, weight in weights.items()])
-    one_year_risk = (1 - math.pow(base, math.exp(x - exponent)))
-    return one_year_risk * 100
+
+#   One year risk of all-cause and of cardiovascular death in %, for the log-transformed biomarkers (see panel.py).
+#   NT-proBNP enters both models as log(max(200, NT-proBNP)), which equals max(log(200), log(NT-proBNP)).
+def calc_scores(heart_failure: bool, age: int, log_nt_probnp: float, log_gdf_15: float,
+                log_troponin_t: float) -> tuple[float, float]:
+    biomarkers = BIOMARKER_BASIS((max(LOG_NT_PROBNP_MIN, log_nt_probnp), log_gdf_15, log_troponin_t))
+    model_a_features = [heart_failure] + MODEL_A_AGE_BASIS((max(65, age),)) + biomarkers
+    model_b_features = [heart_failure] + MODEL_B_AGE_BASIS((max(70, age),)) + biomarkers
+
+    model_a = (1 - math.pow(0.9763, math.exp(MODEL_A_PREDICTOR(model_a_features)))) * 100
+    model_b = (1 - math.pow(0.9876, math.exp(MODEL_B_PREDICTOR(model_b_features)))) * 100
+    return model_a, model_b
+
+
+#   Columnar version of 'calc_scores', evaluating both models in one pass
+def calc_scores_batch(heart_failure: np.ndarray, age: np.ndarray, log_nt_probnp: np.ndarray, log_gdf_15: np.ndarray,
+                      log_troponin_t: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    import numpy as np
+    coefficients, intercepts, baseline_survival = _stacked_models()
+    age_end = 1 + len(MODEL_A_AGE_BASIS)
+    features = np.empty((2, coefficients.shape[1], len(age)))
+    features[:, 0] = heart_failure
+    MODEL_A_AGE_BASIS.columns((np.maximum(65, age),), out=features[0, 1:age_end])
+    MODEL_B_AGE_BASIS.columns((np.maximum(70, age),), out=features[1, 1:age_end])
+    features[:, age_end:] = BIOMARKER_BASIS.columns((np.maximum(LOG_NT_PROBNP_MIN, log_nt_probnp), log_gdf_15,
+                                                     log_troponin_t))
+
+    x = np.einsum('mk,mkn->mn', coefficients, features) + intercepts
+    one_year_risk = (1 - np.power(baseline_survival, np.exp(x))) * 100
+    return one_year_risk[0], one_year_risk[1]
 
 
 @batch_process
 @check_ranges
 def calc_abc_af_death_score(parameters: Parameters) -> tuple[float, float]:
-    model_a_new_parameters = {'Heart Failure': parameters['Heart Failure'],
-                              'NT-proBNP in ng/L': math.log(max(200.0, parameters['NT-proBNP in ng/L'])),
-                              'GDF-15 in ng/L': math.log(parameters['GDF-15 in ng/L']),
-                              'Troponin T in ng/L': math.log(parameters['Troponin T in ng/L'])}
-    model_b_new_parameters = model_a_new_parameters.copy()
-    model_a_new_parameters['Age'] = max(65, parameters['Age'])
-    model_b_new_parameters['Age'] = max(70, parameters['Age'])
-
-    model_a = __calc_score__(model_a_new_parameters, MODEL_A_WEIGHTS, MODEL_A_SPLINE_TERMS, 0.9763, 7.218)
-    model_b = __calc_score__(model_b_new_parameters, MODEL_B_WEIGHTS, MODEL_B_SPLINE_TERMS, 0.9876, 5.952)
-    return model_a, model_b
+    return calc_scores(parameters['Heart Failure'], parameters['Age'], math.log(parameters['NT-proBNP in ng/L']),
+                       math.log(parameters['GDF-15 in ng/L']), math.log(parameters['Troponin T in ng/L']))
+
+
+@columnar(Parameters)
+def calc_abc_af_death_score_batch(columns: dict[str, np.ndarray]) -> tuple[np.ndarray, np.ndarray]:
+    import numpy as np
+    return calc_scores_batch(columns['Heart Failure'], columns['Age'], np.log(columns['NT-proBNP in ng/L']),
+                             np.log(columns['GDF-15 in ng/L']), np.log(columns['Troponin T in ng/L']))
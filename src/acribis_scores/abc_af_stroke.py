@@ -1,8 +1,14 @@
+from __future__ import annotations
+
 import math
-from typing import TypedDict, Annotated
+from typing import TYPE_CHECKING, TypedDict, Annotated
+
+from acribis_scores.batch_processing import batch_process, columnar
+from acribis_scores.linear_predictor import LinearPredictor
+from acribis_scores.value_range import ValueRange, check_ranges, ParameterError, InvalidParametersError
 
-from acribis_scores.batch_processing import batch_process
-from acribis_scores.value_range import ValueRange, check_ranges
+if TYPE_CHECKING:
+    import numpy as np
 
 # See: https://doi.org/10.1093/eurheartj/ehw054
 # And: https://www.ahajournals.org/action/downloadSupplement?doi=10.1161%2FCIRCULATIONAHA.120.053100&file=Supplement_210420_final.pdf#subsection.2.1
@@ -24,21 +30,58 @@ WEIGHTS: dict[str, float] = {
     'log(NT-proBNP in ng/L)': 0.2879
 }
 
+LINEAR_PREDICTOR = LinearPredictor.from_weights(WEIGHTS, -3.286)
 
-@batch_process
-@check_ranges
-def calc_abc_af_stroke_score(parameters: Parameters) -> float:
-    if not any([parameters['DOAC'], parameters['Aspirin']]):
-        raise ValueError("Either 'DOAC' or 'Aspirin' must be true!")
-    if parameters['DOAC'] and parameters['Aspirin']:
-        raise ValueError("'DOAC' and 'Aspirin' cannot both be true!")
-    new_parameters = dict({key: value for key, value in parameters.items()})
-    new_parameters['log(Troponin T in ng/L)'] = math.log(parameters['Troponin T in ng/L'])
-    new_parameters['log(NT-proBNP in ng/L)'] = math.log(parameters['NT-proBNP in ng/L'])
-    linear_predictor = sum([new_parameters[parameter] * weight for parameter, weight in WEIGHTS.items()]) - 3.286
+TREATMENT_MISSING = "Either 'DOAC' or 'Aspirin' must be true!"
+TREATMENT_AMBIGUOUS = "'DOAC' and 'Aspirin' cannot both be true!"
+
+
+#   One year risk of stroke in %, for the log-transformed Troponin T and NT-proBNP (see panel.py)
+def calc_score(parameters: Parameters, log_troponin_t: float, log_nt_probnp: float) -> float:
+    treatment = (parameters['DOAC'], parameters['Aspirin'])
+    if not any(treatment):
+        raise InvalidParametersError([ParameterError('DOAC/Aspirin', treatment, None, TREATMENT_MISSING)])
+    if all(treatment):
+        raise InvalidParametersError([ParameterError('DOAC/Aspirin', treatment, None, TREATMENT_AMBIGUOUS)])
+    linear_predictor = LINEAR_PREDICTOR((parameters['Prior Stroke/TIA'], parameters['Age'], log_troponin_t,
+                                         log_nt_probnp))
     baseline_survival = 0.9863
     if parameters['Aspirin']:
         linear_predictor = 0.25627 + 1.0426 * linear_predictor
         baseline_survival = 0.9673
     one_year_risk = (1 - math.pow(baseline_survival, math.exp(linear_predictor)))
     return one_year_risk * 100
+
+
+#   Columnar version of 'calc_score'
+def calc_score_batch(columns: dict[str, np.ndarray], log_troponin_t: np.ndarray,
+                     log_nt_probnp: np.ndarray) -> np.ndarray:
+    import numpy as np
+    if not np.all(columns['DOAC'] | columns['Aspirin']):
+        raise InvalidParametersError([ParameterError('DOAC/Aspirin', (False, False), None, TREATMENT_MISSING)])
+    if np.any(columns['DOAC'] & columns['Aspirin']):
+        raise InvalidParametersError([ParameterError('DOAC/Aspirin', (True, True), None, TREATMENT_AMBIGUOUS)])
+    features = LINEAR_PREDICTOR.buffer(len(columns['Age']))
+    features[0] = columns['Prior Stroke/TIA']
+    features[1] = columns['Age']
+    features[2] = log_troponin_t
+    features[3] = log_nt_probnp
+    linear_predictor = LINEAR_PREDICTOR.columns(features)
+    aspirin = columns['Aspirin']
+    linear_predictor = np.where(aspirin, 0.25627 + 1.0426 * linear_predictor, linear_predictor)
+    baseline_survival = np.where(aspirin, 0.9673, 0.9863)
+    one_year_risk = (1 - np.power(baseline_survival, np.exp(linear_predictor)))
+    return one_year_risk * 100
+
+
+@batch_process
+@check_ranges
+def calc_abc_af_stroke_score(parameters: Parameters) -> float:
+    return calc_score(parameters, math.log(parameters['Troponin T in ng/L']),
+                      math.log(parameters['NT-proBNP in ng/L']))
+
+
+@columnar(Parameters)
+def calc_abc_af_stroke_score_batch(columns: dict[str, np.ndarray]) -> np.ndarray:
+    import numpy as np
+    return calc_score_batch(columns, np.log(columns['Troponin T in ng/L']), np.log(columns['NT-proBNP in ng/L']))
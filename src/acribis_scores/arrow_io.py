@@ -0,0 +1,99 @@
+import importlib
+from collections.abc import Callable, Collection, Iterator, Mapping, Sequence
+from typing import get_type_hints
+
+import numpy as np
+
+from acribis_scores.batch_processing import ColumnData, result_columns
+from acribis_scores.value_range import ParameterError, InvalidParametersError
+
+#   Batch scoring of Arrow tables and Parquet files with the columnar 'calc_*_score_batch' functions. The data is
+#   scored one record batch ('chunk_size' rows) at a time, so memory stays proportional to the chunk size. Numeric
+#   columns without nulls are passed to the score functions without copying.
+#
+#   Nulls are only allowed in the optional fields (e.g. the biomarkers of Barcelona Bio-HF), where they mark a missing
+#   value; a null in any other field raises InvalidParametersError.
+#
+#   'mapping' maps 'Parameters' field names to the column names of the data; unmapped fields keep their names.
+#   Results are flattened to one output column each, named after the score function, e.g. 'abc_af_stroke_score',
+#   'abc_af_death_score[0]' for tuples or 'barcelona_hf_v3_score.with_biomarkers.death[1]' for nested results.
+#   'output_names' renames these columns, 'keep_columns' copies input columns (e.g. a patient ID) into the output.
+
+DEFAULT_CHUNK_SIZE = 1 << 16
+
+
+def _pyarrow():
+    try:
+        return importlib.import_module('pyarrow'), importlib.import_module('pyarrow.parquet')
+    except ImportError as e:
+        raise ImportError("Arrow/Parquet support requires pyarrow: pip install 'acribis_scores[arrow]'") from e
+
+
+def _score_name(batch_func: Callable) -> str:
+    return batch_func.__name__.removeprefix('calc_').removesuffix('_batch')
+
+
+def _source_columns(batch_func: Callable, mapping: Mapping[str, str], available: Sequence[str]) -> dict[str, str]:
+    # Field name -> column name of all fields present in the data; missing required fields are reported when scoring
+    fields = get_type_hints(batch_func.parameters_type)
+    return {field: mapping.get(field, field) for field in fields if mapping.get(field, field) in available}
+
+
+def _batch_columns(batch, source_columns: Mapping[str, str], optional: Collection[str]) -> ColumnData:
+    columns = {}
+    for field, column in source_columns.items():
+        array = batch.column(column)
+        if array.null_count:
+            if field not in optional:
+                message = f"{field} is required but not provided! ({array.null_count} null values)"
+                raise InvalidParametersError([ParameterError(field, None, None, message)])
+            # Missing values of optional fields are NaN, like in 'to_columns'
+            array = array.cast('float64').fill_null(np.nan)
+        columns[field] = array.to_numpy(zero_copy_only=False)
+    return columns
+
+
+def _score_batches(batch_func: Callable, batches, names: Sequence[str], mapping: Mapping[str, str] | None,
+                   output_names: Mapping[str, str] | None, keep_columns: Sequence[str]) -> Iterator:
+    pa, _ = _pyarrow()
+    source_columns = _source_columns(batch_func, mapping or {}, names)
+    optional = batch_func.parameters_type.__optional_keys__
+    score_name = _score_name(batch_func)
+    output_names = output_names or {}
+    for batch in batches:
+        results = result_columns(batch_func(_batch_columns(batch, source_columns, optional)), score_name)
+        arrays = [batch.column(column) for column in keep_columns] + [pa.array(v) for v in results.values()]
+        yield pa.RecordBatch.from_arrays(arrays, names=list(keep_columns) + [output_names.get(k, k) for k in results])
+
+
+def score_table(batch_func: Callable, table, mapping: Mapping[str, str] | None = None,
+                chunk_size: int = DEFAULT_CHUNK_SIZE, output_names: Mapping[str, str] | None = None,
+                keep_columns: Sequence[str] = ()):
+    pa, _ = _pyarrow()
+    batches = list(_score_batches(batch_func, table.to_batches(max_chunksize=chunk_size), table.column_names,
+                                  mapping, output_names, keep_columns))
+    if not batches:
+        return pa.table({})
+    return pa.Table.from_batches(batches)
+
+
+def score_parquet(batch_func: Callable, source: str, destination: str, mapping: Mapping[str, str] | None = None,
+                  chunk_size: int = DEFAULT_CHUNK_SIZE, output_names: Mapping[str, str] | None = None,
+                  keep_columns: Sequence[str] = ()) -> int:
+    _, pq = _pyarrow()
+    parquet_file = pq.ParquetFile(source)
+    names = parquet_file.schema_arrow.names
+    columns = list(dict.fromkeys([*keep_columns, *_source_columns(batch_func, mapping or {}, names).values()]))
+    rows = 0
+    writer = None
+    try:
+        for batch in _score_batches(batch_func, parquet_file.iter_batches(batch_size=chunk_size, columns=columns),
+                                    names, mapping, output_names, keep_columns):
+            if writer is None:
+                writer = pq.ParquetWriter(destination, batch.schema)
+            writer.write_batch(batch)
+            rows += batch.num_rows
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
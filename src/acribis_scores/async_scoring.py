@@ -0,0 +1,87 @@
+import asyncio
+import functools
+import weakref
+from concurrent.futures import Executor
+from typing import Any
+
+from acribis_scores.batch_processing import score_rows
+from acribis_scores.registry import Score, get_score
+
+#   Scoring from asyncio code without blocking the event loop:
+#
+#       result = await score_async('MAGGIC', parameters)
+#
+#   Requests for the same score that arrive while the loop is busy are collected and scored in one call of the batch
+#   function (split per row as in 'stream_process'; a single request is scored with the scalar function). Either way,
+#   a result has the shape of the scalar result, e.g. no 'with_biomarkers' for a Barcelona Bio-HF patient without
+#   biomarkers. The batches run in 'executor' (default: the loop's default thread pool); pass a ProcessPoolExecutor
+#   for CPU-bound scores.
+#   At most 'max_pending' requests are accepted at a time, further requests wait for a free slot.
+
+
+def _resolve(pending: list[tuple[dict[str, Any], asyncio.Future]], task: asyncio.Future):
+    if task.cancelled() or task.exception() is not None:
+        for _, future in pending:
+            if not future.done():
+                if task.cancelled():
+                    future.cancel()
+                else:
+                    future.set_exception(task.exception())
+        return
+    for (_, future), (ok, value) in zip(pending, task.result()):
+        # Requests cancelled by the caller are already done
+        if future.done():
+            continue
+        if ok:
+            future.set_result(value)
+        else:
+            future.set_exception(value)
+
+
+class AsyncScorer:
+    def __init__(self, executor: Executor | None = None, max_batch_size: int = 1000, max_delay: float = 0.0,
+                 max_pending: int = 10000):
+        if max_batch_size < 1 or max_pending < 1 or max_delay < 0:
+            raise ValueError('max_batch_size and max_pending must be positive and max_delay must not be negative!')
+        self.executor = executor
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        self.__semaphore = asyncio.Semaphore(max_pending)
+        self.__pending: dict[str, list[tuple[dict[str, Any], asyncio.Future]]] = {}
+        self.__timers: dict[str, asyncio.TimerHandle] = {}
+
+    async def score(self, name: str, parameters: dict[str, Any]) -> Any:
+        score = get_score(name)
+        async with self.__semaphore:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            pending = self.__pending.setdefault(score.name, [])
+            pending.append((parameters, future))
+            if len(pending) >= self.max_batch_size:
+                self.__flush(score)
+            elif score.name not in self.__timers:
+                self.__timers[score.name] = loop.call_later(self.max_delay, self.__flush, score)
+            return await future
+
+    def __flush(self, score: Score):
+        timer = self.__timers.pop(score.name, None)
+        if timer is not None:
+            timer.cancel()
+        pending = self.__pending.pop(score.name, [])
+        if not pending:
+            return
+        task = asyncio.get_running_loop().run_in_executor(self.executor, score_rows, score.calc, score.calc_batch,
+                                                          [parameters for parameters, _ in pending])
+        task.add_done_callback(functools.partial(_resolve, pending))
+
+
+# One default scorer per event loop
+_scorers: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncScorer] = weakref.WeakKeyDictionary()
+
+
+async def score_async(name: str, parameters: dict[str, Any]) -> Any:
+    loop = asyncio.get_running_loop()
+    scorer = _scorers.get(loop)
+    if scorer is None:
+        scorer = _scorers[loop] = AsyncScorer()
+    return await scorer.score(name, parameters)
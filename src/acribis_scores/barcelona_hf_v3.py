@@ -1,14 +1,24 @@
+from __future__ import annotations
+
+import csv
+import functools
 import math
 import typing
-import pandas as pd
+from collections.abc import Mapping
+from dataclasses import dataclass
 from enum import Enum
 from importlib import resources as ir
-from typing import TypedDict, Any, Annotated
+from types import MappingProxyType
+from typing import TYPE_CHECKING, TypedDict, Any, Annotated, NamedTuple
 
 import acribis_scores.resources as bcn_resources
-from acribis_scores.batch_processing import batch_process
+from acribis_scores import instrumentation
+from acribis_scores.batch_processing import batch_process, columnar
 from acribis_scores.value_range import ValueRange, check_ranges
 
+if TYPE_CHECKING:
+    import numpy as np
+
 
 class Model(Enum):
     MODEL_1 = "Basic Clinical Model"
@@ -46,25 +56,191 @@ Parameters = TypedDict('Parameters', {
     'SGLT2i': bool,
 })
 
+
+class MinMaxMedian(NamedTuple):
+    lower_limit: float
+    upper_limit: float
+    median_impute: float
+
+
 #   The values in the min-max-median below is taken from the v3 disclaimer (terms of use).
 #   Edit: 02.01.2025: Replaced with values from the Excel sheets provided by the author
-MIN_MAX_MEDIAN = pd.DataFrame(
-    {
-        'lower_limit': [31.31446954141, 13, 128, 7.63881506570324, 8.9, 37.45, 4.8245, 6.29, 0, 0],
-        'upper_limit': [90.9212046543464, 78.71, 145, 119.283356873844, 16.771, 34800, 242.84, 171.1, 257.040000000001,
-                        5.71000000000004],
-        'median_impute': [70.3, 35, 138, 60.613452863849, 12.9, 1361.5, 22.6, 38.1, 6, 0]
-    },
-    index=['Age (years)', 'Ejection fraction (%)', 'Sodium (mmol/L)', 'eGFR in mL/min/1.73m²',
-           'Hemoglobin (g/dL)', 'NT-proBNP in pg/mL', 'hs-cTnT in ng/L', 'ST2 (ng/mL)',
-           'HF Duration in months', 'Hospitalisation Prev. Year']
-)
+MIN_MAX_MEDIAN: dict[str, MinMaxMedian] = {
+    'Age (years)': MinMaxMedian(31.31446954141, 90.9212046543464, 70.3),
+    'Ejection fraction (%)': MinMaxMedian(13.0, 78.71, 35.0),
+    'Sodium (mmol/L)': MinMaxMedian(128.0, 145.0, 138.0),
+    'eGFR in mL/min/1.73m²': MinMaxMedian(7.63881506570324, 119.283356873844, 60.613452863849),
+    'Hemoglobin (g/dL)': MinMaxMedian(8.9, 16.771, 12.9),
+    'NT-proBNP in pg/mL': MinMaxMedian(37.45, 34800.0, 1361.5),
+    'hs-cTnT in ng/L': MinMaxMedian(4.8245, 242.84, 22.6),
+    'ST2 (ng/mL)': MinMaxMedian(6.29, 171.1, 38.1),
+    'HF Duration in months': MinMaxMedian(0.0, 257.040000000001, 6.0),
+    'Hospitalisation Prev. Year': MinMaxMedian(0.0, 5.71000000000004, 0.0)
+}
+
+ENDPOINTS = ('death', 'hosp', 'hosp_death')
+
+SURVIVAL_ESTIMATES = ('One_year_survival', 'Two_year_survival', 'Three_year_survival', 'Four_year_survival',
+                      'Five_year_survival')
+
+
+@dataclass(frozen=True)
+class EndpointModel:
+    variables: tuple[str, ...]
+    coefficients: tuple[float, ...]
+    sum_product: float
+    survival_estimates: tuple[float, ...]
+
+
+@dataclass(frozen=True)
+class LifeExpectancyModel:
+    variables: tuple[str, ...]
+    coefficients: tuple[float, ...]
+    intercept: float
+    gamma_value: float
+
+
+#   The endpoints and life expectancy share their variables, so the coefficients of all models are stacked into one
+#   (models x features x linear predictors) matrix: a patient's feature vector times the matrix of a model gives the
+#   linear predictors of all endpoints and of life expectancy at once. 'Hospitalisation Prev. Year' enters the
+#   hospitalisation endpoint as a count and the other models as yes/no, so it is split into two features.
+HOSPITALISED = 'Hospitalised Prev. Year'
+
+# Features of the optional biomarkers, 0 for the models without them; all other features are required
+BIOMARKER_FEATURES = frozenset({'log(NT-proBNP in pg/mL)', 'log(hs-cTnT in ng/L)', 'Squared log(hs-cTnT in ng/L)',
+                                'ST2_div_10', 'Squared ST2_div_10'})
+
+LINEAR_PREDICTORS = (*ENDPOINTS, 'life_expectancy')
+
+MODEL_INDEX: dict[Model, int] = {model: i for i, model in enumerate(Model)}
+
+
+@dataclass(frozen=True)
+class StackedModels:
+    features: tuple[str, ...]
+    # (models x features x linear predictors)
+    coefficients: np.ndarray
+    # (models x linear predictors): -Sum_Product for the endpoints, the intercept for life expectancy
+    offsets: np.ndarray
+    # (models x endpoints x years)
+    survival_estimates: np.ndarray
+    # (models)
+    gamma_values: np.ndarray
+
+
+@dataclass(frozen=True)
+class CoefficientRegistry:
+    endpoints: Mapping[str, Mapping[Model, EndpointModel]]
+    life_expectancy: Mapping[Model, LifeExpectancyModel]
+    # Age -> (upper limit men, upper limit women)
+    life_expectancy_limits: Mapping[int, tuple[float, float]]
+    stacked: StackedModels
+
+
+def _read_csv(file_name: str) -> list[list[str]]:
+    with (ir.files(bcn_resources) / file_name).open('r', encoding='utf-8', newline='') as f:
+        return list(csv.reader(f))
+
+
+#   Model name -> (variable, coefficient) pairs in file order
+def _read_coefficients(file_name: str) -> dict[str, list[tuple[str, float]]]:
+    header, *rows = _read_csv(file_name)
+    values = [(row[0], [float(value) for value in row[1:]]) for row in rows]
+    return {model: [(variable, coefficients[i]) for variable, coefficients in values]
+            for i, model in enumerate(header[1:])}
+
+
+def _load_endpoint(endpoint: str) -> Mapping[Model, EndpointModel]:
+    model_coefficients = _read_coefficients(f"barcelona_hf_v3_{endpoint}_coefficients.csv")
+    endpoint_models = {}
+    for model in Model:
+        column = model_coefficients[model.name]
+        summary = dict(column[-6:])
+        endpoint_models[model] = EndpointModel(
+            variables=tuple(variable for variable, _ in column[:-6]),
+            coefficients=tuple(coefficient for _, coefficient in column[:-6]),
+            sum_product=summary['Sum_Product'],
+            survival_estimates=tuple(summary[name] for name in SURVIVAL_ESTIMATES)
+        )
+    return MappingProxyType(endpoint_models)
+
+
+def _load_life_expectancy() -> Mapping[Model, LifeExpectancyModel]:
+    le_coefficients = _read_coefficients('barcelona_hf_v3_life_expectancy_coefficients.csv')
+    life_expectancy_models = {}
+    for model in Model:
+        column = le_coefficients[model.name]
+        summary = dict(column[-2:])
+        life_expectancy_models[model] = LifeExpectancyModel(
+            variables=tuple(variable for variable, _ in column[:-2]),
+            coefficients=tuple(coefficient for _, coefficient in column[:-2]),
+            intercept=summary['Intercept'],
+            gamma_value=summary['Gamma Value']
+        )
+    return MappingProxyType(life_expectancy_models)
+
+
+def _load_life_expectancy_limits() -> Mapping[int, tuple[float, float]]:
+    header, *rows = _read_csv('life_expectancy_limits.csv')
+    if header != ['Age', 'Men', 'Women']:
+        raise ValueError(f"Unexpected columns in 'life_expectancy_limits.csv': {header}")
+    return MappingProxyType({int(age): (float(men), float(women)) for age, men, women in rows})
+
+
+def _stack(endpoints: Mapping[str, Mapping[Model, EndpointModel]],
+           life_expectancy: Mapping[Model, LifeExpectancyModel]) -> StackedModels:
+    import numpy as np
+    variables = endpoints[ENDPOINTS[0]][Model.MODEL_1].variables
+    linear_predictors = [endpoints[endpoint] for endpoint in ENDPOINTS] + [life_expectancy]
+    if any(models[model].variables != variables for models in linear_predictors for model in Model):
+        raise ValueError('All Barcelona Bio-HF models must use the same variables!')
+    features = (*variables, HOSPITALISED)
+    coefficients = np.zeros((len(Model), len(features), len(LINEAR_PREDICTORS)))
+    for j, (name, models) in enumerate(zip(LINEAR_PREDICTORS, linear_predictors)):
+        for model in Model:
+            for variable, coefficient in zip(variables, models[model].coefficients):
+                if variable == 'Hospitalisation Prev. Year' and name != 'hosp':
+                    variable = HOSPITALISED
+                coefficients[MODEL_INDEX[model], features.index(variable), j] = coefficient
+    offsets = np.array([[-endpoints[endpoint][model].sum_product for endpoint in ENDPOINTS] +
+                        [life_expectancy[model].intercept] for model in Model])
+    survival_estimates = np.array([[endpoints[endpoint][model].survival_estimates for endpoint in ENDPOINTS]
+                                   for model in Model])
+    gamma_values = np.array([life_expectancy[model].gamma_value for model in Model])
+    for array in (coefficients, offsets, survival_estimates, gamma_values):
+        array.flags.writeable = False
+    return StackedModels(features, coefficients, offsets, survival_estimates, gamma_values)
+
+
+#   The coefficient files are parsed once on first use, so scoring does not touch the disk afterward.
+@functools.cache
+def get_coefficient_registry() -> CoefficientRegistry:
+    with instrumentation.stage('barcelona_hf_v3', instrumentation.LOADING):
+        endpoints = MappingProxyType({endpoint: _load_endpoint(endpoint) for endpoint in ENDPOINTS})
+        life_expectancy = _load_life_expectancy()
+        return CoefficientRegistry(
+            endpoints=endpoints,
+            life_expectancy=life_expectancy,
+            life_expectancy_limits=_load_life_expectancy_limits(),
+            stacked=_stack(endpoints, life_expectancy)
+        )
+
+
+def clear_cache() -> None:
+    get_coefficient_registry.cache_clear()
+
+
+def reload() -> CoefficientRegistry:
+    clear_cache()
+    return get_coefficient_registry()
+
+
+def warm_up():
+    get_coefficient_registry()
 
 
 def check_values(parameter_value, parameter_name, min_max_median):
-    lower_limit = min_max_median["lower_limit"][parameter_name]
-    upper_limit = min_max_median["upper_limit"][parameter_name]
-    median_impute = min_max_median["median_impute"][parameter_name]
+    lower_limit, upper_limit, median_impute = min_max_median[parameter_name]
     if parameter_value is None:
         parameter_value = median_impute if not math.isnan(median_impute) else None
     elif parameter_value < lower_limit:
@@ -100,28 +276,6 @@ def get_model(parameters):
     return model
 
 
-def get_coefficients(model, model_coefficients):
-    coefficients = model_coefficients[model.name][:-6]
-    sum_product = model_coefficients[model.name]['Sum_Product']
-    return coefficients, sum_product
-
-
-def get_survival_estimate(model, survival_year, model_coefficients) -> float:
-    if survival_year == 1:
-        survival_estimate = model_coefficients[model.name]['One_year_survival']
-    elif survival_year == 2:
-        survival_estimate = model_coefficients[model.name]['Two_year_survival']
-    elif survival_year == 3:
-        survival_estimate = model_coefficients[model.name]['Three_year_survival']
-    elif survival_year == 4:
-        survival_estimate = model_coefficients[model.name]['Four_year_survival']
-    elif survival_year == 5:
-        survival_estimate = model_coefficients[model.name]['Five_year_survival']
-    else:
-        raise ValueError(f"'survival_year' must be between 1 and 6 ('{survival_year}' was provided)!")
-    return survival_estimate
-
-
 def get_new_parameters(parameters):
     new_parameters = dict({key: value for key, value in parameters.items()})
     new_parameters['NYHA Class'] = 0 if parameters['NYHA Class'] in [1, 2] else 1
@@ -143,53 +297,13 @@ def get_new_parameters(parameters):
     return new_parameters
 
 
-def get_scores(file, model, new_parameters):
-    scores = []
-    with file.open('r', encoding='utf-8') as f:
-        model_beta_coefficients = pd.read_csv(f, index_col='Variables')
-    coefficients, sum_product = get_coefficients(model, model_beta_coefficients)
-    if file.name == 'barcelona_hf_v3_hosp_coefficients.csv':
-        sum_product_all_parameters = sum(
-            [new_parameters[parameter] * coeff for parameter, coeff in coefficients.items() if
-             parameter in new_parameters]
-        )
-    else:
-        new_parameters_copy = {key: value for key, value in new_parameters.items()}
-        new_parameters_copy['Hospitalisation Prev. Year'] = bool(new_parameters_copy['Hospitalisation Prev. Year'])
-        sum_product_all_parameters = sum(
-            [new_parameters_copy[parameter] * coeff for parameter, coeff in coefficients.items() if
-             parameter in new_parameters_copy]
-        )
-    for year in range(1, 6):
-        survival_estimate = get_survival_estimate(model, year, model_beta_coefficients)
-        score = (1 - math.pow(survival_estimate, math.exp(sum_product_all_parameters - sum_product))) * 100
-        scores.append(round(score, 1))
-    return scores
-
-
-def calc_life_expectancy(model, new_parameters):
-    coefficients_life_expectancy = (ir.files(bcn_resources) / 'barcelona_hf_v3_life_expectancy_coefficients.csv')
-    life_expectancy_limits = (ir.files(bcn_resources) / 'life_expectancy_limits.csv')
-    with (coefficients_life_expectancy.open('r', encoding='utf-8') as f1,
-          life_expectancy_limits.open('r', encoding='utf-8') as f2):
-        le_coefficients = pd.read_csv(f1, index_col='Variables')
-        le_limits = pd.read_csv(f2)
-    coefficients = le_coefficients[model.name][:-2]
-    new_parameters_copy = dict({key: value for key, value in new_parameters.items()})
-    new_parameters_copy['Hospitalisation Prev. Year'] = bool(new_parameters_copy['Hospitalisation Prev. Year'])
-    sum_product_all_parameters = sum(
-        [new_parameters_copy[parameter] * coeff for parameter, coeff in coefficients.items() if
-         parameter in new_parameters_copy]
-    )
-    intercept = le_coefficients[model.name]['Intercept']
-    gamma_value = le_coefficients[model.name]['Gamma Value']
-    le = math.exp(intercept + sum_product_all_parameters) * gamma_value
-    key = 'Women' if new_parameters['Female'] else 'Men'
-    age = int(new_parameters['Age (years)'])
-    if age in list(le_limits['Age']):
+def _limit_life_expectancy(le: float, female: bool, age: int,
+                           limits: Mapping[int, tuple[float, float]]) -> float | str:
+    key = 'Women' if female else 'Men'
+    if age in limits:
         if (key == 'Men' and age > 63) or (key == 'Women' and age > 67):
-            upper_limit = le_limits.loc[le_limits['Age'] == int(new_parameters['Age (years)']), key].iloc[0]
-            if le > float(upper_limit):
+            upper_limit = limits[age][1 if key == 'Women' else 0]
+            if le > upper_limit:
                 le = upper_limit
     if le > 20:
         if key == 'Men' and age <= 63:
@@ -199,49 +313,226 @@ def calc_life_expectancy(model, new_parameters):
     return le
 
 
-def _round_life_expectancy(model, parameters):
-    life_expectancy = calc_life_expectancy(model, parameters)
+def _round(life_expectancy: float | str) -> float | str:
     try:
-        life_expectancy = round(float(life_expectancy), 1)
+        return round(float(life_expectancy), 1)
     except ValueError:
-        pass
-    return life_expectancy
+        return life_expectancy
+
+
+def _feature(values: Mapping[str, Any], feature: str, biomarker_default: Any) -> Any:
+    if feature in values:
+        return values[feature]
+    if feature in BIOMARKER_FEATURES:
+        return biomarker_default
+    raise KeyError(f"Feature '{feature}' is required but not provided!")
+
+
+def _feature_vector(new_parameters, features: tuple[str, ...]) -> np.ndarray:
+    import numpy as np
+    values = new_parameters | {HOSPITALISED: bool(new_parameters['Hospitalisation Prev. Year'])}
+    return np.array([_feature(values, feature, 0.0) for feature in features], dtype=float)
+
+
+#   Risks in % (models x endpoints x years) and the unlimited life expectancy (models) of the given models
+def _calc_models(features: np.ndarray, models: list[Model], stacked: StackedModels) -> tuple[np.ndarray, np.ndarray]:
+    import numpy as np
+    index = [MODEL_INDEX[model] for model in models]
+    linear_predictors = features @ stacked.coefficients[index] + stacked.offsets[index]
+    risks = (1 - stacked.survival_estimates[index] ** np.exp(linear_predictors[:, :len(ENDPOINTS), None])) * 100
+    return risks, np.exp(linear_predictors[:, -1]) * stacked.gamma_values[index]
+
+
+#   Functions of the former per-endpoint implementation, kept for existing callers: thin wrappers over the stacked
+#   models, with the results of 'calc_barcelona_hf_score'. 'new_parameters' are the output of 'get_new_parameters'.
+def get_coefficients(model: Model, endpoint: str) -> tuple[EndpointModel, float]:
+    coefficients = get_coefficient_registry().endpoints[endpoint][model]
+    return coefficients, coefficients.sum_product
+
+
+def get_survival_estimate(model: Model, survival_year: int, endpoint: str) -> float:
+    if not 1 <= survival_year <= 5:
+        raise ValueError(f"'survival_year' must be between 1 and 5 ('{survival_year}' was provided)!")
+    stacked = get_coefficient_registry().stacked
+    return stacked.survival_estimates[MODEL_INDEX[model], ENDPOINTS.index(endpoint), survival_year - 1].item()
+
+
+def get_scores(endpoint: str, model: Model, new_parameters) -> list[float]:
+    stacked = get_coefficient_registry().stacked
+    risks, _ = _calc_models(_feature_vector(new_parameters, stacked.features), [model], stacked)
+    return [round(risk, 1) for risk in risks[0, ENDPOINTS.index(endpoint)].tolist()]
+
+
+def calc_life_expectancy(model: Model, new_parameters) -> float | str:
+    registry = get_coefficient_registry()
+    _, life_expectancies = _calc_models(_feature_vector(new_parameters, registry.stacked.features), [model],
+                                        registry.stacked)
+    return _limit_life_expectancy(life_expectancies[0].item(), new_parameters['Female'],
+                                  int(new_parameters['Age (years)']), registry.life_expectancy_limits)
+
+
+def _round_life_expectancy(model: Model, new_parameters) -> float | str:
+    return _round(calc_life_expectancy(model, new_parameters))
 
 
 @batch_process
 @check_ranges
 def calc_barcelona_hf_score(parameters: Parameters) -> dict[str, dict[str, list[float] | Any]]:
     all_scores = {}
-    coefficients_death_file = (ir.files(bcn_resources) / 'barcelona_hf_v3_death_coefficients.csv')
-    coefficients_hosp_file = (ir.files(bcn_resources) / 'barcelona_hf_v3_hosp_coefficients.csv')
-    coefficients_hosp_death_file = (ir.files(bcn_resources) / 'barcelona_hf_v3_hosp_death_coefficients.csv')
     model = get_model(parameters)
 
-    for param in MIN_MAX_MEDIAN.index.to_list():
+    for param in MIN_MAX_MEDIAN:
         if param in parameters:
             parameters[param] = check_values(parameters[param], param, MIN_MAX_MEDIAN)  # type: ignore
 
-    new_parameters = get_new_parameters(parameters)
-    endpoints_without_biomarkers, endpoints_with_biomarkers = {}, {}
-    for file in [coefficients_death_file, coefficients_hosp_file, coefficients_hosp_death_file]:
-        suffix = file.name[16:-17]
-        scores_without_biomarkers = get_scores(file, Model.MODEL_1, new_parameters)
-        endpoints_without_biomarkers[suffix] = scores_without_biomarkers
+    with instrumentation.stage('barcelona_hf_v3', instrumentation.FEATURES):
+        new_parameters = get_new_parameters(parameters)
+    registry = get_coefficient_registry()
+    models = [Model.MODEL_1] if model == Model.MODEL_1 else [Model.MODEL_1, model]
+    risks, life_expectancies = _calc_models(_feature_vector(new_parameters, registry.stacked.features), models,
+                                            registry.stacked)
+    for biomarkers, model_risks, life_expectancy in zip(['without_biomarkers', 'with_biomarkers'], risks.tolist(),
+                                                        life_expectancies.tolist()):
+        endpoints = {}
+        for endpoint, endpoint_risks in zip(ENDPOINTS, model_risks):
+            endpoints[endpoint] = [round(risk, 1) for risk in endpoint_risks]
+            if endpoint == 'death':
+                endpoints['life_expectancy'] = str(_round(_limit_life_expectancy(
+                    life_expectancy, parameters['Female'], int(parameters['Age (years)']),
+                    registry.life_expectancy_limits)))
+        all_scores[biomarkers] = endpoints
+
+    return all_scores
+
+
+BIOMARKERS = ('NT-proBNP in pg/mL', 'hs-cTnT in ng/L', 'ST2 (ng/mL)')
+
+# Model for each bitmask of available biomarkers (bit i set if BIOMARKERS[i] is available)
+MODELS_BY_MASK = tuple(get_model({biomarker: 0 for i, biomarker in enumerate(BIOMARKERS) if mask >> i & 1})
+                       for mask in range(1 << len(BIOMARKERS)))
+MODEL_INDEX_BY_MASK = tuple(MODEL_INDEX[model] for model in MODELS_BY_MASK)
+
+# Rows are scored in blocks to keep the (patients x models x linear predictors) arrays small
+BLOCK_SIZE = 1 << 16
+
+
+#   Same as round(value, 1) for each value: np.round scales by 10, which can round values close to x.x5 the other way,
+#   so these are rounded by round()
+def _round_columns(values: np.ndarray) -> np.ndarray:
+    import numpy as np
+    rounded = np.round(values, 1)
+    scaled = values * 10
+    ambiguous = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    if ambiguous.any():
+        rounded[ambiguous] = [round(value, 1) for value in values[ambiguous].tolist()]
+    return rounded
+
+
+def _new_columns(columns: Mapping[str, np.ndarray]) -> dict[str, np.ndarray]:
+    # Columnar version of 'get_new_parameters'; missing biomarkers are NaN
+    import numpy as np
+    new_columns = dict(columns)
+    new_columns['NYHA Class'] = np.where(np.isin(columns['NYHA Class'], (1, 2)), 0.0, 1.0)
+    new_columns['Ejection fraction (%)'] = np.where(columns['Ejection fraction (%)'] <= 45, 0.0, 1.0)
+    new_columns['log(HF Duration in months)'] = np.log(columns['HF Duration in months'])
+    dose = columns['Loop Diuretic Furosemide Dose']
+    new_columns['Furosemide Dose 1'] = (0 < dose) & (dose <= 40)
+    new_columns['Furosemide Dose 2'] = (40 < dose) & (dose <= 80)
+    new_columns['Furosemide Dose 3'] = dose > 80
+    if 'NT-proBNP in pg/mL' in columns:
+        nt_probnp = columns['NT-proBNP in pg/mL']
+        new_columns['log(NT-proBNP in pg/mL)'] = np.log(np.where(nt_probnp == 0, 1.0, nt_probnp))
+    if 'hs-cTnT in ng/L' in columns:
+        hs_ctnt = columns['hs-cTnT in ng/L']
+        new_columns['log(hs-cTnT in ng/L)'] = np.log(np.where(hs_ctnt == 0, 1.0, hs_ctnt))
+        new_columns['Squared log(hs-cTnT in ng/L)'] = np.square(new_columns['log(hs-cTnT in ng/L)'])
+    if 'ST2 (ng/mL)' in columns:
+        new_columns['ST2_div_10'] = columns['ST2 (ng/mL)'] / 10
+        new_columns['Squared ST2_div_10'] = np.square(new_columns['ST2_div_10'])
+    new_columns[HOSPITALISED] = columns['Hospitalisation Prev. Year'] != 0
+    return new_columns
+
+
+def _life_expectancy_columns(life_expectancy: np.ndarray, female: np.ndarray, age: np.ndarray,
+                             limits: Mapping[int, tuple[float, float]]) -> list[str]:
+    # Columnar version of '_limit_life_expectancy' and '_round'
+    import numpy as np
+    upper_limits = np.full((max(limits) + 1, 2), np.inf)
+    upper_limits[list(limits)] = list(limits.values())
+    age = age.astype(np.int64)
+    limited = np.where(female, age > 67, age > 63)
+    upper_limit = np.where(age < len(upper_limits), upper_limits[np.minimum(age, len(upper_limits) - 1),
+                                                                 female.astype(np.int64)], np.inf)
+    life_expectancy = np.where(limited, np.minimum(life_expectancy, upper_limit), life_expectancy)
+    above_20 = ~limited & (life_expectancy > 20)
+    return ['>20' if above else str(value) for above, value in
+            zip(above_20.tolist(), _round_columns(life_expectancy).tolist())]
+
 
-        if model.name != 'MODEL_1':
-            scores_with_biomarkers = get_scores(file, model, new_parameters)
-            endpoints_with_biomarkers[suffix] = scores_with_biomarkers
+def _score_block(columns: Mapping[str, np.ndarray], registry: CoefficientRegistry,
+                 all_scores: dict[str, dict[str, np.ndarray]], rows: np.ndarray):
+    import numpy as np
+    block = {name: column[rows] for name, column in columns.items()}
+    for name, (lower_limit, upper_limit, _) in MIN_MAX_MEDIAN.items():
+        if name in block:
+            block[name] = np.clip(block[name], lower_limit, upper_limit)
+    mask = np.zeros(len(rows), dtype=np.int64)
+    for i, biomarker in enumerate(BIOMARKERS):
+        if biomarker in block:
+            mask |= ~np.isnan(block[biomarker]) << i
+    model_index = np.array(MODEL_INDEX_BY_MASK)[mask]
 
-        if file.name == 'barcelona_hf_v3_death_coefficients.csv':
-            le_without_biomarkers = _round_life_expectancy(Model.MODEL_1, new_parameters)
-            endpoints_without_biomarkers['life_expectancy'] = str(le_without_biomarkers)
+    with instrumentation.stage('barcelona_hf_v3', instrumentation.FEATURES, len(rows)):
+        new_columns = _new_columns(block)
+    stacked = registry.stacked
+    zeros = np.zeros(len(rows))
+    features = np.column_stack([_feature(new_columns, feature, zeros) for feature in stacked.features])
+    features[np.isnan(features)] = 0.0
 
-            if model.name != 'MODEL_1':
-                le_with_biomarkers = _round_life_expectancy(model, new_parameters)
-                endpoints_with_biomarkers['life_expectancy'] = str(le_with_biomarkers)
+    # Linear predictors of all models at once, then the model of each row is picked
+    n_models, n_features, n_linear_predictors = stacked.coefficients.shape
+    all_models = features @ stacked.coefficients.transpose(1, 0, 2).reshape(n_features, -1)
+    all_models = all_models.reshape(len(rows), n_models, n_linear_predictors) + stacked.offsets
+    for biomarkers, index in (('without_biomarkers', np.full(len(rows), MODEL_INDEX[Model.MODEL_1])),
+                              ('with_biomarkers', model_index)):
+        selected = index != MODEL_INDEX[Model.MODEL_1] if biomarkers == 'with_biomarkers' else slice(None)
+        linear_predictors = all_models[np.arange(len(rows)), index][selected]
+        risks = (1 - stacked.survival_estimates[index][selected] **
+                 np.exp(linear_predictors[:, :len(ENDPOINTS), None])) * 100
+        risks = _round_columns(risks)
+        for i, endpoint in enumerate(ENDPOINTS):
+            all_scores[biomarkers][endpoint][rows[selected]] = risks[:, i]
+        life_expectancy = np.exp(linear_predictors[:, -1]) * stacked.gamma_values[index][selected]
+        all_scores[biomarkers]['life_expectancy'][rows[selected]] = _life_expectancy_columns(
+            life_expectancy, block['Female'][selected], block['Age (years)'][selected],
+            registry.life_expectancy_limits)
 
-    all_scores['without_biomarkers'] = endpoints_without_biomarkers
-    if model.name != 'MODEL_1':
-        all_scores['with_biomarkers'] = endpoints_with_biomarkers
 
+#   Missing biomarkers are given as NaN (or None) in an otherwise filled column. The model of each row is chosen by
+#   the bitmask of its available biomarkers, and all rows are scored in one vectorized pass; 'with_biomarkers' is
+#   NaN (None for life expectancy) for rows without biomarkers. Rows with missing values in other columns are scored
+#   one at a time.
+@columnar(Parameters)
+def calc_barcelona_hf_score_batch(columns: dict[str, np.ndarray]) -> dict[str, dict[str, np.ndarray]]:
+    import numpy as np
+    n = len(next(iter(columns.values())))
+    all_scores: dict[str, dict[str, np.ndarray]] = {}
+    for biomarkers in ['without_biomarkers', 'with_biomarkers']:
+        # In the key order of 'calc_barcelona_hf_score'
+        all_scores[biomarkers] = {'death': np.full((n, 5), np.nan), 'life_expectancy': np.full(n, None, dtype=object)}
+        all_scores[biomarkers] |= {endpoint: np.full((n, 5), np.nan) for endpoint in ENDPOINTS[1:]}
+    complete = np.ones(n, dtype=bool)
+    for name, column in columns.items():
+        if name not in BIOMARKERS and column.dtype != bool:
+            complete &= ~np.isnan(column)
+    registry = get_coefficient_registry()
+    rows = np.flatnonzero(complete)
+    for start in range(0, len(rows), BLOCK_SIZE):
+        _score_block(columns, registry, all_scores, rows[start:start + BLOCK_SIZE])
+    for i in np.flatnonzero(~complete):
+        parameters = {name: column[i].item() for name, column in columns.items() if not np.isnan(column[i])}
+        patient_scores = calc_barcelona_hf_score(parameters)
+        for biomarkers, endpoints in patient_scores.items():
+            for endpoint, scores in endpoints.items():
+                all_scores[biomarkers][endpoint][i] = scores
     return all_scores
@@ -1,19 +1,351 @@
-from typing import TypeVar
-from collections.abc import Callable
+from __future__ import annotations
+
+import functools
+import importlib
+import itertools
+import math
+import os
+import time
+from typing import TYPE_CHECKING, TypeVar, Any, Generic, Literal, NamedTuple, get_type_hints
+from collections.abc import Callable, Iterable, Iterator, Mapping
+
+from acribis_scores import instrumentation
+from acribis_scores.value_range import RangeValidator, ParameterError, InvalidParametersError
+
+#   numpy (only needed for columns) and the process pool are imported on first use, so importing a score module for
+#   scalar scoring stays fast
+if TYPE_CHECKING:
+    from concurrent.futures import Executor
+
+    import numpy as np
 
 ScoreParameters = TypeVar('ScoreParameters', bound=dict)
 RetType = TypeVar("RetType")
 
+# A pandas DataFrame or any mapping of column arrays keyed by the 'Parameters' field names
+ColumnData = Mapping[str, Any]
+
+
+class BatchResult(NamedTuple, Generic[RetType]):
+    results: dict[str, RetType]
+    errors: dict[str, list[ParameterError]]
+
+
+#   Errors of a patient that could not be scored: invalid values (ValueError), missing parameters (KeyError) and values
+#   of the wrong type (TypeError)
+def parameter_errors(e: ValueError | KeyError | TypeError) -> list[ParameterError]:
+    if isinstance(e, InvalidParametersError):
+        return e.errors
+    if isinstance(e, KeyError) and e.args:
+        return [ParameterError(e.args[0], None, None, f"{e.args[0]} is required but not provided!")]
+    return [ParameterError(None, None, None, str(e))]
 
+
+def collect_errors(func: Callable[[ScoreParameters], RetType], parameters: dict[str, ScoreParameters]) -> BatchResult:
+    batch_result = BatchResult({}, {})
+    for k, v in parameters.items():
+        try:
+            batch_result.results[k] = func(v)
+        except (ValueError, KeyError, TypeError) as e:
+            batch_result.errors[k] = parameter_errors(e)
+    return batch_result
+
+
+#   With errors='collect', a batch scores every valid patient and reports the invalid ones instead of raising on the
+#   first problem. A single patient is always scored (or rejected) directly.
 def batch_process(func: Callable[[ScoreParameters], RetType]) -> Callable[
-        [ScoreParameters | dict[str, ScoreParameters]], RetType | dict[str, RetType]]:
-    def wrapper(parameters: ScoreParameters | dict[ScoreParameters]) -> RetType | dict[str, RetType]:
+        [ScoreParameters | dict[str, ScoreParameters]], RetType | dict[str, RetType] | BatchResult]:
+    @functools.wraps(func)
+    def wrapper(parameters: ScoreParameters | dict[ScoreParameters],
+                errors: Literal['raise', 'collect'] = 'raise', **kwargs) -> RetType | dict[str, RetType] | BatchResult:
         if all(isinstance(v, dict) for v in parameters.values()):
+            if errors == 'collect':
+                return collect_errors(functools.partial(func, **kwargs) if kwargs else func, parameters)
             results: dict[str, RetType] = {}
             for k, v in parameters.items():
-                results[k] = func(v)
+                results[k] = func(v, **kwargs)
             return results
         else:
-            return func(parameters)
+            return func(parameters, **kwargs)
 
     return wrapper
+
+
+def _chunks(parameters: dict[str, ScoreParameters], chunk_size: int) -> Iterable[dict[str, ScoreParameters]]:
+    iterator = iter(parameters.items())
+    while chunk := dict(itertools.islice(iterator, chunk_size)):
+        yield chunk
+
+
+def warm_up(module_name: str):
+    # Score modules with expensive lazily loaded state (e.g. coefficient tables) expose a 'warm_up' hook
+    warm_up = getattr(importlib.import_module(module_name), 'warm_up', None)
+    if warm_up is not None:
+        warm_up()
+
+
+def _process_chunk(func: Callable, chunk: dict[str, ScoreParameters], errors: Literal['raise', 'collect']):
+    return func(chunk, errors=errors)
+
+
+#   'func' must be a module-level score function decorated with 'batch_process' so that it can be sent to the worker
+#   processes. Results are returned in the order of the input keys.
+def parallel_batch_process(func: Callable[..., RetType],
+                           parameters: dict[str, ScoreParameters],
+                           executor: Executor | None = None,
+                           max_workers: int | None = None,
+                           chunk_size: int | None = None,
+                           errors: Literal['raise', 'collect'] = 'raise') -> dict[str, RetType] | BatchResult:
+    own_executor = executor is None
+    if own_executor:
+        from concurrent.futures import ProcessPoolExecutor
+        max_workers = max_workers or os.cpu_count() or 1
+        executor = ProcessPoolExecutor(max_workers, initializer=warm_up, initargs=(func.__module__,))
+    if chunk_size is None:
+        chunk_size = max(1, math.ceil(len(parameters) / (4 * (max_workers or os.cpu_count() or 1))))
+    try:
+        futures = [executor.submit(_process_chunk, func, chunk, errors) for chunk in _chunks(parameters, chunk_size)]
+        try:
+            if errors == 'collect':
+                batch_result = BatchResult({}, {})
+                for future in futures:
+                    chunk_result = future.result()
+                    batch_result.results.update(chunk_result.results)
+                    batch_result.errors.update(chunk_result.errors)
+                return batch_result
+            results: dict[str, RetType] = {}
+            for future in futures:
+                results.update(future.result())
+            return results
+        finally:
+            for future in futures:
+                future.cancel()
+    finally:
+        if own_executor:
+            executor.shutdown(cancel_futures=True)
+
+
+def _column(name: str, value_type: type, values: Any) -> np.ndarray:
+    import numpy as np
+    values = np.asarray(values)
+    if value_type is bool and values.dtype == bool:
+        return values
+    # Strings would be converted (and any non-empty string is True as a bool), so they are rejected like in the
+    # scalar functions
+    strings = values.dtype.kind in 'SU' or (
+            values.dtype == object and any(isinstance(value, (str, bytes)) for value in values.tolist()))
+    if strings:
+        raise TypeError(f"Column '{name}' must contain {value_type.__name__} values!")
+    try:
+        numbers = values.astype(float, copy=False)
+    except (TypeError, ValueError):
+        raise TypeError(f"Column '{name}' must contain {value_type.__name__} values!") from None
+    if value_type is not bool:
+        return numbers
+    # NaN (a missing value) would be True as a bool
+    if np.isnan(numbers).any():
+        raise InvalidParametersError([ParameterError(name, None, None, f"{name} is required but not provided!")])
+    return numbers != 0
+
+
+def as_columns(data: ColumnData, parameters_type: type) -> dict[str, np.ndarray]:
+    columns: dict[str, np.ndarray] = {}
+    for name, value_type in get_type_hints(parameters_type).items():
+        if name not in data:
+            if name in parameters_type.__optional_keys__:
+                continue
+            raise KeyError(f"Column '{name}' is required but not provided!")
+        columns[name] = _column(name, value_type, data[name])
+    if len({len(column) for column in columns.values()}) > 1:
+        raise ValueError('All columns must have the same length!')
+    return columns
+
+
+def columnar(parameters_type: type) -> Callable[[Callable[..., RetType]], Callable[..., RetType]]:
+    validator = RangeValidator.from_parameters(parameters_type)
+
+    def decorator(func: Callable[..., RetType]) -> Callable[..., RetType]:
+        score = instrumentation.score_name(func.__module__)
+
+        @functools.wraps(func)
+        def wrapper(data: ColumnData, *args, **kwargs) -> RetType:
+            if instrumentation.enabled():
+                rows = 0
+                start = time.perf_counter()
+                try:
+                    columns = as_columns(data, parameters_type)
+                    rows = len(next(iter(columns.values()), ()))
+                    validator.validate_columns(columns)
+                finally:
+                    instrumentation.emit(score, instrumentation.VALIDATION, time.perf_counter() - start, rows)
+                with instrumentation.stage(score, instrumentation.CALCULATION, rows):
+                    return func(columns, *args, **kwargs)
+            columns = as_columns(data, parameters_type)
+            validator.validate_columns(columns)
+            return func(columns, *args, **kwargs)
+
+        wrapper.validator = validator
+        wrapper.parameters_type = parameters_type
+        return wrapper
+
+    return decorator
+
+
+#   Missing optional fields are padded with NaN; check the rows with 'missing_parameters' first, as a missing
+#   required field would be scored as NaN
+def to_columns(rows: Iterable[Mapping[str, Any]]) -> dict[str, list]:
+    rows = list(rows)
+    names = dict.fromkeys(name for row in rows for name in row)
+    return {name: [row.get(name, math.nan) for row in rows] for name in names}
+
+
+def missing_parameters(parameters_type: type, parameters: Mapping[str, Any]) -> list[ParameterError]:
+    return [ParameterError(name, None, None, f"{name} is required but not provided!")
+            for name in parameters_type.__annotations__
+            if name in parameters_type.__required_keys__ and name not in parameters]
+
+
+def _is_missing(value: Any) -> bool:
+    if isinstance(value, float):
+        return math.isnan(value)
+    if isinstance(value, list):
+        return bool(value) and all(_is_missing(item) for item in value)
+    if isinstance(value, dict):
+        # Nested rows are split first, so a dict without values had only missing outputs
+        return all(_is_missing(item) for item in value.values())
+    return value is None
+
+
+#   Rows of a batch result in the shape of the scalar result: outputs a row has no value for (e.g. 'with_biomarkers'
+#   of Barcelona Bio-HF for a patient without biomarkers, NaN in the batch) are left out, like the scalar function does
+def split_rows(result: Any) -> list:
+    import numpy as np
+    if isinstance(result, np.ndarray):
+        return result.tolist()
+    if isinstance(result, tuple):
+        return list(zip(*(split_rows(value) for value in result)))
+    if isinstance(result, dict):
+        return [{name: value for name, value in zip(result, row) if not _is_missing(value)}
+                for row in zip(*(split_rows(value) for value in result.values()))]
+    raise TypeError(f"Unsupported batch result type: {type(result).__name__}")
+
+
+#   One array per output of a batch result, named like the CSV columns of 'acribis-score', e.g. 'score[0]' for tuples
+#   and 2-D arrays or 'score.key' for dicts
+def result_columns(result: Any, name: str) -> dict[str, np.ndarray]:
+    import numpy as np
+    if isinstance(result, np.ndarray):
+        if result.ndim == 2:
+            return {f"{name}[{i}]": result[:, i] for i in range(result.shape[1])}
+        return {name: result}
+    if isinstance(result, tuple):
+        return {k: v for i, value in enumerate(result) for k, v in result_columns(value, f"{name}[{i}]").items()}
+    if isinstance(result, dict):
+        return {k: v for key, value in result.items() for k, v in result_columns(value, f"{name}.{key}").items()}
+    raise TypeError(f"Unsupported batch result type: {type(result).__name__}")
+
+
+#   Output names of a columnar score function, including the outputs that depend on the data (e.g. the results with
+#   biomarkers of Barcelona Bio-HF): the function is called with an empty batch
+def result_names(batch_func: Callable[[ColumnData], Any], name: str) -> list[str]:
+    import numpy as np
+    parameters_type = batch_func.parameters_type
+    columns = {field: np.empty(0, dtype=bool if value_type is bool else float)
+               for field, value_type in get_type_hints(parameters_type).items()
+               if field in parameters_type.__required_keys__}
+    return list(result_columns(batch_func(columns), name))
+
+
+def _stream_scalar(func: Callable, items: Iterable[tuple[str, ScoreParameters]],
+                   errors: Literal['raise', 'collect']) -> Iterator[tuple]:
+    for key, parameters in items:
+        if errors == 'raise':
+            yield key, func(parameters)
+            continue
+        batch_result = collect_errors(func, {key: parameters})
+        yield key, batch_result.results.get(key), batch_result.errors.get(key, [])
+
+
+@functools.cache
+def _field_types(parameters_type: type) -> dict[str, type]:
+    return get_type_hints(parameters_type)
+
+
+#   Values not of the annotated type, e.g. from JSON input: the score functions (and the columns of 'to_columns')
+#   would take 'false' as True or None as NaN. Unknown fields are not checked.
+def type_errors(parameters_type: type, parameters: Mapping[str, Any]) -> list[ParameterError]:
+    errors = []
+    for name, value in parameters.items():
+        value_type = _field_types(parameters_type).get(name)
+        if value_type is bool and type(value) is not bool:
+            errors.append(ParameterError(name, value, None, f"{name} must be true or false!"))
+        elif value_type in (int, float) and (isinstance(value, bool) or not isinstance(value, (int, float))):
+            errors.append(ParameterError(name, value, None, f"{name} must be a number!"))
+    return errors
+
+
+def _is_batchable(parameters_type: type, parameters: Mapping[str, Any]) -> bool:
+    # All other rows are left to the checks of the scalar function
+    return (parameters_type.__required_keys__ <= parameters.keys() <= _field_types(parameters_type).keys()
+            and not any(value != value for value in parameters.values())
+            and not type_errors(parameters_type, parameters))
+
+
+def _score_scalar(func: Callable[[ScoreParameters], RetType], parameters: ScoreParameters) -> tuple[bool, Any]:
+    try:
+        return True, func(parameters)
+    except (ValueError, KeyError, TypeError) as e:
+        return False, e
+
+
+#   Scores the rows with one call of 'batch_func' (the rows that cannot be batched, or a single row, with 'func'). If
+#   the batch has invalid rows, the rows are scored one by one with 'func', so only the invalid rows fail. Returns
+#   (True, result) or (False, exception) in the order of the rows, with the results in the shape of 'func';
+#   missing parameters (KeyError) and values of the wrong type (TypeError) count as invalid, too.
+def score_rows(func: Callable[[ScoreParameters], RetType], batch_func: Callable[[ColumnData], Any],
+               rows: list[ScoreParameters]) -> list[tuple[bool, Any]]:
+    scored: list[tuple[bool, Any] | None] = [None] * len(rows)
+    batchable = [i for i, parameters in enumerate(rows) if _is_batchable(batch_func.parameters_type, parameters)]
+    if len(batchable) > 1:
+        try:
+            results = split_rows(batch_func(to_columns(rows[i] for i in batchable)))
+        except (ValueError, KeyError, TypeError):
+            pass
+        else:
+            for i, result in zip(batchable, results):
+                scored[i] = (True, result)
+    return [row if row is not None else _score_scalar(func, parameters) for row, parameters in zip(scored, rows)]
+
+
+#   Scores an iterable of (key, parameters) pairs lazily, e.g. a generator over a CSV file or a database cursor.
+#   With 'batch_func' (the columnar variant of 'func'), 'chunk_size' rows at a time are scored in one vectorized call,
+#   otherwise one row at a time. Yields (key, result), or (key, result | None, errors) with errors='collect'.
+def stream_process(func: Callable[[ScoreParameters], RetType],
+                   items: Iterable[tuple[str, ScoreParameters]],
+                   batch_func: Callable[[ColumnData], Any] | None = None,
+                   chunk_size: int = 1000,
+                   errors: Literal['raise', 'collect'] = 'raise') -> Iterator[tuple]:
+    if batch_func is None:
+        yield from _stream_scalar(func, items, errors)
+        return
+    parameters_type = batch_func.parameters_type
+    iterator = iter(items)
+    while chunk := list(itertools.islice(iterator, chunk_size)):
+        missing = [missing_parameters(parameters_type, parameters) for _, parameters in chunk]
+        if errors == 'raise':
+            for row_errors in missing:
+                if row_errors:
+                    raise KeyError(row_errors[0].field)
+        complete = [row for row, row_errors in zip(chunk, missing) if not row_errors]
+        try:
+            results = split_rows(batch_func(to_columns(parameters for _, parameters in complete)))
+            scored = [(result, []) for result in results]
+        except (ValueError, KeyError, TypeError):
+            if errors == 'raise':
+                raise
+            # Find the invalid rows of this chunk with the scalar function
+            scored = [(result, row_errors) for _, result, row_errors in _stream_scalar(func, complete, errors)]
+        scored_rows = iter(scored)
+        for (key, _), row_errors in zip(chunk, missing):
+            result, row_errors = (None, row_errors) if row_errors else next(scored_rows)
+            yield (key, result) if errors == 'raise' else (key, result, row_errors)
@@ -0,0 +1,120 @@
+import copy
+import functools
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable, Mapping
+from typing import Any, Literal, NamedTuple
+
+from acribis_scores.batch_processing import collect_errors
+
+
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    evictions: int
+    expirations: int
+    currsize: int
+    maxsize: int
+
+
+def _normalize(value: Any) -> Hashable:
+    # bool is a subclass of int, so it has to be tagged separately; all other numbers compare as floats
+    if isinstance(value, bool):
+        return 'bool', value
+    if isinstance(value, (int, float)):
+        return 'number', float(value)
+    return type(value).__name__, value
+
+
+def canonicalize(parameters: Mapping[str, Any]) -> tuple[tuple[str, Hashable], ...]:
+    return tuple(sorted((name, _normalize(value)) for name, value in parameters.items()))
+
+
+def _is_immutable(value: Any) -> bool:
+    if isinstance(value, tuple):
+        return all(_is_immutable(item) for item in value)
+    return value is None or isinstance(value, (bool, int, float, str))
+
+
+class MemoizedScore:
+    #   Bounded LRU cache (with optional time-to-live in seconds) around a 'calc_*_score' function. Accepts a single
+    #   patient or a batch like 'batch_process'; every patient of a batch is looked up individually. Mutable results
+    #   (e.g. the dicts of Barcelona Bio-HF) are copied on every hit, so callers cannot modify the cached value.
+    def __init__(self, func: Callable, maxsize: int = 1024, ttl: float | None = None):
+        functools.update_wrapper(self, func)
+        self.__func = func
+        self.__maxsize = maxsize
+        self.__ttl = ttl
+        self.__lock = threading.Lock()
+        # canonical key -> (expiry time, result, result is immutable)
+        self.__results: OrderedDict[Hashable, tuple[float, Any, bool]] = OrderedDict()
+        # Parameters as given (in insertion order, with the value types, as True == 1) -> canonical key, to skip
+        # sorting on repeated calls
+        self.__aliases: OrderedDict[Hashable, Hashable] = OrderedDict()
+        self.__hits = self.__misses = self.__evictions = self.__expirations = 0
+
+    def __call__(self, parameters: Mapping[str, Any], errors: Literal['raise', 'collect'] = 'raise', **kwargs):
+        if isinstance(next(iter(parameters.values()), None), dict):
+            call = functools.partial(self.__call_one, **kwargs)
+            if errors == 'collect':
+                return collect_errors(call, parameters)
+            return {k: call(v) for k, v in parameters.items()}
+        return self.__call_one(parameters, **kwargs)
+
+    def __key(self, parameters: Mapping[str, Any], kwargs: dict[str, Any]) -> Hashable:
+        given = tuple((name, type(value), value) for name, value in parameters.items())
+        alias = (given, tuple(kwargs.items())) if kwargs else given
+        key = self.__aliases.get(alias)
+        if key is None:
+            key = (canonicalize(parameters), tuple(sorted(kwargs.items())))
+            self.__aliases[alias] = key
+            if len(self.__aliases) > self.__maxsize:
+                self.__aliases.popitem(last=False)
+        return key
+
+    def __call_one(self, parameters: Mapping[str, Any], **kwargs):
+        try:
+            with self.__lock:
+                key = self.__key(parameters, kwargs)
+                entry = self.__results.get(key)
+                if entry is not None:
+                    expiry, result, immutable = entry
+                    if self.__ttl is None or expiry > time.monotonic():
+                        self.__results.move_to_end(key)
+                        self.__hits += 1
+                        return result if immutable else copy.deepcopy(result)
+                    del self.__results[key]
+                    self.__expirations += 1
+                self.__misses += 1
+        except TypeError:
+            # Unhashable parameters (e.g. a trace callback) bypass the cache
+            return self.__func(parameters, **kwargs)
+        result = self.__func(parameters, **kwargs)
+        expiry = time.monotonic() + self.__ttl if self.__ttl is not None else 0.0
+        immutable = _is_immutable(result)
+        with self.__lock:
+            self.__results[key] = (expiry, result, immutable)
+            self.__results.move_to_end(key)
+            while len(self.__results) > self.__maxsize:
+                self.__results.popitem(last=False)
+                self.__evictions += 1
+        return result if immutable else copy.deepcopy(result)
+
+    def cache_info(self) -> CacheInfo:
+        with self.__lock:
+            return CacheInfo(self.__hits, self.__misses, self.__evictions, self.__expirations, len(self.__results),
+                             self.__maxsize)
+
+    def cache_clear(self):
+        with self.__lock:
+            self.__results.clear()
+            self.__aliases.clear()
+            self.__hits = self.__misses = self.__evictions = self.__expirations = 0
+
+
+def memoize(func: Callable | None = None, *, maxsize: int = 1024,
+            ttl: float | None = None) -> MemoizedScore | Callable[[Callable], MemoizedScore]:
+    if func is None:
+        return functools.partial(MemoizedScore, maxsize=maxsize, ttl=ttl)
+    return MemoizedScore(func, maxsize, ttl)
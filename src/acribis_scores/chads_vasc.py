@@ -1,5 +1,14 @@
-from typing import TypedDict
-from acribis_scores.batch_processing import batch_process
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, TypedDict
+
+from acribis_scores import instrumentation
+from acribis_scores.batch_processing import batch_process, columnar
+from acribis_scores.points import BooleanPoints
+from acribis_scores.value_range import ParameterError, InvalidParametersError
+
+if TYPE_CHECKING:
+    import numpy as np
 
 # See: https://doi.org/10.1378/chest.09-1584
 
@@ -25,9 +34,36 @@ POINTS: dict[str, float] = {
     'Sex category': 1
 }
 
+BOOLEAN_POINTS = BooleanPoints.from_points(POINTS)
+AGE_BITS = BOOLEAN_POINTS.bit('Age ≥75y') | BOOLEAN_POINTS.bit('Age 65-74y')
+
+AGE_AMBIGUOUS = 'Not both age parameters can be true!'
+
+
+def _check_age(ambiguous: bool):
+    if ambiguous:
+        raise InvalidParametersError([ParameterError('Age ≥75y/Age 65-74y', (True, True), None, AGE_AMBIGUOUS)])
+
+
+#   Score of a record or of columns that may hold further fields, e.g. for the panel (see panel.py)
+def calc_score(parameters: Parameters) -> int:
+    mask = BOOLEAN_POINTS.mask(parameters)
+    _check_age(mask & AGE_BITS == AGE_BITS)
+    return BOOLEAN_POINTS.table[mask]
+
+
+def calc_score_batch(columns: dict[str, np.ndarray]) -> np.ndarray:
+    masks = BOOLEAN_POINTS.masks(columns)
+    _check_age((masks & AGE_BITS == AGE_BITS).any())
+    return BOOLEAN_POINTS.columns(columns, masks)
+
 
 @batch_process
+@instrumentation.timed
 def calc_chads_vasc_score(parameters: Parameters) -> int:
-    if parameters['Age ≥75y'] and parameters['Age 65-74y']:
-        raise ValueError('Not both age parameters can be true!')
-    return sum([value * POINTS[parameter] for parameter, value in parameters.items()])
+    return calc_score(parameters)
+
+
+@columnar(Parameters)
+def calc_chads_vasc_score_batch(columns: dict[str, np.ndarray]) -> np.ndarray:
+    return calc_score_batch(columns)
@@ -1,9 +1,14 @@
+from __future__ import annotations
+
 import math
-from typing import TypedDict, Annotated
+from typing import TYPE_CHECKING, TypedDict, Annotated
 
-from acribis_scores.batch_processing import batch_process
+from acribis_scores.batch_processing import batch_process, columnar
 from acribis_scores.value_range import ValueRange, check_ranges
 
+if TYPE_CHECKING:
+    import numpy as np
+
 # See https://doi.org/10.1161/JAHA.112.000102
 
 Parameters = TypedDict('Parameters', {
@@ -54,3 +59,10 @@ SCALES: dict[str, int] = {
 def calc_charge_af_score(parameters: Parameters) -> float:
     x = sum([(value / SCALES[parameter]) * WEIGHTS[parameter] for parameter, value in parameters.items()])
     return (1 - math.pow(0.9718412736, math.exp(x + -12.58156))) * 100
+
+
+@columnar(Parameters)
+def calc_charge_af_score_batch(columns: dict[str, np.ndarray]) -> np.ndarray:
+    import numpy as np
+    x = sum([(columns[parameter] / SCALES[parameter]) * weight for parameter, weight in WEIGHTS.items()])
+    return (1 - np.power(0.9718412736, np.exp(x + -12.58156))) * 100
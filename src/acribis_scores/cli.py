@@ -0,0 +1,208 @@
+import argparse
+import collections
+import csv
+import itertools
+import json
+import sys
+import time
+from collections.abc import Iterator, Sequence
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from typing import Any, TextIO, get_type_hints
+
+from acribis_scores.batch_processing import stream_process, result_names, warm_up
+from acribis_scores.registry import SCORES, Score, get_score
+from acribis_scores.value_range import ParameterError
+
+#   Bulk scoring of CSV files: acribis-score <score> --in patients.csv --out results.csv
+#   Rows are read, scored and written 'chunk_size' at a time, so memory does not grow with the file size. With
+#   '--jobs N', chunks are scored by N worker processes; at most 2 * N chunks are in flight and the output keeps the
+#   input order. Invalid rows are written with empty results and reported in the error file ('--errors').
+
+TRUE_VALUES = frozenset({'1', 'true', 't', 'yes', 'y'})
+FALSE_VALUES = frozenset({'0', 'false', 'f', 'no', 'n'})
+
+
+def _parse_value(value: str, value_type: type) -> bool | int | float:
+    if value_type is bool:
+        if value.lower() in TRUE_VALUES:
+            return True
+        if value.lower() in FALSE_VALUES:
+            return False
+        raise ValueError
+    if value_type is int:
+        try:
+            return int(value)
+        except ValueError:
+            number = float(value)
+            if not number.is_integer():
+                raise
+            return int(number)
+    return float(value)
+
+
+class RowParser:
+    # Converts the CSV strings of a row to the types of the 'Parameters' fields; fields are resolved once
+    def __init__(self, parameters_type: type, mapping: dict[str, str] | None = None):
+        mapping = mapping or {}
+        self.fields = [(field, mapping.get(field, field), value_type, field in parameters_type.__required_keys__)
+                       for field, value_type in get_type_hints(parameters_type).items()]
+
+    def __call__(self, row: dict[str, str]) -> tuple[dict[str, Any], list[ParameterError]]:
+        parameters: dict[str, Any] = {}
+        errors: list[ParameterError] = []
+        for field, column, value_type, required in self.fields:
+            value = (row.get(column) or '').strip()
+            if not value:
+                if required:
+                    errors.append(ParameterError(field, None, None, f"{field} is required but not provided!"))
+                continue
+            try:
+                parameters[field] = _parse_value(value, value_type)
+            except ValueError:
+                message = f"{field}: '{value}' is not a valid {value_type.__name__}"
+                errors.append(ParameterError(field, value, None, message))
+        return parameters, errors
+
+
+def flatten(result: Any, name: str) -> dict[str, Any]:
+    if isinstance(result, dict):
+        return {k: v for key, value in result.items() for k, v in flatten(value, f"{name}.{key}").items()}
+    if isinstance(result, (tuple, list)):
+        return {k: v for i, value in enumerate(result) for k, v in flatten(value, f"{name}[{i}]").items()}
+    return {name: result}
+
+
+#   Parses and scores one chunk of rows; runs in the worker processes with '--jobs'
+def _score_chunk(score: Score, parser: RowParser, chunk: list[tuple[str, dict[str, str]]]) -> list[tuple]:
+    scored: list[tuple] = []
+    valid: list[tuple[str, dict[str, Any]]] = []
+    for key, row in chunk:
+        parameters, errors = parser(row)
+        if errors:
+            scored.append((key, None, errors))
+        else:
+            valid.append((key, parameters))
+            scored.append(None)
+    results = stream_process(score.calc, valid, score.calc_batch, max(1, len(valid)), errors='collect')
+    return [row if row is not None else next(results) for row in scored]
+
+
+class _Results:
+    #   Writes results (and errors) in input order. The columns are the outputs of the score (see 'result_names'), so
+    #   a row with other outputs is an error rather than being cut to the columns of the first row.
+    def __init__(self, output: TextIO, error_output: TextIO | None, key_column: str, score_name: str,
+                 columns: Sequence[str]):
+        self.__errors = csv.writer(error_output) if error_output is not None else None
+        if self.__errors is not None:
+            self.__errors.writerow([key_column, 'field', 'value', 'message'])
+        self.__key_column = key_column
+        self.__score_name = score_name
+        self.__writer = csv.DictWriter(output, [key_column, *columns], restval='')
+        self.__writer.writeheader()
+        self.rows = self.scored = self.failed = 0
+
+    def write(self, key: str, result: Any, errors: Sequence[ParameterError]):
+        self.rows += 1
+        row = {self.__key_column: key}
+        if errors:
+            self.failed += 1
+            if self.__errors is not None:
+                for error in errors:
+                    self.__errors.writerow([key, error.field or '', '' if error.value is None else error.value,
+                                            str(error)])
+        else:
+            self.scored += 1
+            row |= flatten(result, self.__score_name)
+        self.__writer.writerow(row)
+
+
+def _chunks(rows: Iterator[tuple[str, dict[str, str]]], chunk_size: int) -> Iterator[list]:
+    while chunk := list(itertools.islice(rows, chunk_size)):
+        yield chunk
+
+
+def _submit(executor: Executor | None, score: Score, parser: RowParser,
+            chunk: list[tuple[str, dict[str, str]]]) -> Future | list[tuple]:
+    if executor is None:
+        return _score_chunk(score, parser, chunk)
+    return executor.submit(_score_chunk, score, parser, chunk)
+
+
+def run(score: Score, input_file: TextIO, output_file: TextIO, error_file: TextIO | None = None,
+        mapping: dict[str, str] | None = None, id_column: str | None = None, jobs: int = 1,
+        chunk_size: int = 1000) -> _Results:
+    reader = csv.DictReader(input_file)
+    rows = ((row[id_column] if id_column else str(i), row) for i, row in enumerate(reader, start=1))
+    results = _Results(output_file, error_file, id_column or 'row', score.name,
+                       result_names(score.calc_batch, score.name))
+    executor = ProcessPoolExecutor(jobs, initializer=warm_up, initargs=(score.module,)) if jobs > 1 else None
+    parser = RowParser(score.parameters, mapping)
+    in_flight: collections.deque[Future | list[tuple]] = collections.deque()
+
+    def write_next():
+        scored = in_flight.popleft()
+        for key, result, errors in (scored.result() if isinstance(scored, Future) else scored):
+            results.write(key, result, errors)
+
+    try:
+        for chunk in _chunks(rows, chunk_size):
+            in_flight.append(_submit(executor, score, parser, chunk))
+            while len(in_flight) > 2 * jobs:
+                write_next()
+        while in_flight:
+            write_next()
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+    return results
+
+
+def _open(path: str | None, mode: str, default: TextIO | None) -> TextIO | None:
+    if path is None or path == '-':
+        return default
+    return open(path, mode, newline='', encoding='utf-8')
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog='acribis-score', description='Calculate a risk score for each row of a CSV '
+                                                                       'file.')
+    parser.add_argument('score', help=f"Name of the score: {', '.join(SCORES)} (or the module name, e.g. chads_vasc)")
+    parser.add_argument('--in', dest='input', default='-', help='Input CSV file (default: stdin)')
+    parser.add_argument('--out', dest='output', default='-', help='Output CSV file (default: stdout)')
+    parser.add_argument('--errors', help='CSV file for the rows that could not be scored')
+    parser.add_argument('--mapping', help="JSON file mapping parameter names to CSV columns, e.g. {\"Age\": \"age\"}")
+    parser.add_argument('--id-column', help='Column identifying the rows in the output (default: row number)')
+    parser.add_argument('--jobs', type=int, default=1, help='Number of worker processes (default: 1)')
+    parser.add_argument('--chunk-size', type=int, default=1000, help='Rows scored at a time (default: 1000)')
+    args = parser.parse_args(argv)
+
+    try:
+        score = get_score(args.score)
+    except KeyError as e:
+        parser.error(e.args[0])
+    if args.jobs < 1 or args.chunk_size < 1:
+        parser.error('--jobs and --chunk-size must be positive!')
+    mapping = {}
+    if args.mapping:
+        with open(args.mapping, encoding='utf-8') as mapping_file:
+            mapping = json.load(mapping_file)
+
+    start = time.perf_counter()
+    input_file = _open(args.input, 'r', sys.stdin)
+    output_file = _open(args.output, 'w', sys.stdout)
+    error_file = _open(args.errors, 'w', None)
+    try:
+        results = run(score, input_file, output_file, error_file, mapping, args.id_column, args.jobs,
+                      args.chunk_size)
+    finally:
+        for file in (input_file, output_file, error_file):
+            if file is not None and file not in (sys.stdin, sys.stdout):
+                file.close()
+    elapsed = time.perf_counter() - start
+    print(f"{score.name}: {results.rows} rows, {results.scored} scored, {results.failed} failed in {elapsed:.2f} s "
+          f"({results.rows / elapsed if elapsed > 0 else 0:.0f} rows/s)", file=sys.stderr)
+    return 1 if results.failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
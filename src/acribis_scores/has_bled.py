@@ -1,6 +1,13 @@
-from typing import TypedDict
+from __future__ import annotations
 
-from acribis_scores.batch_processing import batch_process
+from typing import TYPE_CHECKING, TypedDict
+
+from acribis_scores import instrumentation
+from acribis_scores.batch_processing import batch_process, columnar
+from acribis_scores.points import BooleanPoints
+
+if TYPE_CHECKING:
+    import numpy as np
 
 # See: https://doi.org/10.1378/chest.10-0134
 
@@ -17,7 +24,25 @@ Parameters = TypedDict('Parameters', {
     'Alcohol': bool,
 })
 
+# One point for each item
+BOOLEAN_POINTS = BooleanPoints.from_points(dict.fromkeys(Parameters.__annotations__, 1))
+
+
+#   Score of a record or of columns that may hold further fields, e.g. for the panel (see panel.py)
+def calc_score(parameters: Parameters) -> int:
+    return BOOLEAN_POINTS(parameters)
+
+
+def calc_score_batch(columns: dict[str, np.ndarray]) -> np.ndarray:
+    return BOOLEAN_POINTS.columns(columns)
+
 
 @batch_process
+@instrumentation.timed
 def calc_has_bled_score(parameters: Parameters) -> int:
-    return sum(parameters.values())
+    return calc_score(parameters)
+
+
+@columnar(Parameters)
+def calc_has_bled_score_batch(columns: dict[str, np.ndarray]) -> np.ndarray:
+    return calc_score_batch(columns)
@@ -0,0 +1,159 @@
+import contextlib
+import functools
+import threading
+import time
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass
+
+#   Opt-in timing of the scores. Nothing is measured unless a hook is registered, and the instrumented code paths only
+#   check for hooks, so the overhead is negligible when disabled:
+#
+#       with instrumentation.recording() as metrics:
+#           maggic.calc_maggic_score_batch(columns)
+#       print(metrics.to_prometheus())
+#
+#   Hooks are called with (score, stage, seconds, rows) after each stage; the score is the module name, e.g. 'maggic'.
+#   Stages can be nested, e.g. 'calculation' includes the 'features' and 'life_table' stages of a score.
+
+VALIDATION = 'validation'
+CALCULATION = 'calculation'
+FEATURES = 'features'
+LOADING = 'loading'
+LIFE_TABLE = 'life_table'
+
+Hook = Callable[[str, str, float, int], None]
+
+# Replaced (not mutated) under the lock, so it can be iterated without locking
+_hooks: tuple[Hook, ...] = ()
+_hooks_lock = threading.Lock()
+
+
+def add_hook(hook: Hook):
+    global _hooks
+    with _hooks_lock:
+        _hooks = (*_hooks, hook)
+
+
+def remove_hook(hook: Hook):
+    global _hooks
+    with _hooks_lock:
+        hooks = list(_hooks)
+        hooks.remove(hook)
+        _hooks = tuple(hooks)
+
+
+def enabled() -> bool:
+    return bool(_hooks)
+
+
+def score_name(module: str) -> str:
+    return module.rsplit('.', 1)[-1]
+
+
+def emit(score: str, stage_name: str, seconds: float, rows: int = 1):
+    for hook in _hooks:
+        hook(score, stage_name, seconds, rows)
+
+
+class _Stage:
+    __slots__ = ('score', 'name', 'rows', 'start')
+
+    def __init__(self, score: str, name: str, rows: int):
+        self.score = score
+        self.name = name
+        self.rows = rows
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        emit(self.score, self.name, time.perf_counter() - self.start, self.rows)
+
+
+_NO_STAGE = contextlib.nullcontext()
+
+
+def stage(score: str, name: str, rows: int = 1) -> contextlib.AbstractContextManager:
+    return _Stage(score, name, rows) if _hooks else _NO_STAGE
+
+
+#   Times the calls of a scalar score function as its calculation stage, for scores without range checks (which
+#   'check_ranges' times together with the validation)
+def timed(func: Callable) -> Callable:
+    score = score_name(func.__module__)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if _hooks:
+            with _Stage(score, CALCULATION, 1):
+                return func(*args, **kwargs)
+        return func(*args, **kwargs)
+
+    return wrapper
+
+
+@dataclass
+class StageMetrics:
+    calls: int = 0
+    rows: int = 0
+    seconds: float = 0.0
+    max_seconds: float = 0.0
+
+
+class Metrics:
+    # Hook summing up the calls, rows and wall time per score and stage
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.__stages: dict[tuple[str, str], StageMetrics] = {}
+
+    def __call__(self, score: str, stage_name: str, seconds: float, rows: int = 1):
+        with self.__lock:
+            metrics = self.__stages.get((score, stage_name))
+            if metrics is None:
+                metrics = self.__stages[(score, stage_name)] = StageMetrics()
+            metrics.calls += 1
+            metrics.rows += rows
+            metrics.seconds += seconds
+            metrics.max_seconds = max(metrics.max_seconds, seconds)
+
+    def reset(self):
+        with self.__lock:
+            self.__stages.clear()
+
+    def as_dict(self) -> dict[str, dict[str, dict[str, int | float]]]:
+        with self.__lock:
+            stages = sorted(self.__stages.items())
+        result: dict[str, dict[str, dict[str, int | float]]] = {}
+        for (score, stage_name), metrics in stages:
+            result.setdefault(score, {})[stage_name] = {'calls': metrics.calls, 'rows': metrics.rows,
+                                                        'seconds': metrics.seconds,
+                                                        'max_seconds': metrics.max_seconds}
+        return result
+
+    #   Prometheus text exposition format, e.g. acribis_scores_stage_seconds_total{score="maggic",stage="validation"}
+    def to_prometheus(self, prefix: str = 'acribis_scores') -> str:
+        scores = self.as_dict()
+        lines: list[str] = []
+        for metric, kind, description in (('calls_total', 'counter', 'Number of calls of each stage'),
+                                          ('rows_total', 'counter', 'Number of rows processed by each stage'),
+                                          ('seconds_total', 'counter', 'Wall time spent in each stage'),
+                                          ('max_seconds', 'gauge', 'Longest wall time of a single call')):
+            name = f"{prefix}_stage_{metric}"
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} {kind}")
+            key = metric.removesuffix('_total')
+            for score, stages in scores.items():
+                for stage_name, values in stages.items():
+                    lines.append(f"{name}{{score=\"{score}\",stage=\"{stage_name}\"}} {values[key]}")
+        return '\n'.join(lines) + '\n'
+
+
+@contextlib.contextmanager
+def recording(metrics: Metrics | None = None) -> Iterator[Metrics]:
+    metrics = Metrics() if metrics is None else metrics
+    add_hook(metrics)
+    try:
+        yield metrics
+    finally:
+        remove_hook(metrics)
@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import operator
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+# The coefficient array for columns is built on first use (see points.py)
+if TYPE_CHECKING:
+    import numpy as np
+
+
+@dataclass(frozen=True)
+class LinearPredictor:
+    # Features and coefficients in a fixed order; feature values have to be given in the same order
+    features: tuple[str, ...]
+    coefficients: tuple[float, ...]
+    intercept: float = 0.0
+    _coefficient_array: np.ndarray | None = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, '_coefficient_array', None)
+
+    @classmethod
+    def from_weights(cls, weights: Mapping[str, float], intercept: float = 0.0) -> 'LinearPredictor':
+        return cls(tuple(weights), tuple(weights.values()), intercept)
+
+    def __call__(self, values: Iterable[int | float | bool]) -> float:
+        # Summed in feature order, like the sum over the 'WEIGHTS' dicts
+        return sum(map(operator.mul, values, self.coefficients)) + self.intercept
+
+    def buffer(self, n: int) -> np.ndarray:
+        # One row per feature, to be filled with the (derived) feature columns
+        import numpy as np
+        return np.empty((len(self.features), n))
+
+    def columns(self, buffer: np.ndarray) -> np.ndarray:
+        if self._coefficient_array is None:
+            import numpy as np
+            object.__setattr__(self, '_coefficient_array', np.array(self.coefficients))
+        return self._coefficient_array @ buffer + self.intercept
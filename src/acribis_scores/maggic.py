@@ -1,8 +1,15 @@
-from typing import TypedDict, Annotated
+from __future__ import annotations
 
-from acribis_scores.batch_processing import batch_process
+import functools
+from typing import TYPE_CHECKING, TypedDict, Annotated
+
+from acribis_scores.batch_processing import batch_process, columnar
+from acribis_scores.points import PointsTable, PointsMatrix, BooleanPoints, below
 from acribis_scores.value_range import ValueRange, check_ranges
 
+if TYPE_CHECKING:
+    import numpy as np
+
 # See: https://doi.org/10.1093/eurheartj/ehs337
 # And: https://academic.oup.com/view-large/figure/89301700/ehs33702.jpeg
 # Online calculator: http://www.heartfailurerisk.org/
@@ -24,123 +31,129 @@ Parameters = TypedDict('Parameters', {
 })
 
 
+EF_POINTS = PointsTable((below(20), 24, 29, 34, 39), (7, 6, 5, 3, 2, 0))
+
+# Rows: ejection fraction < 30, 30-39, ≥ 40
+EF_GROUPS = (below(30), 39)
+
+AGE_POINTS = PointsMatrix(EF_GROUPS, (below(55), 59, 64, 69, 74, 79),
+                          ((0, 1, 2, 4, 6, 8, 10),
+                           (0, 2, 4, 6, 8, 10, 13),
+                           (0, 3, 5, 7, 9, 12, 15)))
+
+SBP_POINTS = PointsMatrix(EF_GROUPS, (below(110), 119, 129, 139, 149),
+                          ((5, 4, 3, 2, 1, 0),
+                           (3, 2, 1, 1, 0, 0),
+                           (2, 1, 1, 0, 0, 0)))
+
+BMI_POINTS = PointsTable((below(15), 19, 24, 29), (6, 5, 3, 2, 0))
+
+CREATININE_POINTS = PointsTable((below(90), 109, 129, 149, 169, 209, 249), (0, 1, 2, 3, 4, 5, 6, 8))
+
+NYHA_CLASS_POINTS = PointsTable((1, 2, 3), (0, 2, 6, 8))
+
+BOOLEAN_POINTS = BooleanPoints(('Male', 'Current smoker', 'Diabetic', 'Diagnosis of COPD',
+                                'First diagnosis of heart failure in the past 18 months', 'Not on beta blocker',
+                                'Not on ACEI/ARB'),
+                               true_points=(1, 1, 3, 2, 0, 3, 1),
+                               false_points=(0, 0, 0, 0, 2, 0, 0))
+
+
 def get_ef_score(lv_ef: int) -> int:
-    if lv_ef < 20:
-        return 7
-    if lv_ef <= 24:
-        return 6
-    if lv_ef <= 29:
-        return 5
-    if lv_ef <= 34:
-        return 3
-    if lv_ef <= 39:
-        return 2
-    return 0
+    return EF_POINTS(lv_ef)
 
 
 def get_age_score(age: int, lv_ef: int) -> int:
-    score_matrix = [[0, 1, 2, 4, 6, 8, 10],
-                    [0, 2, 4, 6, 8, 10, 13],
-                    [0, 3, 5, 7, 9, 12, 15]]
-    if lv_ef < 30:
-        lv_ef_index = 0
-    elif lv_ef <= 39:
-        lv_ef_index = 1
-    else:
-        lv_ef_index = 2
-
-    if age < 55:
-        age_index = 0
-    elif age <= 59:
-        age_index = 1
-    elif age <= 64:
-        age_index = 2
-    elif age <= 69:
-        age_index = 3
-    elif age <= 74:
-        age_index = 4
-    elif age <= 79:
-        age_index = 5
-    else:
-        age_index = 6
-    return score_matrix[lv_ef_index][age_index]
+    return AGE_POINTS(lv_ef, age)
 
 
 def get_sbp_score(sbp: int, lv_ef: int) -> int:
-    score_matrix = [[5, 4, 3, 2, 1, 0],
-                    [3, 2, 1, 1, 0, 0],
-                    [2, 1, 1, 0, 0, 0]]
-    if lv_ef < 30:
-        lv_ef_index = 0
-    elif lv_ef <= 39:
-        lv_ef_index = 1
-    else:
-        lv_ef_index = 2
-
-    if sbp < 110:
-        sbp_index = 0
-    elif sbp <= 119:
-        sbp_index = 1
-    elif sbp <= 129:
-        sbp_index = 2
-    elif sbp <= 139:
-        sbp_index = 3
-    elif sbp <= 149:
-        sbp_index = 4
-    else:
-        sbp_index = 5
-    return score_matrix[lv_ef_index][sbp_index]
+    return SBP_POINTS(lv_ef, sbp)
 
 
 def get_bmi_score(bmi: int) -> int:
-    if bmi < 15:
-        return 6
-    if bmi <= 19:
-        return 5
-    if bmi <= 24:
-        return 3
-    if bmi <= 29:
-        return 2
-    return 0
+    return BMI_POINTS(bmi)
 
 
 def get_creatinine_score(creatinine: int) -> int:
-    if creatinine < 90:
-        return 0
-    if creatinine <= 109:
-        return 1
-    if creatinine <= 129:
-        return 2
-    if creatinine <= 149:
-        return 3
-    if creatinine <= 169:
-        return 4
-    if creatinine <= 209:
-        return 5
-    if creatinine <= 249:
-        return 6
-    else:
-        return 8
+    return CREATININE_POINTS(creatinine)
 
 
 def get_nyha_class_score(nyha_class: int) -> int:
-    score_array = [0, 2, 6, 8]
-    return score_array[nyha_class - 1]
+    return NYHA_CLASS_POINTS(nyha_class)
+
+
+#   Published 1- and 3-year mortality for each integer score; scores above 50 have the risk of 50
+MORTALITY_SCORES = range(51)
+
+ONE_YEAR_MORTALITY = (0.015, 0.016, 0.018, 0.020, 0.022, 0.024, 0.027, 0.029, 0.032, 0.036, 0.039, 0.043, 0.048, 0.052,
+                      0.058, 0.063, 0.070, 0.077, 0.084, 0.092, 0.102, 0.111, 0.122, 0.134, 0.146, 0.160, 0.175, 0.191,
+                      0.209, 0.227, 0.247, 0.269, 0.292, 0.316, 0.342, 0.369, 0.397, 0.427, 0.458, 0.490, 0.523, 0.556,
+                      0.590, 0.625, 0.658, 0.692, 0.725, 0.756, 0.787, 0.815, 0.842)
+
+THREE_YEAR_MORTALITY = (0.039, 0.043, 0.048, 0.052, 0.058, 0.063, 0.070, 0.076, 0.084, 0.092, 0.100, 0.110, 0.121,
+                        0.132, 0.144, 0.157, 0.172, 0.187, 0.204, 0.221, 0.240, 0.260, 0.281, 0.304, 0.327, 0.351,
+                        0.377, 0.403, 0.430, 0.458, 0.486, 0.515, 0.543, 0.572, 0.600, 0.628, 0.655, 0.682, 0.707,
+                        0.731, 0.754, 0.776, 0.796, 0.814, 0.832, 0.847, 0.861, 0.874, 0.885, 0.895, 0.904)
+
+
+#   Rows: 1-year, 3-year mortality; built on first use, so importing this module does not import numpy
+@functools.cache
+def _mortality_table() -> np.ndarray:
+    import numpy as np
+    return np.array([ONE_YEAR_MORTALITY, THREE_YEAR_MORTALITY])
+
+
+def get_mortality(score: int) -> tuple[float, float]:
+    score = min(score, MORTALITY_SCORES[-1])
+    return ONE_YEAR_MORTALITY[score], THREE_YEAR_MORTALITY[score]
+
+
+def _calc_score(parameters: Parameters) -> int:
+    lv_ef = parameters['Ejection fraction (%)']
+    return (EF_POINTS(lv_ef) +
+            AGE_POINTS(lv_ef, parameters['Age (years)']) +
+            SBP_POINTS(lv_ef, parameters['Systolic blood pressure (mmHg)']) +
+            BMI_POINTS(parameters['BMI (kg/m²)']) +
+            CREATININE_POINTS(parameters['Creatinine (µmol/l)']) +
+            NYHA_CLASS_POINTS(parameters['NYHA Class']) +
+            BOOLEAN_POINTS(parameters))
+
+
+def _calc_score_batch(columns: dict[str, np.ndarray]) -> np.ndarray:
+    lv_ef = columns['Ejection fraction (%)']
+    return (EF_POINTS.columns(lv_ef) +
+            AGE_POINTS.columns(lv_ef, columns['Age (years)']) +
+            SBP_POINTS.columns(lv_ef, columns['Systolic blood pressure (mmHg)']) +
+            BMI_POINTS.columns(columns['BMI (kg/m²)']) +
+            CREATININE_POINTS.columns(columns['Creatinine (µmol/l)']) +
+            NYHA_CLASS_POINTS.columns(columns['NYHA Class']) +
+            BOOLEAN_POINTS.columns(columns))
 
 
 @batch_process
 @check_ranges
 def calc_maggic_score(parameters: Parameters) -> int:
-    return (get_ef_score(parameters['Ejection fraction (%)']) +
-            get_age_score(parameters['Age (years)'], parameters['Ejection fraction (%)']) +
-            get_sbp_score(parameters['Systolic blood pressure (mmHg)'], parameters['Ejection fraction (%)']) +
-            get_bmi_score(parameters['BMI (kg/m²)']) +
-            get_creatinine_score(parameters['Creatinine (µmol/l)']) +
-            get_nyha_class_score(parameters['NYHA Class']) +
-            parameters['Male'] +
-            parameters['Current smoker'] +
-            parameters['Diabetic'] * 3 +
-            parameters['Diagnosis of COPD'] * 2 +
-            (not parameters['First diagnosis of heart failure in the past 18 months']) * 2 +
-            parameters['Not on beta blocker'] * 3 +
-            parameters['Not on ACEI/ARB'])
+    return _calc_score(parameters)
+
+
+@columnar(Parameters)
+def calc_maggic_score_batch(columns: dict[str, np.ndarray]) -> np.ndarray:
+    return _calc_score_batch(columns)
+
+
+#   Integer score with the corresponding 1- and 3-year mortality
+@batch_process
+@check_ranges
+def calc_maggic_mortality(parameters: Parameters) -> dict[str, int | float]:
+    score = _calc_score(parameters)
+    one_year, three_year = get_mortality(score)
+    return {'score': score, 'one_year_mortality': one_year, 'three_year_mortality': three_year}
+
+
+@columnar(Parameters)
+def calc_maggic_mortality_batch(columns: dict[str, np.ndarray]) -> dict[str, np.ndarray]:
+    import numpy as np
+    scores = _calc_score_batch(columns)
+    one_year, three_year = _mortality_table()[:, np.minimum(scores, MORTALITY_SCORES[-1])]
+    return {'score': scores, 'one_year_mortality': one_year, 'three_year_mortality': three_year}
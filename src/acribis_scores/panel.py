@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import math
+from collections.abc import Collection
+from typing import TYPE_CHECKING, TypedDict, Annotated, Any
+
+from acribis_scores import abc_af_bleeding, abc_af_death, abc_af_stroke, chads_vasc, has_bled
+from acribis_scores.batch_processing import batch_process, columnar
+from acribis_scores.value_range import ValueRange, RangeValidator
+
+if TYPE_CHECKING:
+    import numpy as np
+
+#   Unified record of an AF patient for evaluating several scores at once. Each field is validated once and each
+#   log-transformed biomarker is computed once, however many of the requested scores use it. Only the fields of the
+#   requested scores are needed.
+#   For this, each score module has a helper without range checks (calc_score, calc_score_batch, or calc_scores and
+#   calc_scores_batch for ABC-AF Death) that takes the log-transformed biomarkers as arguments.
+
+CHADS_VASC = 'CHA2DS2-VASc'
+HAS_BLED = 'HAS-BLED'
+ABC_AF_STROKE = 'ABC-AF Stroke'
+ABC_AF_BLEEDING = 'ABC-AF Bleeding'
+ABC_AF_DEATH = 'ABC-AF Death'
+
+SCORES = (CHADS_VASC, HAS_BLED, ABC_AF_STROKE, ABC_AF_BLEEDING, ABC_AF_DEATH)
+
+Parameters = TypedDict('Parameters', {
+    # CHA2DS2-VASc
+    'Congestive heart failure/LV dysfunction': bool,
+    'Hypertension': bool,
+    'Age ≥75y': bool,
+    'Diabetes mellitus': bool,
+    'Stroke/TIA/TE': bool,
+    'Vascular diseases': bool,
+    'Age 65-74y': bool,
+    'Sex category': bool,
+    # HAS-BLED
+    'Uncontrolled hypertension': bool,
+    'Abnormal Renal Function': bool,
+    'Abnormal Liver Function': bool,
+    'Stroke': bool,
+    'Bleeding history or predisposition': bool,
+    'Labile international normalized ratio (INR)': bool,
+    'Elderly': bool,
+    'Drugs': bool,
+    'Alcohol': bool,
+    # ABC-AF
+    'Prior Stroke/TIA': bool,
+    'Prior Bleeding': bool,
+    'Heart Failure': bool,
+    'Age': Annotated[int, ValueRange(22, 95)],
+    'Troponin T in ng/L': Annotated[float, ValueRange(3.0, 200.0)],
+    'NT-proBNP in ng/L': Annotated[float, ValueRange(5, 21000)],
+    'GDF-15 in ng/L': Annotated[float, ValueRange(400.0, 20000.0)],
+    'Hemoglobin in g/dL': Annotated[float, ValueRange(9.0, 20.0)],
+    'DOAC': bool,
+    'Aspirin': bool
+}, total=False)
+
+VALIDATOR = RangeValidator.from_parameters(Parameters)
+
+# Scores using each log-transformed biomarker
+TROPONIN_T_SCORES = frozenset({ABC_AF_STROKE, ABC_AF_BLEEDING, ABC_AF_DEATH})
+NT_PROBNP_SCORES = frozenset({ABC_AF_STROKE, ABC_AF_DEATH})
+GDF_15_SCORES = frozenset({ABC_AF_BLEEDING, ABC_AF_DEATH})
+
+
+def _requested(scores: Collection[str]) -> frozenset[str]:
+    requested = frozenset(scores)
+    if not requested <= set(SCORES):
+        raise ValueError(f"Unknown scores: {', '.join(sorted(requested - set(SCORES)))}")
+    return requested
+
+
+@batch_process
+def calc_panel(parameters: Parameters, scores: Collection[str] = SCORES) -> dict[str, Any]:
+    requested = _requested(scores)
+    VALIDATOR.validate(parameters)
+    if requested & TROPONIN_T_SCORES:
+        log_troponin_t = math.log(parameters['Troponin T in ng/L'])
+    if requested & NT_PROBNP_SCORES:
+        log_nt_probnp = math.log(parameters['NT-proBNP in ng/L'])
+    if requested & GDF_15_SCORES:
+        log_gdf_15 = math.log(parameters['GDF-15 in ng/L'])
+
+    results: dict[str, Any] = {}
+    for score in SCORES:
+        if score not in requested:
+            continue
+        if score == CHADS_VASC:
+            results[score] = chads_vasc.calc_score(parameters)
+        elif score == HAS_BLED:
+            results[score] = has_bled.calc_score(parameters)
+        elif score == ABC_AF_STROKE:
+            results[score] = abc_af_stroke.calc_score(parameters, log_troponin_t, log_nt_probnp)
+        elif score == ABC_AF_BLEEDING:
+            results[score] = abc_af_bleeding.calc_score(parameters, log_troponin_t, log_gdf_15)
+        else:
+            results[score] = abc_af_death.calc_scores(parameters['Heart Failure'], parameters['Age'], log_nt_probnp,
+                                                      log_gdf_15, log_troponin_t)
+    return results
+
+
+@columnar(Parameters)
+def calc_panel_batch(columns: dict[str, np.ndarray], scores: Collection[str] = SCORES) -> dict[str, Any]:
+    import numpy as np
+    requested = _requested(scores)
+    if requested & TROPONIN_T_SCORES:
+        log_troponin_t = np.log(columns['Troponin T in ng/L'])
+    if requested & NT_PROBNP_SCORES:
+        log_nt_probnp = np.log(columns['NT-proBNP in ng/L'])
+    if requested & GDF_15_SCORES:
+        log_gdf_15 = np.log(columns['GDF-15 in ng/L'])
+
+    results: dict[str, Any] = {}
+    for score in SCORES:
+        if score not in requested:
+            continue
+        if score == CHADS_VASC:
+            results[score] = chads_vasc.calc_score_batch(columns)
+        elif score == HAS_BLED:
+            results[score] = has_bled.calc_score_batch(columns)
+        elif score == ABC_AF_STROKE:
+            results[score] = abc_af_stroke.calc_score_batch(columns, log_troponin_t, log_nt_probnp)
+        elif score == ABC_AF_BLEEDING:
+            results[score] = abc_af_bleeding.calc_score_batch(columns, log_troponin_t, log_gdf_15)
+        else:
+            results[score] = abc_af_death.calc_scores_batch(columns['Heart Failure'], columns['Age'], log_nt_probnp,
+                                                            log_gdf_15, log_troponin_t)
+    return results
@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import math
+import operator
+from bisect import bisect_left
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from itertools import compress
+from typing import TYPE_CHECKING
+
+#   The arrays for columns are built on first use, so importing a score module does not import numpy
+if TYPE_CHECKING:
+    import numpy as np
+
+
+#   Upper bound for a 'value < limit' bin; all bins are given by inclusive upper bounds ('value <= bound')
+def below(limit: int | float) -> float:
+    return math.nextafter(limit, -math.inf)
+
+
+@dataclass(frozen=True, slots=True)
+class PointsTable:
+    # Points of the bins given by the upper bounds, plus one more for the values above the last bound
+    bounds: tuple[int | float, ...]
+    points: tuple[int, ...]
+    _arrays: tuple[np.ndarray, np.ndarray] | None = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        if len(self.points) != len(self.bounds) + 1:
+            raise ValueError('A points table needs one more points entry than bounds!')
+        object.__setattr__(self, '_arrays', None)
+
+    def __call__(self, value: int | float) -> int:
+        return self.points[bisect_left(self.bounds, value)]
+
+    def columns(self, values: np.ndarray) -> np.ndarray:
+        import numpy as np
+        if self._arrays is None:
+            object.__setattr__(self, '_arrays', (np.array(self.bounds, dtype=float),
+                                                 np.array(self.points, dtype=np.int64)))
+        bounds, points = self._arrays
+        return points[np.searchsorted(bounds, values, side='left')]
+
+
+@dataclass(frozen=True, slots=True)
+class PointsMatrix:
+    # Points depending on two variables, e.g. age points per ejection fraction group (rows)
+    row_bounds: tuple[int | float, ...]
+    column_bounds: tuple[int | float, ...]
+    points: tuple[tuple[int, ...], ...]
+    _arrays: tuple[np.ndarray, np.ndarray, np.ndarray] | None = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        if len(self.points) != len(self.row_bounds) + 1 or \
+                any(len(row) != len(self.column_bounds) + 1 for row in self.points):
+            raise ValueError('A points matrix needs one more row and column than bounds!')
+        object.__setattr__(self, '_arrays', None)
+
+    def __call__(self, row_value: int | float, column_value: int | float) -> int:
+        return self.points[bisect_left(self.row_bounds, row_value)][bisect_left(self.column_bounds, column_value)]
+
+    def columns(self, row_values: np.ndarray, column_values: np.ndarray) -> np.ndarray:
+        import numpy as np
+        if self._arrays is None:
+            object.__setattr__(self, '_arrays', (np.array(self.row_bounds, dtype=float),
+                                                 np.array(self.column_bounds, dtype=float),
+                                                 np.array(self.points, dtype=np.int64)))
+        row_bounds, column_bounds, points = self._arrays
+        return points[np.searchsorted(row_bounds, row_values, side='left'),
+                      np.searchsorted(column_bounds, column_values, side='left')]
+
+
+@dataclass(frozen=True, slots=True)
+class BooleanPoints:
+    #   Points of boolean items, looked up by their bitmask (bit i set if fields[i] is true) in a table precomputed for
+    #   all combinations. 'false_points' are given for items that score when they are false.
+    fields: tuple[str, ...]
+    true_points: tuple[int, ...]
+    false_points: tuple[int, ...] | None = None
+    table: tuple[int, ...] = field(init=False, repr=False, compare=False)
+    _bits: tuple[int, ...] = field(init=False, repr=False, compare=False)
+    _values: operator.itemgetter = field(init=False, repr=False, compare=False)
+    _table: np.ndarray | None = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        false_points = self.false_points or (0,) * len(self.fields)
+        if not len(self.fields) == len(self.true_points) == len(false_points) or not 1 <= len(self.fields) <= 16:
+            raise ValueError('Boolean points need one true and false points entry for each of 1 to 16 fields!')
+        table = tuple(sum(true if mask >> i & 1 else false for i, (true, false) in
+                          enumerate(zip(self.true_points, false_points))) for mask in range(1 << len(self.fields)))
+        object.__setattr__(self, 'table', table)
+        object.__setattr__(self, '_bits', tuple(1 << i for i in range(len(self.fields))))
+        object.__setattr__(self, '_values', operator.itemgetter(*self.fields))
+        object.__setattr__(self, '_table', None)
+
+    @classmethod
+    def from_points(cls, points: Mapping[str, int]) -> 'BooleanPoints':
+        return cls(tuple(points), tuple(points.values()))
+
+    def bit(self, name: str) -> int:
+        return 1 << self.fields.index(name)
+
+    def mask(self, parameters: Mapping[str, bool]) -> int:
+        values = self._values(parameters)
+        return sum(compress(self._bits, values if len(self.fields) > 1 else (values,)))
+
+    def __call__(self, parameters: Mapping[str, bool]) -> int:
+        return self.table[self.mask(parameters)]
+
+    def masks(self, columns: Mapping[str, np.ndarray]) -> np.ndarray:
+        import numpy as np
+        masks = np.zeros(len(columns[self.fields[0]]), dtype=np.uint16)
+        bits = np.empty_like(masks)
+        for i, name in enumerate(self.fields):
+            np.left_shift(columns[name], i, out=bits, dtype=np.uint16)
+            masks |= bits
+        return masks
+
+    def columns(self, columns: Mapping[str, np.ndarray], masks: np.ndarray | None = None) -> np.ndarray:
+        import numpy as np
+        if self._table is None:
+            object.__setattr__(self, '_table', np.array(self.table, dtype=np.int64))
+        return self._table[self.masks(columns) if masks is None else masks]
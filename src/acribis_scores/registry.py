@@ -0,0 +1,69 @@
+import functools
+import importlib
+from collections.abc import Callable
+from dataclasses import dataclass
+from types import ModuleType
+from typing import Any
+
+#   Registry of all scores. The score modules are only imported when the parameters or functions of a score are first
+#   used, so listing or looking up scores is cheap.
+
+
+@dataclass(frozen=True)
+class Score:
+    name: str
+    module: str
+    calc_name: str
+    reference: str
+
+    @functools.cached_property
+    def _module(self) -> ModuleType:
+        return importlib.import_module(self.module)
+
+    @property
+    def parameters(self) -> type:
+        return self._module.Parameters
+
+    @property
+    def calc(self) -> Callable[..., Any]:
+        return getattr(self._module, self.calc_name)
+
+    @property
+    def calc_batch(self) -> Callable[..., Any]:
+        return getattr(self._module, f"{self.calc_name}_batch")
+
+    def __getstate__(self) -> dict[str, Any]:
+        # Only the names are pickled (e.g. for worker processes), not the imported module
+        state = dict(self.__dict__)
+        state.pop('_module', None)
+        return state
+
+
+SCORES: dict[str, Score] = {score.name: score for score in [
+    Score('CHA2DS2-VASc', 'acribis_scores.chads_vasc', 'calc_chads_vasc_score',
+          'https://doi.org/10.1378/chest.09-1584'),
+    Score('HAS-BLED', 'acribis_scores.has_bled', 'calc_has_bled_score', 'https://doi.org/10.1378/chest.10-0134'),
+    Score('SMART', 'acribis_scores.smart', 'calc_smart_score', 'https://doi.org/10.1136/heartjnl-2013-303640'),
+    Score('SMARTReach', 'acribis_scores.smart_reach', 'calc_smart_reach_score',
+          'https://doi.org/10.1161/JAHA.118.009217'),
+    Score('CHARGE-AF', 'acribis_scores.charge_af', 'calc_charge_af_score', 'https://doi.org/10.1161/JAHA.112.000102'),
+    Score('MAGGIC', 'acribis_scores.maggic', 'calc_maggic_score', 'https://doi.org/10.1093/eurheartj/ehs337'),
+    Score('BARCELONA Bio-HF V3', 'acribis_scores.barcelona_hf_v3', 'calc_barcelona_hf_score',
+          'https://doi.org/10.1002/ejhf.2752'),
+    Score('ABC-AF Stroke', 'acribis_scores.abc_af_stroke', 'calc_abc_af_stroke_score',
+          'https://doi.org/10.1093/eurheartj/ehw054'),
+    Score('ABC-AF Bleeding', 'acribis_scores.abc_af_bleeding', 'calc_abc_af_bleeding_score',
+          'https://doi.org/10.1016/S0140-6736(16)00741-8'),
+    Score('ABC-AF Death', 'acribis_scores.abc_af_death', 'calc_abc_af_death_score',
+          'https://doi.org/10.1093/eurheartj/ehx584')
+]}
+
+
+#   Scores can be looked up by their display name (as in 'SCORES') or by their module name, e.g. 'chads_vasc'
+def get_score(name: str) -> Score:
+    if name in SCORES:
+        return SCORES[name]
+    for score in SCORES.values():
+        if score.module.rsplit('.', 1)[-1] == name or score.name.lower() == name.lower():
+            return score
+    raise KeyError(f"Unknown score '{name}'! Available scores: {', '.join(SCORES)}")
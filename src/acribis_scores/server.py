@@ -0,0 +1,275 @@
+import argparse
+import json
+import math
+import queue
+import sys
+import threading
+import time
+from collections.abc import Sequence
+from concurrent.futures import Future
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+from urllib.parse import unquote
+
+import numpy as np
+
+from acribis_scores import instrumentation
+from acribis_scores.batch_processing import score_rows, type_errors
+from acribis_scores.registry import SCORES, Score, get_score
+from acribis_scores.value_range import InvalidParametersError
+
+#   Local scoring service: acribis-serve --port 8080
+#
+#       POST /score/<score>   JSON parameters of one patient -> {"result": ...}
+#       GET  /scores          names of the available scores (see registry.SCORES)
+#       GET  /metrics         Prometheus text format
+#
+#   Each score has a queue of pending requests and a worker thread that collects up to 'max_batch_size' requests, or
+#   as many as arrive within 'max_delay' seconds of the first one, and scores them with one call of the batch function.
+#   Requests beyond 'max_queue' pending requests of a score are rejected with 503 (Service Unavailable).
+
+DEFAULT_PORT = 8080
+DEFAULT_MAX_BATCH_SIZE = 256
+DEFAULT_MAX_DELAY = 0.002
+DEFAULT_MAX_QUEUE = 1024
+
+
+class ServerStats:
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.requests = self.rejected = self.invalid = self.batches = self.batch_rows = 0
+        self.busy_seconds = 0.0
+
+    def count(self, name: str, increment: int | float = 1):
+        with self.__lock:
+            setattr(self, name, getattr(self, name) + increment)
+
+
+class _Batcher(threading.Thread):
+    def __init__(self, score: Score, max_batch_size: int, max_delay: float, max_queue: int, stats: ServerStats):
+        super().__init__(name=f"batcher {score.name}", daemon=True)
+        self.score = score
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        self.queue: queue.Queue[tuple[dict[str, Any], Future] | None] = queue.Queue(max_queue)
+        self.stats = stats
+
+    # Raises queue.Full if 'max_queue' requests are already pending
+    def submit(self, parameters: dict[str, Any]) -> Future:
+        future: Future = Future()
+        self.queue.put_nowait((parameters, future))
+        return future
+
+    def stop(self):
+        self.queue.put(None)
+
+    def run(self):
+        while (item := self.queue.get()) is not None:
+            batch = [item]
+            deadline = time.monotonic() + self.max_delay
+            while len(batch) < self.max_batch_size:
+                try:
+                    item = self.queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is None:
+                    self.__score(batch)
+                    return
+                batch.append(item)
+            self.__score(batch)
+
+    def __score(self, batch: list[tuple[dict[str, Any], Future]]):
+        start = time.perf_counter()
+        try:
+            scored = score_rows(self.score.calc, self.score.calc_batch, [parameters for parameters, _ in batch])
+        except Exception as e:
+            scored = [(False, e)] * len(batch)
+        self.stats.count('batches')
+        self.stats.count('batch_rows', len(batch))
+        self.stats.count('busy_seconds', time.perf_counter() - start)
+        for (_, future), (ok, value) in zip(batch, scored):
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, np.ndarray):
+        return _json_safe(value.tolist())
+    if isinstance(value, np.generic):
+        return _json_safe(value.item())
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _json_safe(value: Any) -> Any:
+    # NaN and infinity are not valid JSON, so they are sent as null
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if isinstance(value, dict):
+        return {k: _json_safe(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_json_safe(v) for v in value]
+    return value
+
+
+class ScoringServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+                 max_delay: float = DEFAULT_MAX_DELAY, max_queue: int = DEFAULT_MAX_QUEUE, instrument: bool = False):
+        super().__init__(address, _RequestHandler)
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        self.max_queue = max_queue
+        self.stats = ServerStats()
+        self.metrics = instrumentation.Metrics() if instrument else None
+        if self.metrics is not None:
+            instrumentation.add_hook(self.metrics)
+        self.__batchers: dict[str, _Batcher] = {}
+        self.__lock = threading.Lock()
+
+    def batcher(self, score: Score) -> _Batcher:
+        with self.__lock:
+            batcher = self.__batchers.get(score.name)
+            if batcher is None:
+                batcher = self.__batchers[score.name] = _Batcher(score, self.max_batch_size, self.max_delay,
+                                                                 self.max_queue, self.stats)
+                batcher.start()
+            return batcher
+
+    def queue_depths(self) -> dict[str, int]:
+        with self.__lock:
+            return {name: batcher.queue.qsize() for name, batcher in self.__batchers.items()}
+
+    def to_prometheus(self, prefix: str = 'acribis_scores') -> str:
+        lines = []
+        for name, kind, description, value in (
+                ('requests_total', 'counter', 'Scoring requests received', self.stats.requests),
+                ('rejected_total', 'counter', 'Requests rejected because the queue was full', self.stats.rejected),
+                ('invalid_total', 'counter', 'Requests with invalid parameters', self.stats.invalid),
+                ('batches_total', 'counter', 'Batches scored', self.stats.batches),
+                ('batch_rows_total', 'counter', 'Requests scored in batches', self.stats.batch_rows),
+                ('busy_seconds_total', 'counter', 'Wall time spent scoring batches', self.stats.busy_seconds)):
+            lines += [f"# HELP {prefix}_server_{name} {description}", f"# TYPE {prefix}_server_{name} {kind}",
+                      f"{prefix}_server_{name} {value}"]
+        lines += [f"# HELP {prefix}_server_queue_depth Pending requests per score",
+                  f"# TYPE {prefix}_server_queue_depth gauge"]
+        lines += [f"{prefix}_server_queue_depth{{score=\"{name}\"}} {depth}"
+                  for name, depth in self.queue_depths().items()]
+        text = '\n'.join(lines) + '\n'
+        if self.metrics is not None:
+            text += self.metrics.to_prometheus(prefix)
+        return text
+
+    def server_close(self):
+        super().server_close()
+        with self.__lock:
+            batchers = list(self.__batchers.values())
+            self.__batchers.clear()
+        for batcher in batchers:
+            batcher.stop()
+        for batcher in batchers:
+            batcher.join()
+        if self.metrics is not None:
+            instrumentation.remove_hook(self.metrics)
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    server: ScoringServer
+
+    def log_message(self, format: str, *args: Any):
+        # Requests are counted in the metrics instead of being logged one by one
+        pass
+
+    def __send(self, status: HTTPStatus, body: str, content_type: str = 'application/json'):
+        data = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', f"{content_type}; charset=utf-8")
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def __send_json(self, status: HTTPStatus, value: Any):
+        self.__send(status, json.dumps(_json_safe(value), default=_json_default, allow_nan=False))
+
+    def do_GET(self):
+        if self.path == '/scores':
+            self.__send_json(HTTPStatus.OK, list(SCORES))
+        elif self.path == '/metrics':
+            self.__send(HTTPStatus.OK, self.server.to_prometheus(), 'text/plain; version=0.0.4')
+        else:
+            self.__send_json(HTTPStatus.NOT_FOUND, {'error': f"Unknown path '{self.path}'"})
+
+    def do_POST(self):
+        if not self.path.startswith('/score/'):
+            self.__send_json(HTTPStatus.NOT_FOUND, {'error': f"Unknown path '{self.path}'"})
+            return
+        self.server.stats.count('requests')
+        try:
+            score = get_score(unquote(self.path.removeprefix('/score/')))
+        except KeyError as e:
+            self.__send_json(HTTPStatus.NOT_FOUND, {'error': e.args[0]})
+            return
+        try:
+            parameters = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+            if not isinstance(parameters, dict):
+                raise ValueError('The parameters must be a JSON object!')
+        except ValueError as e:
+            self.server.stats.count('invalid')
+            self.__send_json(HTTPStatus.BAD_REQUEST, {'error': str(e)})
+            return
+        if errors := type_errors(score.parameters, parameters):
+            self.server.stats.count('invalid')
+            self.__send_json(HTTPStatus.BAD_REQUEST, {'errors': [{'field': error.field, 'message': str(error)}
+                                                                 for error in errors]})
+            return
+        try:
+            future = self.server.batcher(score).submit(parameters)
+        except queue.Full:
+            self.server.stats.count('rejected')
+            self.__send_json(HTTPStatus.SERVICE_UNAVAILABLE, {'error': f"Too many pending requests for {score.name}"})
+            return
+        try:
+            result = future.result()
+        except InvalidParametersError as e:
+            self.server.stats.count('invalid')
+            self.__send_json(HTTPStatus.BAD_REQUEST, {'errors': [{'field': error.field, 'message': str(error)}
+                                                                 for error in e.errors]})
+        except (ValueError, KeyError, TypeError) as e:
+            self.server.stats.count('invalid')
+            self.__send_json(HTTPStatus.BAD_REQUEST, {'error': str(e)})
+        else:
+            self.__send_json(HTTPStatus.OK, {'result': result})
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog='acribis-serve', description='Serve the risk scores over HTTP.')
+    parser.add_argument('--host', default='127.0.0.1', help='Address to listen on (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f"Port (default: {DEFAULT_PORT})")
+    parser.add_argument('--max-batch-size', type=int, default=DEFAULT_MAX_BATCH_SIZE,
+                        help=f"Requests scored at a time (default: {DEFAULT_MAX_BATCH_SIZE})")
+    parser.add_argument('--max-delay', type=float, default=DEFAULT_MAX_DELAY * 1000,
+                        help=f"Milliseconds to wait for more requests (default: {DEFAULT_MAX_DELAY * 1000:g})")
+    parser.add_argument('--max-queue', type=int, default=DEFAULT_MAX_QUEUE,
+                        help=f"Pending requests per score before rejecting (default: {DEFAULT_MAX_QUEUE})")
+    parser.add_argument('--instrument', action='store_true', help='Include per-stage timings in /metrics')
+    args = parser.parse_args(argv)
+    if args.max_batch_size < 1 or args.max_queue < 1 or args.max_delay < 0:
+        parser.error('--max-batch-size and --max-queue must be positive and --max-delay must not be negative!')
+
+    server = ScoringServer((args.host, args.port), args.max_batch_size, args.max_delay / 1000, args.max_queue,
+                           args.instrument)
+    print(f"Serving {len(SCORES)} scores on http://{args.host}:{server.server_address[1]}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,9 +1,15 @@
+from __future__ import annotations
+
 import math
-from typing import TypedDict, Annotated
+from typing import TYPE_CHECKING, TypedDict, Annotated
 
-from acribis_scores.batch_processing import batch_process
+from acribis_scores.batch_processing import batch_process, columnar
+from acribis_scores.linear_predictor import LinearPredictor
 from acribis_scores.value_range import ValueRange, check_ranges
 
+if TYPE_CHECKING:
+    import numpy as np
+
 # See: https://doi.org/10.1136/heartjnl-2013-303640
 # And: https://heart.bmj.com/content/heartjnl/99/12/866.full.pdf?with-ds=yes#page=13
 
@@ -50,22 +56,60 @@ WEIGHTS: dict[str, float] = {
     'log(hs-CRP in mg/L)': 0.139
 }
 
+LINEAR_PREDICTOR = LinearPredictor.from_weights(WEIGHTS)
+
 
 @batch_process
 @check_ranges
 def calc_smart_score(parameters: Parameters) -> float:
-    new_parameters = dict({key: value for key, value in parameters.items()})
-    new_parameters['Squared Age in years'] = parameters['Age in years'] ** 2
-    new_parameters['Squared eGFR in mL/min/1.73m²'] = parameters['eGFR in mL/min/1.73m²'] ** 2
-    new_parameters['log(hs-CRP in mg/L)'] = math.log(parameters['hs-CRP in mg/L'])
-    x = sum([new_parameters[parameter] * weight for parameter, weight in WEIGHTS.items()])
+    age = parameters['Age in years']
+    egfr = parameters['eGFR in mL/min/1.73m²']
+    x = LINEAR_PREDICTOR((age,
+                          age ** 2,
+                          parameters['Male'],
+                          parameters['Current smoker'],
+                          parameters['Systolic blood pressure in mmHg'],
+                          parameters['Diabetic'],
+                          parameters['History of coronary artery disease'],
+                          parameters['History of cerebrovascular disease'],
+                          parameters['Abdominal aortic aneurysm'],
+                          parameters['Peripheral artery disease'],
+                          parameters['Years since first diagnosis of vascular disease'],
+                          parameters['HDL-cholesterol in mmol/L'],
+                          parameters['Total cholesterol in mmol/L'],
+                          egfr,
+                          egfr ** 2,
+                          math.log(parameters['hs-CRP in mg/L'])))
     ten_year_risk = (1 - math.pow(0.81066, math.exp(x + 2.099)))
-    if new_parameters['History of cerebrovascular disease']:
+    if parameters['History of cerebrovascular disease']:
         cvd_ten_year_risk = (1 - math.pow(0.7184, math.exp(x + 1.933)))
         ten_year_risk = cvd_ten_year_risk if cvd_ten_year_risk > ten_year_risk else ten_year_risk
-    if new_parameters['Peripheral artery disease']:
+    if parameters['Peripheral artery disease']:
         pad_ten_year_risk = (1 - math.pow(0.70594, math.exp(x + 1.4)))
         ten_year_risk = pad_ten_year_risk if pad_ten_year_risk > ten_year_risk else ten_year_risk
-    if not new_parameters['Antithrombotic treatment']:
+    if not parameters['Antithrombotic treatment']:
         ten_year_risk = 1.0 - (1.0 - ten_year_risk) ** (1.0 / 0.81)
     return ten_year_risk * 100
+
+
+@columnar(Parameters)
+def calc_smart_score_batch(columns: dict[str, np.ndarray]) -> np.ndarray:
+    import numpy as np
+    features = LINEAR_PREDICTOR.buffer(len(columns['Age in years']))
+    for i, name in enumerate(LINEAR_PREDICTOR.features):
+        if name in columns:
+            features[i] = columns[name]
+    np.square(columns['Age in years'], out=features[1])
+    np.square(columns['eGFR in mL/min/1.73m²'], out=features[14])
+    np.log(columns['hs-CRP in mg/L'], out=features[15])
+    x = LINEAR_PREDICTOR.columns(features)
+    ten_year_risk = (1 - np.power(0.81066, np.exp(x + 2.099)))
+    cvd_ten_year_risk = (1 - np.power(0.7184, np.exp(x + 1.933)))
+    ten_year_risk = np.where(columns['History of cerebrovascular disease'],
+                             np.maximum(cvd_ten_year_risk, ten_year_risk), ten_year_risk)
+    pad_ten_year_risk = (1 - np.power(0.70594, np.exp(x + 1.4)))
+    ten_year_risk = np.where(columns['Peripheral artery disease'],
+                             np.maximum(pad_ten_year_risk, ten_year_risk), ten_year_risk)
+    ten_year_risk = np.where(columns['Antithrombotic treatment'],
+                             ten_year_risk, 1.0 - (1.0 - ten_year_risk) ** (1.0 / 0.81))
+    return ten_year_risk * 100
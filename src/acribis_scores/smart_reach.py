@@ -1,14 +1,24 @@
-import math
+from __future__ import annotations
+
+import functools
+import logging
+from collections.abc import Callable, Mapping
 from enum import Enum
-from typing import TypedDict, Annotated
+from typing import TYPE_CHECKING, TypedDict, Annotated, Any, NamedTuple
 
-from acribis_scores.batch_processing import batch_process
+from acribis_scores import instrumentation
+from acribis_scores.batch_processing import batch_process, columnar
 from acribis_scores.value_range import ValueRange, check_ranges
 
+if TYPE_CHECKING:
+    import numpy as np
+
 
 # See: https://doi.org/10.1161/JAHA.118.009217
 # And: https://www.ahajournals.org/action/downloadSupplement?doi=10.1161%2FJAHA.118.009217&file=jah33408-sup-0001-supinfo.pdf#page=11
 
+logger = logging.getLogger(__name__)
+
 
 class Model(Enum):
     CARDIOVASCULAR = 'Cardiovascular model (A)'
@@ -169,47 +179,166 @@ MODEL_B_BASELINE_SURVIVALS: dict[int, float] = {
 }
 
 
-def calc_one_year_survival(parameters: dict[str, int | float | bool], model: Model) -> float:
-    if model == Model.CARDIOVASCULAR:
-        model_weights = MODEL_A_WEIGHTS
-        model_baseline_survivals = MODEL_A_BASELINE_SURVIVALS
-    else:
-        model_weights = dict(MODEL_B_WEIGHTS)
-        model_baseline_survivals = MODEL_B_BASELINE_SURVIVALS
-        if not parameters['Current smoker']:
-            model_weights['Age in years'] = 0
-    x = sum([parameters[parameter] * value for parameter, value in model_weights.items()])
-    return math.pow(model_baseline_survivals[parameters['Age in years']], math.exp(x))
+def _to_array(baseline_survivals: dict[int, float]) -> np.ndarray:
+    import numpy as np
+    survivals = np.ones(max(baseline_survivals) + 1)
+    survivals[list(baseline_survivals)] = list(baseline_survivals.values())
+    return survivals
 
 
-@batch_process
-@check_ranges
-def calc_smart_reach_score(parameters: Parameters) -> tuple[float, float, float] | None:
-    n_cardiovascular_diseases = sum([value for parameter, value in parameters.items() if parameter in CV_DISEASES])
-    new_parameters = dict({key: value for key, value in parameters.items() if key not in CV_DISEASES})
+#   Baseline survivals of models A and B indexed by age (1.0, i.e. no risk, below age 45); built on first use, so
+#   importing this module does not import numpy
+@functools.cache
+def _baseline_survival_tables() -> tuple[np.ndarray, np.ndarray]:
+    return _to_array(MODEL_A_BASELINE_SURVIVALS), _to_array(MODEL_B_BASELINE_SURVIVALS)
+
+
+MAX_AGE = 90
+
+
+class SurvivalCurves(NamedTuple):
+    # Age at the end of each simulated year
+    ages: np.ndarray
+    cvd_free_survival: np.ndarray
+    # Cumulative risk of a (recurrent) cardiovascular event
+    cv_event_risk: np.ndarray
+
+
+# Rows are scored in blocks to keep the (patients x years) life tables small
+BLOCK_SIZE = 1 << 16
+
+
+def _derived_parameters(parameters: Mapping[str, Any]) -> dict[str, Any]:
+    # Works on scalars as well as on columns
+    n_cardiovascular_diseases = sum([parameters[parameter] for parameter in CV_DISEASES])
+    new_parameters = {key: value for key, value in parameters.items() if key not in CV_DISEASES}
     new_parameters['Two locations of cardiovascular disease'] = n_cardiovascular_diseases == 2
     new_parameters['Three locations of cardiovascular disease'] = n_cardiovascular_diseases == 3
     new_parameters['Squared systolic blood pressure in mmHg'] = parameters['Systolic blood pressure in mmHg'] ** 2
     new_parameters['Squared Total cholesterol in mmol/L'] = parameters['Total cholesterol in mmol/L'] ** 2
     new_parameters['Squared Creatinine in µmol/L'] = parameters['Creatinine in µmol/L'] ** 2
-    cvd_free_survival = 1.0
-    no_cv_event = 1.0
-    cvd_free_life_expectancy = new_parameters['Age in years']
-    ten_year_risk = 0.0
-    ten_years_later = new_parameters['Age in years'] + 10
-    while new_parameters['Age in years'] < 90:
-        cv_risk = 1.0 - calc_one_year_survival(new_parameters, Model.CARDIOVASCULAR)
-        non_cv_risk = 1.0 - calc_one_year_survival(new_parameters, Model.NON_CARDIOVASCULAR)
-        total_risk = cv_risk + non_cv_risk if cv_risk + non_cv_risk <= 1.0 else 1.0
-        cvd_free_survival = cvd_free_survival * (1.0 - total_risk)
-        cvd_free_life_expectancy += cvd_free_survival
-        no_cv_event = no_cv_event * (1.0 - cv_risk)
-        new_parameters['Age in years'] += 1
-        if new_parameters['Age in years'] == ten_years_later:
-            ten_year_risk = 1.0 - no_cv_event
-        print(f"CVD Free Survival: {new_parameters['Age in years']}: {cvd_free_survival}")
-    lifetime_risk = 1.0 - no_cv_event
-    print(f"Ten year risk of CV event: {ten_year_risk}")
-    print(f"Lifetime risk of CV event: {lifetime_risk}")
-    print(f"CVD-free life-expectancy: {cvd_free_life_expectancy}")
+    return new_parameters
+
+
+def _model_predictors(new_parameters: Mapping[str, Any]) -> tuple[Any, Any, Any]:
+    # Only the age term of model B changes from year to year (and only for smokers), so the age-independent parts of
+    # both models are computed once
+    x_a = sum([new_parameters[parameter] * weight for parameter, weight in MODEL_A_WEIGHTS.items()])
+    x_b = sum([new_parameters[parameter] * weight for parameter, weight in MODEL_B_WEIGHTS.items()
+               if parameter != 'Age in years'])
+    age_weight_b = new_parameters['Current smoker'] * MODEL_B_WEIGHTS['Age in years']
+    return x_a, x_b, age_weight_b
+
+
+def _linear_predictors(parameters: Mapping[str, Any]) -> tuple[Any, Any, Any]:
+    return _model_predictors(_derived_parameters(parameters))
+
+
+def _one_year_survivals(ages: np.ndarray, x_a: np.ndarray, x_b: np.ndarray,
+                        age_weight_b: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    # Survival of models A and B in the year at 'ages' (patients x years)
+    import numpy as np
+    model_a_table, model_b_table = _baseline_survival_tables()
+    cv_survival = np.power(model_a_table[ages], np.exp(x_a)[:, None])
+    non_cv_survival = np.power(model_b_table[ages],
+                               np.exp(x_b[:, None] + age_weight_b[:, None] * ages))
+    return cv_survival, non_cv_survival
+
+
+#   One year survival of a model, for the derived parameters (see '_derived_parameters') at the age of the year. The
+#   scores compute all years at once with 'life_table'.
+def calc_one_year_survival(parameters: dict[str, int | float | bool], model: Model) -> float:
+    import numpy as np
+    predictors = (np.array([value], dtype=float) for value in _model_predictors(parameters))
+    cv_survival, non_cv_survival = _one_year_survivals(np.array([[parameters['Age in years']]]), *predictors)
+    return (cv_survival if model == Model.CARDIOVASCULAR else non_cv_survival).item()
+
+
+def life_table(age: np.ndarray, x_a: np.ndarray, x_b: np.ndarray,
+               age_weight_b: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # One row per patient and one column per simulated year, starting at the youngest patient's age.
+    # Returns the CVD-free survival, the survival without CV event and the mask of the years before age 90.
+    import numpy as np
+    ages = age.astype(np.int64)[:, None] + np.arange(MAX_AGE - int(age.min()))
+    alive = ages < MAX_AGE
+    cv_survival, non_cv_survival = _one_year_survivals(np.where(alive, ages, 0), x_a, x_b, age_weight_b)
+    cv_risk = 1.0 - cv_survival
+    total_risk = np.minimum(cv_risk + (1.0 - non_cv_survival), 1.0)
+    return np.cumprod(1.0 - total_risk, axis=1), np.cumprod(1.0 - cv_risk, axis=1), alive
+
+
+def _summarize(age: np.ndarray, cvd_free_survival: np.ndarray, no_cv_event: np.ndarray,
+               alive: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # Patients less than ten years before age 90 have no ten year risk, as in the year-by-year recursion
+    import numpy as np
+    ten_year_risk = np.zeros(len(age))
+    if no_cv_event.shape[1] >= 10:
+        ten_year_risk = np.where(age <= MAX_AGE - 10, 1.0 - no_cv_event[:, 9], 0.0)
+    lifetime_risk = 1.0 - no_cv_event[:, -1]
+    cvd_free_life_expectancy = np.cumsum(np.concatenate([age[:, None], np.where(alive, cvd_free_survival, 0.0)],
+                                                        axis=1), axis=1)[:, -1]
+    return ten_year_risk, lifetime_risk, cvd_free_life_expectancy
+
+
+#   With curves=True, the per-year CVD-free survival and cumulative CV event risk are returned as a fourth element.
+@batch_process
+@check_ranges
+def calc_smart_reach_score(parameters: Parameters,
+                           trace: Callable[[list[tuple[int, float]]], None] | None = None,
+                           curves: bool = False
+                           ) -> tuple[float, float, float] | tuple[float, float, float, SurvivalCurves]:
+    import numpy as np
+    age = np.array([parameters['Age in years']], dtype=float)
+    with instrumentation.stage('smart_reach', instrumentation.FEATURES):
+        x_a, x_b, age_weight_b = _linear_predictors(parameters)
+    with instrumentation.stage('smart_reach', instrumentation.LIFE_TABLE):
+        cvd_free_survival, no_cv_event, alive = life_table(age, np.array([x_a]), np.array([x_b]),
+                                                           np.array([age_weight_b]))
+    ten_year_risk, lifetime_risk, cvd_free_life_expectancy = (
+        value.item() for value in _summarize(age, cvd_free_survival, no_cv_event, alive))
+    debug = logger.isEnabledFor(logging.DEBUG)
+    if trace is not None or debug:
+        curve = list(zip(range(parameters['Age in years'] + 1, MAX_AGE + 1), cvd_free_survival[0].tolist()))
+        if debug:
+            for year, survival in curve:
+                logger.debug("CVD Free Survival: %d: %s", year, survival)
+            logger.debug("Ten year risk of CV event: %s", ten_year_risk)
+            logger.debug("Lifetime risk of CV event: %s", lifetime_risk)
+            logger.debug("CVD-free life-expectancy: %s", cvd_free_life_expectancy)
+        if trace is not None:
+            trace(curve)
+    if curves:
+        return ten_year_risk, lifetime_risk, cvd_free_life_expectancy, SurvivalCurves(
+            np.arange(parameters['Age in years'] + 1, MAX_AGE + 1), cvd_free_survival[0], 1.0 - no_cv_event[0])
     return ten_year_risk, lifetime_risk, cvd_free_life_expectancy
+
+
+#   With curves=True, the curves are returned as (patients x years) arrays, one column per year after the youngest
+#   patient's age. Years after a patient reaches age 90 are NaN.
+@columnar(Parameters)
+def calc_smart_reach_score_batch(columns: dict[str, np.ndarray], curves: bool = False) -> (
+        tuple[np.ndarray, np.ndarray, np.ndarray] | tuple[np.ndarray, np.ndarray, np.ndarray, SurvivalCurves]):
+    import numpy as np
+    age = columns['Age in years']
+    with instrumentation.stage('smart_reach', instrumentation.FEATURES, len(age)):
+        x_a, x_b, age_weight_b = _linear_predictors(columns)
+    results = tuple(np.empty(len(age)) for _ in range(3))
+    n_years = MAX_AGE - int(age.min()) if len(age) else 0
+    survival_curves = SurvivalCurves(age.astype(np.int64)[:, None] + np.arange(1, n_years + 1),
+                                     np.full((len(age), n_years), np.nan),
+                                     np.full((len(age), n_years), np.nan)) if curves else None
+    for start in range(0, len(age), BLOCK_SIZE):
+        block = slice(start, start + BLOCK_SIZE)
+        with instrumentation.stage('smart_reach', instrumentation.LIFE_TABLE, len(age[block])):
+            cvd_free_survival, no_cv_event, alive = life_table(age[block], x_a[block], x_b[block],
+                                                               age_weight_b[block])
+        for result, values in zip(results, _summarize(age[block], cvd_free_survival, no_cv_event, alive)):
+            result[block] = values
+        if curves:
+            # The block's table starts at the block's youngest patient, so it can be shorter than the cohort's
+            block_years = cvd_free_survival.shape[1]
+            survival_curves.cvd_free_survival[block, :block_years] = np.where(alive, cvd_free_survival, np.nan)
+            survival_curves.cv_event_risk[block, :block_years] = np.where(alive, 1.0 - no_cv_event, np.nan)
+    if curves:
+        return *results, survival_curves
+    return results
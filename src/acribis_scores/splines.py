@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+# The knot arrays for columns are built on first use (see points.py)
+if TYPE_CHECKING:
+    import numpy as np
+
+
+@dataclass(frozen=True)
+class SplineBasis:
+    #   Restricted cubic spline basis of one or more variables: for each variable the linear term followed by the
+    #   truncated cubic terms (x - knot)₊³, i.e. the layout of the '(x - knot) ^ 3' weights of the published models
+    knots: tuple[tuple[int | float, ...], ...]
+    _knot_arrays: tuple[np.ndarray, ...] | None = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, '_knot_arrays', None)
+
+    @classmethod
+    def from_terms(cls, spline_terms: Mapping[str, tuple[int | float, ...]],
+                   variables: Sequence[str] | None = None) -> 'SplineBasis':
+        variables = spline_terms if variables is None else variables
+        return cls(tuple(tuple(spline_terms[variable]) for variable in variables))
+
+    def __len__(self) -> int:
+        return sum(len(knots) + 1 for knots in self.knots)
+
+    def __call__(self, values: Sequence[int | float]) -> list[int | float]:
+        features = []
+        for value, knots in zip(values, self.knots):
+            features.append(value)
+            features.extend([max(0.0, value - knot) ** 3 for knot in knots])
+        return features
+
+    def columns(self, values: Sequence[np.ndarray], out: np.ndarray | None = None) -> np.ndarray:
+        import numpy as np
+        if self._knot_arrays is None:
+            object.__setattr__(self, '_knot_arrays',
+                               tuple(np.array(knots, dtype=float)[:, None] for knots in self.knots))
+        if out is None:
+            out = np.empty((len(self), len(values[0])))
+        row = 0
+        for value, knots in zip(values, self._knot_arrays):
+            out[row] = value
+            truncated = out[row + 1:row + 1 + len(knots)]
+            np.subtract(value, knots, out=truncated)
+            np.maximum(truncated, 0.0, out=truncated)
+            np.power(truncated, 3, out=truncated)
+            row += len(knots) + 1
+        return out
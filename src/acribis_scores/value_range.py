@@ -1,5 +1,14 @@
+from __future__ import annotations
+
+import functools
 from dataclasses import dataclass
-from typing import Callable, get_type_hints
+from typing import TYPE_CHECKING, Any, Callable, Mapping, NotRequired, Required, get_args, get_origin, get_type_hints
+
+from acribis_scores import instrumentation
+
+# Only the column checks use numpy; it is imported there (see batch_processing.py)
+if TYPE_CHECKING:
+    import numpy as np
 
 
 @dataclass
@@ -9,18 +18,111 @@ class ValueRange:
 
     def validate_value(self, value: int | float, name: str):
         if not (self.min <= value <= self.max):
-            raise ValueError(f"{name} ({value}) is not in range [{self.min}, {self.max}]")
+            raise InvalidParametersError([ParameterError(name, value, self, 'range')])
+
+
+@dataclass(frozen=True)
+class ParameterError:
+    field: str | None
+    value: Any
+    allowed: ValueRange | None
+    rule: str
+
+    def __str__(self) -> str:
+        if self.allowed is None:
+            return self.rule
+        return f"{self.field} ({self.value}) is not in range [{self.allowed.min}, {self.allowed.max}]"
+
+
+class InvalidParametersError(ValueError):
+    def __init__(self, errors: list[ParameterError]):
+        super().__init__('; '.join(str(error) for error in errors))
+        self.errors = errors
+
+    def __reduce__(self):
+        return self.__class__, (self.errors,)
+
+
+def _range_error(name: str, value: int | float, minimum: int | float, maximum: int | float) -> ParameterError:
+    return ParameterError(name, value, ValueRange(minimum, maximum), 'range')
+
+
+@dataclass(frozen=True)
+class RangeValidator:
+    # (name, min, max) for the constrained fields only, resolved once from the 'Parameters' annotations
+    fields: tuple[tuple[str, int | float, int | float], ...]
+    optional: frozenset[str] = frozenset()
+
+    @classmethod
+    def from_parameters(cls, parameters_type: type) -> 'RangeValidator':
+        fields = []
+        for name, value_type in get_type_hints(parameters_type, include_extras=True).items():
+            if get_origin(value_type) in (NotRequired, Required):
+                value_type = get_args(value_type)[0]
+            metadata = getattr(value_type, '__metadata__', None)
+            if metadata:
+                fields.append((name, metadata[0].min, metadata[0].max))
+        return cls(tuple(fields), frozenset(getattr(parameters_type, '__optional_keys__', ())))
+
+    def validate(self, parameters: Mapping[str, int | float]):
+        for name, minimum, maximum in self.fields:
+            if name in self.optional and name not in parameters:
+                continue
+            if not (minimum <= parameters[name] <= maximum):
+                raise InvalidParametersError(self.check(parameters))
+
+    def check(self, parameters: Mapping[str, int | float]) -> list[ParameterError]:
+        return [_range_error(name, parameters[name], minimum, maximum) for name, minimum, maximum in self.fields
+                if name in parameters and not (minimum <= parameters[name] <= maximum)]
+
+    #   NaN is out of range like in 'validate', except in optional columns, where it marks a missing value
+    def invalid(self, name: str, values: np.ndarray, minimum: int | float, maximum: int | float) -> np.ndarray:
+        if name in self.optional:
+            return (values < minimum) | (values > maximum)
+        return ~((values >= minimum) & (values <= maximum))
+
+    def mask(self, columns: Mapping[str, np.ndarray]) -> np.ndarray:
+        import numpy as np
+        valid = np.ones(len(next(iter(columns.values()))), dtype=bool)
+        for name, minimum, maximum in self.fields:
+            if name in columns:
+                valid &= ~self.invalid(name, columns[name], minimum, maximum)
+        return valid
+
+    def errors(self, columns: Mapping[str, np.ndarray]) -> dict[int, list[ParameterError]]:
+        report: dict[int, list[ParameterError]] = {}
+        for name, minimum, maximum in self.fields:
+            if name not in columns:
+                continue
+            values = columns[name]
+            for row in self.invalid(name, values, minimum, maximum).nonzero()[0].tolist():
+                report.setdefault(row, []).append(_range_error(name, values[row].item(), minimum, maximum))
+        return dict(sorted(report.items()))
+
+    def validate_columns(self, columns: Mapping[str, np.ndarray]):
+        for name, minimum, maximum in self.fields:
+            if name not in columns:
+                continue
+            invalid = self.invalid(name, columns[name], minimum, maximum)
+            if invalid.any():
+                value = columns[name][invalid.argmax()].item()
+                raise InvalidParametersError([_range_error(name, value, minimum, maximum)])
 
 
 def check_ranges(func: Callable):
     parameter_dict = get_type_hints(func, include_extras=True)['parameters']
-    parameters = get_type_hints(parameter_dict, include_extras=True)
+    validator = RangeValidator.from_parameters(parameter_dict)
+    score = instrumentation.score_name(func.__module__)
 
+    @functools.wraps(func)
     def wrapper(*args, **kwargs):
-        input_parameters = args[0] if len(args) > 0 else kwargs['parameters']
-        for name, value_type in parameters.items():
-            metadata = getattr(value_type, '__metadata__', None)
-            if metadata:
-                metadata[0].validate_value(input_parameters[name], name)
+        if instrumentation.enabled():
+            with instrumentation.stage(score, instrumentation.VALIDATION):
+                validator.validate(args[0] if len(args) > 0 else kwargs['parameters'])
+            with instrumentation.stage(score, instrumentation.CALCULATION):
+                return func(*args, **kwargs)
+        validator.validate(args[0] if len(args) > 0 else kwargs['parameters'])
         return func(*args, **kwargs)
+
+    wrapper.validator = validator
     return wrapper
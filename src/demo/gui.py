@@ -3,27 +3,7 @@ from tkinter import *
 from tkinter.messagebox import *
 from tkinter.ttk import *
 
-import acribis_scores.abc_af_bleeding as abc_af_bleeding
-import acribis_scores.abc_af_death as abc_af_death
-import acribis_scores.abc_af_stroke as abc_af_stroke
-import acribis_scores.barcelona_hf_v3 as barcelona_hf_v3
-import acribis_scores.chads_vasc as chads_vasc
-import acribis_scores.charge_af as charge_af
-import acribis_scores.has_bled as has_bled
-import acribis_scores.maggic as maggic
-import acribis_scores.smart as smart
-import acribis_scores.smart_reach as smart_reach
-
-SCORES = {'CHA2DS2-VASc': (chads_vasc.Parameters, chads_vasc.calc_chads_vasc_score),
-          'HAS-BLED': (has_bled.Parameters, has_bled.calc_has_bled_score),
-          'SMART': (smart.Parameters, smart.calc_smart_score),
-          'SMARTReach': (smart_reach.Parameters, smart_reach.calc_smart_reach_score),
-          'CHARGE-AF': (charge_af.Parameters, charge_af.calc_charge_af_score),
-          'MAGGIC': (maggic.Parameters, maggic.calc_maggic_score),
-          'BARCELONA Bio-HF V3': (barcelona_hf_v3.Parameters, barcelona_hf_v3.calc_barcelona_hf_score),
-          'ABC-AF Stroke': (abc_af_stroke.Parameters, abc_af_stroke.calc_abc_af_stroke_score),
-          'ABC-AF Bleeding': (abc_af_bleeding.Parameters, abc_af_bleeding.calc_abc_af_bleeding_score),
-          'ABC-AF Death': (abc_af_death.Parameters, abc_af_death.calc_abc_af_death_score)}
+from acribis_scores.registry import SCORES
 
 
 class Calculator(Frame):
@@ -48,7 +28,7 @@ class Calculator(Frame):
         self.__form = Frame(self)
         self.__form.grid()
         self.__form.grid(column=0, row=1, columnspan=2)
-        self.__fields = typing.get_type_hints(SCORES[self.__selected_score.get()][0])
+        self.__fields = typing.get_type_hints(SCORES[self.__selected_score.get()].parameters)
         i = 0
         for parameter, input_type in self.__fields.items():
             Label(self.__form, text=parameter).grid(column=0, row=i)
@@ -87,12 +67,12 @@ class Calculator(Frame):
             if (type(value) is BooleanVar) or value.get():
                 score_parameters[name] = self.__fields[name](value.get())
             else:
-                hint = typing.get_type_hints(SCORES[self.__selected_score.get()][0], include_extras=True)[name]
+                hint = typing.get_type_hints(SCORES[self.__selected_score.get()].parameters, include_extras=True)[name]
                 if typing.get_origin(hint) is not typing.NotRequired:
                     showerror(title='Missing Values!', message=f"{name} is required but not provided as input!")
                     return
         try:
-            score = SCORES[self.__selected_score.get()][1](score_parameters)
+            score = SCORES[self.__selected_score.get()].calc(score_parameters)
         except ValueError as e:
             showerror(title='Values Error', message=str(e))
         self.__result.set(f"Result: {score}")
@@ -1,5 +1,5 @@
 import random
-from typing import Any, get_type_hints, Mapping, get_origin, NotRequired, Annotated
+from typing import Any, TypedDict, get_type_hints, Mapping, get_origin, NotRequired, Annotated
 
 from acribis_scores import *
 from acribis_scores.value_range import ValueRange
@@ -98,8 +98,8 @@ def generate_maggic_parameters() -> maggic.Parameters:
 
 
 def generate_barcelona_hf_v3_parameters() -> barcelona_hf_v3.Parameters:
-    # noinspection PyTypedDict
-    barcelona_hf_v3.Parameters.__annotations__ = {
+    # Ranges for the random values only; the model's 'Parameters' are left as they are
+    parameter_ranges = TypedDict('Parameters', {
         'Age (years)': Annotated[int, ValueRange(32, 90)],
         'Female': bool,
         'NYHA Class': Annotated[int, ValueRange(1, 4)],
@@ -122,8 +122,8 @@ def generate_barcelona_hf_v3_parameters() -> barcelona_hf_v3.Parameters:
         'hs-cTnT in ng/L': NotRequired[Annotated[float, ValueRange(4.8245, 242.84)]],
         'ST2 (ng/mL)': NotRequired[Annotated[float, ValueRange(6.29, 171.1)]],
         'SGLT2i': bool
-    }
-    parameters = __get_random_parameters(barcelona_hf_v3.Parameters)
+    })
+    parameters = __get_random_parameters(parameter_ranges)
     if parameters['ACEi/ARB']:
         parameters['ARNI'] = False
     return parameters
@@ -0,0 +1,82 @@
+import importlib.util
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from parameter_generator import *
+from acribis_scores.arrow_io import score_table, score_parquet
+from acribis_scores.batch_processing import to_columns
+
+HAS_PYARROW = importlib.util.find_spec('pyarrow') is not None
+
+
+@unittest.skipUnless(HAS_PYARROW, 'pyarrow is not installed')
+class TestArrowIO(unittest.TestCase):
+    def setUp(self):
+        import pyarrow
+        self.pa = pyarrow
+
+    def test_table(self):
+        patients = [generate_abc_af_death_parameters() for _ in range(100)]
+        columns = to_columns(patients)
+        columns['age'] = columns.pop('Age')
+        columns['id'] = list(range(100))
+        table = self.pa.table(columns)
+        result = score_table(abc_af_death.calc_abc_af_death_score_batch, table, mapping={'Age': 'age'},
+                             chunk_size=30, output_names={'abc_af_death_score[0]': 'all_cause'},
+                             keep_columns=['id'])
+        self.assertEqual(result.column_names, ['id', 'all_cause', 'abc_af_death_score[1]'])
+        self.assertEqual(result.column('id').to_pylist(), list(range(100)))
+        expected = abc_af_death.calc_abc_af_death_score_batch(to_columns(patients))
+        np.testing.assert_allclose(result.column('all_cause').to_numpy(), expected[0])
+        np.testing.assert_allclose(result.column('abc_af_death_score[1]').to_numpy(), expected[1])
+
+    def test_parquet(self):
+        import pyarrow.parquet as pq
+        patients = [generate_barcelona_hf_v3_parameters() for _ in range(50)]
+        expected = barcelona_hf_v3.calc_barcelona_hf_score_batch(to_columns(patients))
+        with tempfile.TemporaryDirectory() as directory:
+            source = os.path.join(directory, 'patients.parquet')
+            destination = os.path.join(directory, 'results.parquet')
+            pq.write_table(self.pa.table(to_columns(patients)), source)
+            rows = score_parquet(barcelona_hf_v3.calc_barcelona_hf_score_batch, source, destination, chunk_size=16)
+            self.assertEqual(rows, 50)
+            result = pq.read_table(destination)
+        np.testing.assert_allclose(result.column('barcelona_hf_score.with_biomarkers.death[4]').to_numpy(),
+                                   expected['with_biomarkers']['death'][:, 4])
+        self.assertEqual(result.column('barcelona_hf_score.without_biomarkers.life_expectancy').to_pylist(),
+                         expected['without_biomarkers']['life_expectancy'].tolist())
+
+    def test_nulls(self):
+        patients = [generate_has_bled_parameters() for _ in range(3)]
+        columns = to_columns(patients)
+        columns['Drugs'][1] = None
+        with self.assertRaisesRegex(ValueError, 'Drugs is required'):
+            score_table(has_bled.calc_has_bled_score_batch, self.pa.table(columns))
+        columns = to_columns([generate_charge_af_parameters() for _ in range(3)])
+        columns['Weight'][2] = None
+        with self.assertRaisesRegex(ValueError, 'Weight is required'):
+            score_table(charge_af.calc_charge_af_score_batch, self.pa.table(columns))
+
+    def test_optional_nulls(self):
+        patients = [generate_barcelona_hf_v3_parameters() for _ in range(3)]
+        for patient in patients:
+            patient['ST2 (ng/mL)'] = 50.0
+        columns = to_columns(patients)
+        columns['ST2 (ng/mL)'][0] = None
+        result = score_table(barcelona_hf_v3.calc_barcelona_hf_score_batch, self.pa.table(columns))
+        del patients[0]['ST2 (ng/mL)']
+        expected = barcelona_hf_v3.calc_barcelona_hf_score_batch(to_columns(patients))
+        self.assertEqual(result.column('barcelona_hf_score.with_biomarkers.life_expectancy').to_pylist(),
+                         expected['with_biomarkers']['life_expectancy'].tolist())
+
+    def test_missing_column(self):
+        table = self.pa.table({'Age': [70]})
+        with self.assertRaises(KeyError):
+            score_table(abc_af_stroke.calc_abc_af_stroke_score_batch, table)
+
+
+if __name__ == '__main__':
+    unittest.main()
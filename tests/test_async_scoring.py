@@ -0,0 +1,77 @@
+import asyncio
+import json
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from parameter_generator import *
+from acribis_scores.async_scoring import AsyncScorer, score_async
+from acribis_scores.value_range import InvalidParametersError
+
+
+class TestAsyncScoring(unittest.IsolatedAsyncioTestCase):
+    async def test_score_async(self):
+        parameters = generate_chads_vasc_parameters()
+        self.assertEqual(await score_async('chads_vasc', parameters), chads_vasc.calc_chads_vasc_score(parameters))
+
+    async def test_micro_batching(self):
+        calls = []
+
+        class CountingExecutor(ThreadPoolExecutor):
+            def submit(self, fn, /, *args, **kwargs):
+                calls.append(len(args[2]))
+                return super().submit(fn, *args, **kwargs)
+
+        with CountingExecutor(1) as executor:
+            scorer = AsyncScorer(executor, max_batch_size=40)
+            patients = [generate_maggic_parameters() for _ in range(100)]
+            results = await asyncio.gather(*(scorer.score('MAGGIC', patient) for patient in patients))
+        self.assertEqual(results, [maggic.calc_maggic_score(patient) for patient in patients])
+        self.assertEqual(calls, [40, 40, 20])
+
+    async def test_result_shape(self):
+        scorer = AsyncScorer()
+        patients = [generate_barcelona_hf_v3_parameters() for _ in range(10)]
+        for patient in patients[::2]:
+            for biomarker in barcelona_hf_v3.BIOMARKERS:
+                patient.pop(biomarker, None)
+        expected = [barcelona_hf_v3.calc_barcelona_hf_score(dict(patient)) for patient in patients]
+        results = await asyncio.gather(*(scorer.score('BARCELONA Bio-HF V3', patient) for patient in patients))
+        self.assertEqual([json.dumps(result) for result in results], [json.dumps(result) for result in expected])
+
+    async def test_invalid_rows(self):
+        scorer = AsyncScorer()
+        patients = [generate_maggic_parameters() for _ in range(5)]
+        patients[2]['Age (years)'] = 200
+        results = await asyncio.gather(*(scorer.score('MAGGIC', patient) for patient in patients),
+                                       return_exceptions=True)
+        self.assertIsInstance(results[2], InvalidParametersError)
+        for i in (0, 1, 3, 4):
+            self.assertEqual(results[i], maggic.calc_maggic_score(patients[i]))
+
+    async def test_backpressure(self):
+        active = []
+        max_active = []
+
+        class TrackingExecutor(ThreadPoolExecutor):
+            def submit(self, fn, /, *args, **kwargs):
+                active.append(None)
+                max_active.append(len(active))
+                future = super().submit(fn, *args, **kwargs)
+                future.add_done_callback(lambda _: active.pop())
+                return future
+
+        with TrackingExecutor(4) as executor:
+            scorer = AsyncScorer(executor, max_batch_size=1, max_pending=2)
+            patients = [generate_has_bled_parameters() for _ in range(10)]
+            results = await asyncio.gather(*(scorer.score('HAS-BLED', patient) for patient in patients))
+        self.assertEqual(results, [has_bled.calc_has_bled_score(patient) for patient in patients])
+        self.assertEqual(len(max_active), 10)
+        self.assertLessEqual(max(max_active), 2)
+
+    async def test_unknown_score(self):
+        with self.assertRaises(KeyError):
+            await score_async('unknown', {})
+
+
+if __name__ == '__main__':
+    unittest.main()
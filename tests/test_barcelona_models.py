@@ -0,0 +1,159 @@
+import math
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from parameter_generator import *
+from acribis_scores.batch_processing import to_columns
+
+
+class TestCoefficientRegistry(unittest.TestCase):
+    def test_cache(self):
+        with mock.patch.object(barcelona_hf_v3, '_read_csv', wraps=barcelona_hf_v3._read_csv) as read_csv:
+            barcelona_hf_v3.warm_up()
+            registry = barcelona_hf_v3.get_coefficient_registry()
+            barcelona_hf_v3.warm_up()
+            barcelona_hf_v3.calc_barcelona_hf_score(generate_barcelona_hf_v3_parameters())
+            reads = read_csv.call_count
+            self.assertLessEqual(reads, 5)
+            barcelona_hf_v3.clear_cache()
+            self.assertEqual(barcelona_hf_v3.get_coefficient_registry.cache_info().currsize, 0)
+            reloaded = barcelona_hf_v3.reload()
+            self.assertIsNot(reloaded, registry)
+            self.assertEqual(reloaded.endpoints, registry.endpoints)
+            np.testing.assert_array_equal(reloaded.stacked.coefficients, registry.stacked.coefficients)
+            self.assertEqual(read_csv.call_count, reads + 5)
+            # The scoring path uses the reloaded registry without reading the files again
+            barcelona_hf_v3.calc_barcelona_hf_score(generate_barcelona_hf_v3_parameters())
+            barcelona_hf_v3.calc_barcelona_hf_score_batch(to_columns([generate_barcelona_hf_v3_parameters()] * 3))
+            self.assertEqual(read_csv.call_count, reads + 5)
+            self.assertIs(barcelona_hf_v3.get_coefficient_registry(), reloaded)
+
+
+class TestStackedModels(unittest.TestCase):
+    def test_shape(self):
+        stacked = barcelona_hf_v3.get_coefficient_registry().stacked
+        models, endpoints = len(barcelona_hf_v3.Model), len(barcelona_hf_v3.ENDPOINTS)
+        self.assertEqual(stacked.coefficients.shape,
+                         (models, len(stacked.features), len(barcelona_hf_v3.LINEAR_PREDICTORS)))
+        self.assertEqual(stacked.survival_estimates.shape, (models, endpoints, 5))
+        self.assertFalse(stacked.coefficients.flags.writeable)
+
+    @staticmethod
+    def endpoint_scores(endpoint_model, values: dict) -> list[float]:
+        linear_predictor = sum(values[variable] * coefficient for variable, coefficient
+                               in zip(endpoint_model.variables, endpoint_model.coefficients) if variable in values)
+        return [round((1 - survival_estimate ** math.exp(linear_predictor - endpoint_model.sum_product)) * 100, 1)
+                for survival_estimate in endpoint_model.survival_estimates]
+
+    @staticmethod
+    def life_expectancy(life_expectancy_model, values: dict) -> float:
+        linear_predictor = sum(values[variable] * coefficient for variable, coefficient
+                               in zip(life_expectancy_model.variables, life_expectancy_model.coefficients)
+                               if variable in values)
+        return math.exp(life_expectancy_model.intercept + linear_predictor) * life_expectancy_model.gamma_value
+
+    def test_matches_endpoint_models(self):
+        # The stacked matrix against the sum products of the per-endpoint coefficient tables
+        registry = barcelona_hf_v3.get_coefficient_registry()
+        for _ in range(200):
+            parameters = generate_barcelona_hf_v3_parameters()
+            model = barcelona_hf_v3.get_model(parameters)
+            result = barcelona_hf_v3.calc_barcelona_hf_score(parameters)
+            new_parameters = barcelona_hf_v3.get_new_parameters(parameters)
+            hospitalised = new_parameters | {'Hospitalisation Prev. Year':
+                                             bool(new_parameters['Hospitalisation Prev. Year'])}
+            models = {'without_biomarkers': barcelona_hf_v3.Model.MODEL_1}
+            if model != barcelona_hf_v3.Model.MODEL_1:
+                models['with_biomarkers'] = model
+            self.assertEqual(list(result), list(models))
+            for biomarkers, biomarker_model in models.items():
+                for endpoint in barcelona_hf_v3.ENDPOINTS:
+                    values = new_parameters if endpoint == 'hosp' else hospitalised
+                    self.assertEqual(result[biomarkers][endpoint],
+                                     self.endpoint_scores(registry.endpoints[endpoint][biomarker_model], values))
+                life_expectancy = barcelona_hf_v3._limit_life_expectancy(
+                    self.life_expectancy(registry.life_expectancy[biomarker_model], hospitalised),
+                    parameters['Female'], int(parameters['Age (years)']), registry.life_expectancy_limits)
+                self.assertEqual(result[biomarkers]['life_expectancy'], str(barcelona_hf_v3._round(life_expectancy)))
+
+    def test_per_endpoint_functions(self):
+        for _ in range(50):
+            parameters = generate_barcelona_hf_v3_parameters()
+            model = barcelona_hf_v3.get_model(parameters)
+            result = barcelona_hf_v3.calc_barcelona_hf_score(parameters)
+            new_parameters = barcelona_hf_v3.get_new_parameters(parameters)
+            biomarkers = 'without_biomarkers' if model == barcelona_hf_v3.Model.MODEL_1 else 'with_biomarkers'
+            for endpoint in barcelona_hf_v3.ENDPOINTS:
+                self.assertEqual(barcelona_hf_v3.get_scores(endpoint, model, new_parameters),
+                                 result[biomarkers][endpoint])
+            self.assertEqual(str(barcelona_hf_v3._round_life_expectancy(model, new_parameters)),
+                             result[biomarkers]['life_expectancy'])
+        coefficients, sum_product = barcelona_hf_v3.get_coefficients(barcelona_hf_v3.Model.MODEL_2, 'hosp')
+        self.assertEqual(sum_product, coefficients.sum_product)
+        self.assertEqual(barcelona_hf_v3.get_survival_estimate(barcelona_hf_v3.Model.MODEL_2, 3, 'hosp'),
+                         coefficients.survival_estimates[2])
+        with self.assertRaises(ValueError):
+            barcelona_hf_v3.get_survival_estimate(barcelona_hf_v3.Model.MODEL_2, 6, 'hosp')
+
+    def test_missing_feature(self):
+        # Only the biomarkers are optional; a missing required feature is not scored as 0
+        parameters = generate_barcelona_hf_v3_parameters()
+        del parameters['SGLT2i']
+        with self.assertRaises(KeyError):
+            barcelona_hf_v3.calc_barcelona_hf_score(dict(parameters))
+        with self.assertRaises(KeyError):
+            barcelona_hf_v3.get_scores('death', barcelona_hf_v3.Model.MODEL_1,
+                                       barcelona_hf_v3.get_new_parameters(parameters))
+        with self.assertRaises(KeyError):
+            barcelona_hf_v3.calc_barcelona_hf_score_batch(to_columns([parameters]))
+        columns = {name: np.array(column, dtype=float) for name, column in to_columns([parameters]).items()}
+        all_scores = {biomarkers: {} for biomarkers in ('without_biomarkers', 'with_biomarkers')}
+        with self.assertRaises(KeyError):
+            barcelona_hf_v3._score_block(columns, barcelona_hf_v3.get_coefficient_registry(), all_scores,
+                                         np.arange(1))
+
+
+class TestBatch(unittest.TestCase):
+    def assert_matches_scalar(self, patients: list[dict]):
+        results = barcelona_hf_v3.calc_barcelona_hf_score_batch(to_columns(patients))
+        for i, parameters in enumerate(patients):
+            expected = barcelona_hf_v3.calc_barcelona_hf_score(parameters)
+            for biomarkers, endpoints in results.items():
+                if biomarkers not in expected:
+                    self.assertIsNone(endpoints['life_expectancy'][i])
+                    self.assertTrue(all(np.isnan(endpoints[endpoint][i]).all()
+                                        for endpoint in barcelona_hf_v3.ENDPOINTS))
+                    continue
+                self.assertEqual(endpoints['life_expectancy'][i], expected[biomarkers]['life_expectancy'])
+                for endpoint in barcelona_hf_v3.ENDPOINTS:
+                    self.assertEqual(endpoints[endpoint][i].tolist(), expected[biomarkers][endpoint])
+
+    def test_per_row_models(self):
+        patients = [generate_barcelona_hf_v3_parameters() for _ in range(500)]
+        for mask, parameters in enumerate(patients):
+            for i, biomarker in enumerate(barcelona_hf_v3.BIOMARKERS):
+                if not mask >> i & 1:
+                    parameters.pop(biomarker, None)
+        self.assertEqual(len({barcelona_hf_v3.get_model(parameters) for parameters in patients}),
+                         len(barcelona_hf_v3.Model))
+        self.assert_matches_scalar(patients)
+
+    def test_limits(self):
+        patients = []
+        for age, female, biomarker in ((90, True, 0), (90, False, 100000), (64, False, 5), (50, True, 0)):
+            parameters = generate_barcelona_hf_v3_parameters()
+            parameters.update({'Age (years)': age, 'Female': female, 'NT-proBNP in pg/mL': biomarker})
+            patients.append(parameters)
+        self.assert_matches_scalar(patients)
+
+    def test_round_columns(self):
+        values = np.array([0.05, 0.15, 0.25, 2.675, 1.45, 12.35, 99.95, 0.04999999])
+        self.assertEqual(barcelona_hf_v3._round_columns(values).tolist(),
+                         [round(value, 1) for value in values.tolist()])
+        self.assertTrue(math.isnan(barcelona_hf_v3._round_columns(np.array([np.nan]))[0]))
+
+
+if __name__ == '__main__':
+    unittest.main()
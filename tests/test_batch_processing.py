@@ -0,0 +1,196 @@
+import random
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from parameter_generator import *
+from acribis_scores.batch_processing import parallel_batch_process, stream_process, to_columns
+from acribis_scores.value_range import ValueRange, ParameterError
+
+
+class TestBatchProcess(unittest.TestCase):
+    def test_batch(self):
+        parameters = {f"patient {i}": generate_charge_af_parameters() for i in range(20)}
+        results = charge_af.calc_charge_af_score(parameters)
+        self.assertEqual(list(results), list(parameters))
+        for key, patient in parameters.items():
+            self.assertEqual(results[key], charge_af.calc_charge_af_score(patient))
+
+    def test_collect_errors(self):
+        parameters = {f"patient {i}": generate_abc_af_stroke_parameters() for i in range(20)}
+        parameters['patient 3']['Age'] = 100
+        parameters['patient 3']['Troponin T in ng/L'] = 1.0
+        parameters['patient 7']['DOAC'] = parameters['patient 7']['Aspirin'] = True
+        with self.assertRaises(ValueError):
+            abc_af_stroke.calc_abc_af_stroke_score(parameters)
+        results, errors = abc_af_stroke.calc_abc_af_stroke_score(parameters, errors='collect')
+        self.assertEqual(len(results), 18)
+        self.assertNotIn('patient 3', results)
+        self.assertEqual(errors['patient 3'], [ParameterError('Age', 100, ValueRange(22, 95), 'range'),
+                                               ParameterError('Troponin T in ng/L', 1.0, ValueRange(3.0, 200.0),
+                                                              'range')])
+        self.assertEqual(errors['patient 7'], [ParameterError('DOAC/Aspirin', (True, True), None,
+                                                              "'DOAC' and 'Aspirin' cannot both be true!")])
+
+    def test_collect_missing_parameters(self):
+        parameters = {f"patient {i}": generate_smart_reach_parameters() for i in range(5)}
+        del parameters['patient 1']['Age in years']
+        parameters['patient 2']['Age in years'] = '60'
+        results, errors = smart_reach.calc_smart_reach_score(parameters, errors='collect')
+        self.assertEqual(list(results), ['patient 0', 'patient 3', 'patient 4'])
+        self.assertEqual(errors['patient 1'], [ParameterError('Age in years', None, None,
+                                                              'Age in years is required but not provided!')])
+        self.assertEqual(list(errors), ['patient 1', 'patient 2'])
+
+
+class TestParallelBatchProcess(unittest.TestCase):
+    def test_process_pool(self):
+        parameters = {f"patient {i}": generate_smart_parameters(random.uniform(0.5, 1.5)) for i in range(100)}
+        for patient in parameters.values():
+            patient['eGFR in mL/min/1.73m²'] = min(max(patient['eGFR in mL/min/1.73m²'], 21.60551), 178.39297)
+        expected = smart.calc_smart_score(parameters)
+        results = parallel_batch_process(smart.calc_smart_score, parameters, max_workers=2, chunk_size=7)
+        self.assertEqual(list(results.items()), list(expected.items()))
+
+    def test_executor(self):
+        parameters = {f"patient {i}": generate_abc_af_bleeding_parameters() for i in range(50)}
+        parameters['patient 10']['Age'] = 10
+        with ThreadPoolExecutor(4) as executor:
+            with self.assertRaisesRegex(ValueError, r'Age \(10\) is not in range'):
+                parallel_batch_process(abc_af_bleeding.calc_abc_af_bleeding_score, parameters, executor, chunk_size=5)
+            results, errors = parallel_batch_process(abc_af_bleeding.calc_abc_af_bleeding_score, parameters, executor,
+                                                     chunk_size=5, errors='collect')
+        self.assertEqual(list(errors), ['patient 10'])
+        self.assertEqual(list(results), [key for key in parameters if key != 'patient 10'])
+
+
+class TestStreamProcess(unittest.TestCase):
+    def test_scalar(self):
+        parameters = [(f"patient {i}", generate_has_bled_parameters()) for i in range(10)]
+        stream = stream_process(has_bled.calc_has_bled_score, iter(parameters))
+        self.assertEqual(list(stream), [(key, has_bled.calc_has_bled_score(patient)) for key, patient in parameters])
+
+    def test_chunks(self):
+        parameters = [(f"patient {i}", generate_abc_af_death_parameters()) for i in range(25)]
+        stream = stream_process(abc_af_death.calc_abc_af_death_score, (row for row in parameters),
+                                abc_af_death.calc_abc_af_death_score_batch, chunk_size=10)
+        for (key, result), (expected_key, patient) in zip(stream, parameters, strict=True):
+            self.assertEqual(key, expected_key)
+            np.testing.assert_allclose(result, abc_af_death.calc_abc_af_death_score(patient), rtol=1e-12)
+
+    def test_collect_errors(self):
+        parameters = [(f"patient {i}", generate_maggic_parameters()) for i in range(25)]
+        parameters[12][1]['NYHA Class'] = 5
+        stream = stream_process(maggic.calc_maggic_score, parameters, maggic.calc_maggic_score_batch, chunk_size=10,
+                                errors='collect')
+        for (key, result, errors), (_, patient) in zip(stream, parameters, strict=True):
+            if key == 'patient 12':
+                self.assertIsNone(result)
+                self.assertEqual(errors, [ParameterError('NYHA Class', 5, ValueRange(1, 4), 'range')])
+            else:
+                self.assertEqual(result, maggic.calc_maggic_score(patient))
+                self.assertEqual(errors, [])
+
+    def test_missing_parameters(self):
+        parameters = [(f"patient {i}", generate_chads_vasc_parameters()) for i in range(10)]
+        del parameters[3][1]['Sex category']
+        with self.assertRaises(KeyError):
+            list(stream_process(chads_vasc.calc_chads_vasc_score, parameters, chads_vasc.calc_chads_vasc_score_batch))
+        stream = stream_process(chads_vasc.calc_chads_vasc_score, parameters, chads_vasc.calc_chads_vasc_score_batch,
+                                errors='collect')
+        for (key, result, errors), (_, patient) in zip(stream, parameters, strict=True):
+            if key == 'patient 3':
+                self.assertIsNone(result)
+                self.assertEqual(errors, [ParameterError('Sex category', None, None,
+                                                         'Sex category is required but not provided!')])
+            else:
+                self.assertEqual((result, errors), (chads_vasc.calc_chads_vasc_score(patient), []))
+
+    def test_collect_wrong_types(self):
+        parameters = [(f"patient {i}", generate_smart_reach_parameters()) for i in range(5)]
+        parameters[2][1]['Age in years'] = '60'
+        stream = stream_process(smart_reach.calc_smart_reach_score, parameters,
+                                smart_reach.calc_smart_reach_score_batch, errors='collect')
+        self.assertEqual([key for key, result, errors in stream if errors], ['patient 2'])
+
+
+class TestColumnarBatch(unittest.TestCase):
+    def test_points_scores(self):
+        for generate, scalar, batch in [
+            (generate_chads_vasc_parameters, chads_vasc.calc_chads_vasc_score, chads_vasc.calc_chads_vasc_score_batch),
+            (generate_has_bled_parameters, has_bled.calc_has_bled_score, has_bled.calc_has_bled_score_batch),
+            (generate_maggic_parameters, maggic.calc_maggic_score, maggic.calc_maggic_score_batch)
+        ]:
+            parameters = [generate() for _ in range(200)]
+            expected = [scalar(patient) for patient in parameters]
+            self.assertEqual(batch(to_columns(parameters)).tolist(), expected)
+
+    def test_risk_scores(self):
+        for generate, scalar, batch in [
+            (generate_abc_af_stroke_parameters, abc_af_stroke.calc_abc_af_stroke_score,
+             abc_af_stroke.calc_abc_af_stroke_score_batch),
+            (generate_abc_af_bleeding_parameters, abc_af_bleeding.calc_abc_af_bleeding_score,
+             abc_af_bleeding.calc_abc_af_bleeding_score_batch),
+            (generate_abc_af_death_parameters, abc_af_death.calc_abc_af_death_score,
+             abc_af_death.calc_abc_af_death_score_batch),
+            (generate_charge_af_parameters, charge_af.calc_charge_af_score, charge_af.calc_charge_af_score_batch),
+            (generate_smart_reach_parameters, smart_reach.calc_smart_reach_score,
+             smart_reach.calc_smart_reach_score_batch)
+        ]:
+            parameters = [generate() for _ in range(200)]
+            expected = np.array([scalar(patient) for patient in parameters])
+            results = batch(pd.DataFrame(parameters))
+            if isinstance(results, tuple):
+                results = np.stack(results, axis=1)
+            np.testing.assert_allclose(results, expected, rtol=1e-12)
+
+    def test_smart(self):
+        parameters = []
+        while len(parameters) < 200:
+            patient = generate_smart_parameters(random.uniform(0.5, 3.0))
+            if 21.60551 <= patient['eGFR in mL/min/1.73m²'] <= 178.39297:
+                parameters.append(patient)
+        expected = [smart.calc_smart_score(patient) for patient in parameters]
+        np.testing.assert_allclose(smart.calc_smart_score_batch(to_columns(parameters)), expected, rtol=1e-12)
+
+    def test_barcelona_hf_v3(self):
+        parameters = [generate_barcelona_hf_v3_parameters() for _ in range(50)]
+        results = barcelona_hf_v3.calc_barcelona_hf_score_batch(to_columns(parameters))
+        for i, patient in enumerate(parameters):
+            for biomarkers, endpoints in barcelona_hf_v3.calc_barcelona_hf_score(patient).items():
+                for endpoint, scores in endpoints.items():
+                    if endpoint == 'life_expectancy':
+                        self.assertEqual(results[biomarkers][endpoint][i], scores)
+                    else:
+                        self.assertEqual(results[biomarkers][endpoint][i].tolist(), scores)
+
+    def test_invalid_values(self):
+        parameters = [generate_charge_af_parameters() for _ in range(10)]
+        parameters[5]['Age'] = 30
+        with self.assertRaisesRegex(ValueError, r'Age \(30\.0\) is not in range \[46, 94\]'):
+            charge_af.calc_charge_af_score_batch(to_columns(parameters))
+        parameters = [generate_abc_af_stroke_parameters() for _ in range(10)]
+        parameters[3]['DOAC'] = parameters[3]['Aspirin'] = True
+        with self.assertRaises(ValueError):
+            abc_af_stroke.calc_abc_af_stroke_score_batch(to_columns(parameters))
+
+    def test_missing_bool_values(self):
+        columns = to_columns([generate_has_bled_parameters() for _ in range(3)])
+        columns['Drugs'][1] = np.nan
+        with self.assertRaisesRegex(ValueError, 'Drugs is required but not provided!'):
+            has_bled.calc_has_bled_score_batch(columns)
+        columns['Drugs'][1] = 'false'
+        with self.assertRaises(TypeError):
+            has_bled.calc_has_bled_score_batch(columns)
+
+    def test_missing_column(self):
+        columns = to_columns([generate_has_bled_parameters() for _ in range(10)])
+        del columns['Drugs']
+        with self.assertRaises(KeyError):
+            has_bled.calc_has_bled_score_batch(columns)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import unittest
+
+from parameter_generator import *
+from acribis_scores.caching import memoize, canonicalize
+
+
+class TestMemoize(unittest.TestCase):
+    def test_canonicalize(self):
+        self.assertEqual(canonicalize({'b': 1, 'a': True}), canonicalize({'a': True, 'b': 1.0}))
+        self.assertNotEqual(canonicalize({'a': True}), canonicalize({'a': 1}))
+
+    def test_hits_and_misses(self):
+        score = memoize(smart_reach.calc_smart_reach_score)
+        parameters = generate_smart_reach_parameters()
+        result = score(parameters)
+        self.assertEqual(score(dict(reversed(parameters.items()))), result)
+        self.assertEqual(result, smart_reach.calc_smart_reach_score(parameters))
+        info = score.cache_info()
+        self.assertEqual((info.hits, info.misses, info.currsize), (1, 1, 1))
+        score.cache_clear()
+        self.assertEqual(score.cache_info().currsize, 0)
+
+    def test_eviction(self):
+        score = memoize(maxsize=2)(has_bled.calc_has_bled_score)
+        for i in range(3):
+            score({name: i == j for j, name in enumerate(has_bled.Parameters.__annotations__)})
+        self.assertEqual(score.cache_info().evictions, 1)
+        self.assertEqual(score.cache_info().currsize, 2)
+
+    def test_value_types(self):
+        score = memoize(has_bled.calc_has_bled_score)
+        parameters = generate_has_bled_parameters()
+        score(parameters)
+        score({name: int(value) for name, value in parameters.items()})
+        self.assertEqual(score.cache_info().misses, 2)
+
+    def test_ttl(self):
+        score = memoize(charge_af.calc_charge_af_score, ttl=0.0)
+        parameters = generate_charge_af_parameters()
+        score(parameters)
+        score(parameters)
+        self.assertEqual(score.cache_info().expirations, 1)
+
+    def test_mutable_results(self):
+        score = memoize(barcelona_hf_v3.calc_barcelona_hf_score)
+        parameters = generate_barcelona_hf_v3_parameters()
+        score(dict(parameters))['without_biomarkers'].clear()
+        self.assertIn('death', score(dict(parameters))['without_biomarkers'])
+
+    def test_batch(self):
+        score = memoize(abc_af_bleeding.calc_abc_af_bleeding_score)
+        parameters = {f"patient {i}": generate_abc_af_bleeding_parameters() for i in range(10)}
+        parameters['patient 10'] = parameters['patient 0']
+        parameters['patient 4']['Age'] = 100
+        results, errors = score(parameters, errors='collect')
+        self.assertEqual(list(errors), ['patient 4'])
+        self.assertEqual(results['patient 10'], results['patient 0'])
+        self.assertEqual(score.cache_info().hits, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import contextlib
+import csv
+import io
+import json
+import os
+import tempfile
+import unittest
+
+from parameter_generator import *
+from acribis_scores import cli
+from acribis_scores.batch_processing import to_columns
+from acribis_scores.registry import get_score
+
+
+def to_csv(rows: list[dict]) -> str:
+    output = io.StringIO()
+    writer = csv.DictWriter(output, list(to_columns(rows)))
+    writer.writeheader()
+    writer.writerows(rows)
+    return output.getvalue()
+
+
+class TestCli(unittest.TestCase):
+    def test_run(self):
+        patients = [generate_abc_af_death_parameters() for _ in range(25)]
+        patients[3]['Age'] = 120
+        rows = [{'id': f"p{i}"} | patient for i, patient in enumerate(patients)]
+        rows[5]['Heart Failure'] = 'maybe'
+        output, errors = io.StringIO(), io.StringIO()
+        results = cli.run(get_score('abc_af_death'), io.StringIO(to_csv(rows)), output, errors, id_column='id',
+                          chunk_size=10)
+        self.assertEqual((results.rows, results.scored, results.failed), (25, 23, 2))
+        written = list(csv.DictReader(io.StringIO(output.getvalue())))
+        self.assertEqual([row['id'] for row in written], [row['id'] for row in rows])
+        self.assertEqual(written[3]['ABC-AF Death[0]'], '')
+        expected = abc_af_death.calc_abc_af_death_score(patients[0])
+        self.assertAlmostEqual(float(written[0]['ABC-AF Death[0]']), expected[0], places=10)
+        self.assertAlmostEqual(float(written[0]['ABC-AF Death[1]']), expected[1], places=10)
+        reported = list(csv.DictReader(io.StringIO(errors.getvalue())))
+        self.assertEqual([(row['id'], row['field']) for row in reported], [('p3', 'Age'), ('p5', 'Heart Failure')])
+
+    def test_optional_results(self):
+        patients = [generate_barcelona_hf_v3_parameters() for _ in range(6)]
+        for i, patient in enumerate(patients):
+            if i < 3:
+                for biomarker in barcelona_hf_v3.BIOMARKERS:
+                    patient.pop(biomarker, None)
+            else:
+                patient['ST2 (ng/mL)'] = 40.0
+        output = io.StringIO()
+        cli.run(get_score('barcelona_hf_v3'), io.StringIO(to_csv(patients)), output, chunk_size=1)
+        written = list(csv.DictReader(io.StringIO(output.getvalue())))
+        for row, patient in zip(written, patients, strict=True):
+            expected = barcelona_hf_v3.calc_barcelona_hf_score(patient)
+            life_expectancy = expected.get('with_biomarkers', {}).get('life_expectancy', '')
+            self.assertEqual(row['BARCELONA Bio-HF V3.with_biomarkers.life_expectancy'], life_expectancy)
+            self.assertEqual(row['BARCELONA Bio-HF V3.without_biomarkers.death[4]'],
+                             str(expected['without_biomarkers']['death'][4]))
+
+    def test_main(self):
+        patients = [generate_chads_vasc_parameters() for _ in range(30)]
+        rows = [{name.lower(): value for name, value in patient.items()} for patient in patients]
+        with tempfile.TemporaryDirectory() as directory:
+            paths = {name: os.path.join(directory, name) for name in ('in.csv', 'out.csv', 'mapping.json')}
+            with open(paths['in.csv'], 'w', newline='', encoding='utf-8') as file:
+                file.write(to_csv(rows))
+            with open(paths['mapping.json'], 'w', encoding='utf-8') as file:
+                json.dump({name: name.lower() for name in chads_vasc.Parameters.__annotations__}, file)
+            with contextlib.redirect_stderr(io.StringIO()) as summary:
+                status = cli.main(['CHA2DS2-VASc', '--in', paths['in.csv'], '--out', paths['out.csv'], '--mapping',
+                                   paths['mapping.json'], '--jobs', '2', '--chunk-size', '7'])
+            with open(paths['out.csv'], newline='', encoding='utf-8') as file:
+                written = list(csv.DictReader(file))
+        self.assertEqual(status, 0)
+        self.assertIn('30 rows, 30 scored, 0 failed', summary.getvalue())
+        self.assertEqual([int(row['CHA2DS2-VASc']) for row in written],
+                         [chads_vasc.calc_chads_vasc_score(patient) for patient in patients])
+        self.assertEqual([row['row'] for row in written], [str(i) for i in range(1, 31)])
+
+    def test_unknown_score(self):
+        with self.assertRaises(SystemExit), contextlib.redirect_stderr(io.StringIO()):
+            cli.main(['unknown'])
+
+
+if __name__ == '__main__':
+    unittest.main()
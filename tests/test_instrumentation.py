@@ -0,0 +1,81 @@
+import unittest
+
+from parameter_generator import *
+from acribis_scores import instrumentation
+from acribis_scores.batch_processing import to_columns
+
+
+class TestInstrumentation(unittest.TestCase):
+    def test_disabled(self):
+        with instrumentation.recording() as metrics:
+            self.assertTrue(instrumentation.enabled())
+        self.assertFalse(instrumentation.enabled())
+        maggic.calc_maggic_score(generate_maggic_parameters())
+        self.assertEqual(metrics.as_dict(), {})
+
+    def test_scalar(self):
+        with instrumentation.recording() as metrics:
+            for _ in range(3):
+                maggic.calc_maggic_score(generate_maggic_parameters())
+        stages = metrics.as_dict()['maggic']
+        self.assertEqual(set(stages), {instrumentation.VALIDATION, instrumentation.CALCULATION})
+        self.assertEqual(stages[instrumentation.CALCULATION]['calls'], 3)
+        self.assertEqual(stages[instrumentation.CALCULATION]['rows'], 3)
+        self.assertGreater(stages[instrumentation.CALCULATION]['seconds'], 0.0)
+
+    def test_points_scores(self):
+        with instrumentation.recording() as metrics:
+            chads_vasc.calc_chads_vasc_score(generate_chads_vasc_parameters())
+            has_bled.calc_has_bled_score(generate_has_bled_parameters())
+        for score in ('chads_vasc', 'has_bled'):
+            # Nothing to validate, so only the calculation is timed
+            self.assertEqual(set(metrics.as_dict()[score]), {instrumentation.CALCULATION})
+            self.assertEqual(metrics.as_dict()[score][instrumentation.CALCULATION]['calls'], 1)
+
+    def test_batch_stages(self):
+        columns = to_columns(generate_smart_reach_parameters() for _ in range(50))
+        with instrumentation.recording() as metrics:
+            smart_reach.calc_smart_reach_score_batch(columns)
+        stages = metrics.as_dict()['smart_reach']
+        self.assertEqual(set(stages), {instrumentation.VALIDATION, instrumentation.FEATURES,
+                                       instrumentation.LIFE_TABLE, instrumentation.CALCULATION})
+        for values in stages.values():
+            self.assertEqual((values['calls'], values['rows']), (1, 50))
+
+    def test_invalid_batch(self):
+        columns = to_columns([generate_maggic_parameters() | {'Age (years)': 200}])
+        with instrumentation.recording() as metrics:
+            with self.assertRaises(ValueError):
+                maggic.calc_maggic_score_batch(columns)
+        self.assertEqual(list(metrics.as_dict()['maggic']), [instrumentation.VALIDATION])
+
+    def test_hooks(self):
+        calls = []
+
+        def hook(score, stage, seconds, rows):
+            calls.append((score, stage, rows))
+
+        instrumentation.add_hook(hook)
+        try:
+            has_bled.calc_has_bled_score_batch(to_columns([generate_has_bled_parameters()] * 4))
+        finally:
+            instrumentation.remove_hook(hook)
+        self.assertEqual(calls, [('has_bled', instrumentation.VALIDATION, 4),
+                                 ('has_bled', instrumentation.CALCULATION, 4)])
+
+    def test_prometheus(self):
+        metrics = instrumentation.Metrics()
+        metrics('maggic', instrumentation.VALIDATION, 0.5, 10)
+        metrics('maggic', instrumentation.VALIDATION, 0.25, 5)
+        text = metrics.to_prometheus()
+        self.assertIn('# TYPE acribis_scores_stage_calls_total counter', text)
+        self.assertIn('acribis_scores_stage_calls_total{score="maggic",stage="validation"} 2', text)
+        self.assertIn('acribis_scores_stage_rows_total{score="maggic",stage="validation"} 15', text)
+        self.assertIn('acribis_scores_stage_seconds_total{score="maggic",stage="validation"} 0.75', text)
+        self.assertIn('acribis_scores_stage_max_seconds{score="maggic",stage="validation"} 0.5', text)
+        metrics.reset()
+        self.assertEqual(metrics.as_dict(), {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,35 @@
+import math
+import unittest
+
+import numpy as np
+
+from parameter_generator import *
+from acribis_scores.linear_predictor import LinearPredictor
+
+
+class TestLinearPredictor(unittest.TestCase):
+    def test_from_weights(self):
+        predictor = LinearPredictor.from_weights(smart.WEIGHTS)
+        self.assertEqual(predictor.features, tuple(smart.WEIGHTS))
+        self.assertEqual(predictor.coefficients, tuple(smart.WEIGHTS.values()))
+
+    def test_scalar_matches_weights(self):
+        for _ in range(100):
+            parameters = generate_abc_af_stroke_parameters()
+            derived = parameters | {'log(Troponin T in ng/L)': math.log(parameters['Troponin T in ng/L']),
+                                    'log(NT-proBNP in ng/L)': math.log(parameters['NT-proBNP in ng/L'])}
+            expected = sum([derived[name] * weight for name, weight in abc_af_stroke.WEIGHTS.items()]) - 3.286
+            values = [derived[name] for name in abc_af_stroke.LINEAR_PREDICTOR.features]
+            self.assertEqual(abc_af_stroke.LINEAR_PREDICTOR(values), expected)
+
+    def test_columns(self):
+        predictor = LinearPredictor(('a', 'b'), (0.5, -2.0), 1.0)
+        features = predictor.buffer(3)
+        features[0] = [1.0, 2.0, 3.0]
+        features[1] = [0.0, 1.0, 0.5]
+        np.testing.assert_allclose(predictor.columns(features), [1.5, 0.0, 1.5])
+        self.assertEqual(predictor((3.0, 0.5)), 1.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+import unittest
+
+from parameter_generator import *
+from acribis_scores.batch_processing import to_columns
+
+
+class TestMAGGICMortality(unittest.TestCase):
+    def test_table(self):
+        self.assertEqual(len(maggic.ONE_YEAR_MORTALITY), len(maggic.MORTALITY_SCORES))
+        self.assertEqual(len(maggic.THREE_YEAR_MORTALITY), len(maggic.MORTALITY_SCORES))
+        for one_year, three_year in zip(maggic.ONE_YEAR_MORTALITY, maggic.THREE_YEAR_MORTALITY):
+            self.assertLess(one_year, three_year)
+        self.assertEqual(maggic.get_mortality(0), (0.015, 0.039))
+        self.assertEqual(maggic.get_mortality(50), (0.842, 0.904))
+        self.assertEqual(maggic.get_mortality(55), (0.842, 0.904))
+
+    def test_scalar(self):
+        for _ in range(100):
+            parameters = generate_maggic_parameters()
+            result = maggic.calc_maggic_mortality(parameters)
+            self.assertEqual(result['score'], maggic.calc_maggic_score(parameters))
+            self.assertEqual((result['one_year_mortality'], result['three_year_mortality']),
+                             maggic.get_mortality(result['score']))
+
+    def test_batch(self):
+        patients = [generate_maggic_parameters() for _ in range(200)]
+        # Above the last row of the mortality table
+        patients[0] = {'Ejection fraction (%)': 10, 'Age (years)': 90, 'Systolic blood pressure (mmHg)': 90,
+                       'BMI (kg/m²)': 12, 'Creatinine (µmol/l)': 300, 'NYHA Class': 4, 'Male': True,
+                       'Current smoker': True, 'Diabetic': True, 'Diagnosis of COPD': True,
+                       'First diagnosis of heart failure in the past 18 months': False, 'Not on beta blocker': True,
+                       'Not on ACEI/ARB': True}
+        results = maggic.calc_maggic_mortality_batch(to_columns(patients))
+        self.assertEqual((results['score'][0], results['one_year_mortality'][0], results['three_year_mortality'][0]),
+                         (57, 0.842, 0.904))
+        for i, patient in enumerate(patients):
+            expected = maggic.calc_maggic_mortality(patient)
+            for key, value in expected.items():
+                self.assertEqual(results[key][i], value)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import unittest
+
+import numpy as np
+
+from parameter_generator import *
+from acribis_scores.batch_processing import to_columns
+from acribis_scores.value_range import RangeValidator, InvalidParametersError
+
+
+def generate_panel_parameters() -> dict:
+    parameters = (generate_chads_vasc_parameters() | generate_has_bled_parameters()
+                  | generate_abc_af_stroke_parameters() | generate_abc_af_bleeding_parameters())
+    death = generate_abc_af_death_parameters()
+    parameters['Heart Failure'] = death['Heart Failure']
+    return parameters
+
+
+def calc_scores(parameters: dict) -> dict:
+    def subset(module):
+        return {name: parameters[name] for name in module.Parameters.__annotations__}
+
+    return {panel.CHADS_VASC: chads_vasc.calc_chads_vasc_score(subset(chads_vasc)),
+            panel.HAS_BLED: has_bled.calc_has_bled_score(subset(has_bled)),
+            panel.ABC_AF_STROKE: abc_af_stroke.calc_abc_af_stroke_score(subset(abc_af_stroke)),
+            panel.ABC_AF_BLEEDING: abc_af_bleeding.calc_abc_af_bleeding_score(subset(abc_af_bleeding)),
+            panel.ABC_AF_DEATH: abc_af_death.calc_abc_af_death_score(subset(abc_af_death))}
+
+
+class TestPanel(unittest.TestCase):
+    def test_ranges(self):
+        ranges = {name: (minimum, maximum) for name, minimum, maximum in panel.VALIDATOR.fields}
+        for module in (abc_af_stroke, abc_af_bleeding, abc_af_death):
+            for name, minimum, maximum in RangeValidator.from_parameters(module.Parameters).fields:
+                self.assertEqual(ranges[name], (minimum, maximum))
+
+    def test_panel(self):
+        for _ in range(100):
+            parameters = generate_panel_parameters()
+            self.assertEqual(panel.calc_panel(parameters), calc_scores(parameters))
+
+    def test_subset(self):
+        parameters = generate_abc_af_bleeding_parameters()
+        results = panel.calc_panel(parameters, scores=[panel.ABC_AF_BLEEDING])
+        self.assertEqual(results, {panel.ABC_AF_BLEEDING: abc_af_bleeding.calc_abc_af_bleeding_score(parameters)})
+        with self.assertRaises(ValueError):
+            panel.calc_panel(parameters, scores=['Unknown'])
+
+    def test_invalid(self):
+        parameters = generate_panel_parameters()
+        parameters['Troponin T in ng/L'] = 500.0
+        with self.assertRaises(InvalidParametersError):
+            panel.calc_panel(parameters)
+        patients = {'valid': generate_panel_parameters(), 'invalid': parameters}
+        results, errors = panel.calc_panel(patients, errors='collect')
+        self.assertEqual(list(results), ['valid'])
+        self.assertEqual(errors['invalid'][0].field, 'Troponin T in ng/L')
+
+    def test_batch(self):
+        patients = [generate_panel_parameters() for _ in range(100)]
+        results = panel.calc_panel_batch(to_columns(patients))
+        for i, patient in enumerate(patients):
+            expected = calc_scores(patient)
+            for score in panel.SCORES[:2]:
+                self.assertEqual(results[score][i], expected[score])
+            for score in panel.SCORES[2:4]:
+                self.assertAlmostEqual(results[score][i], expected[score], places=10)
+            np.testing.assert_allclose([results[panel.ABC_AF_DEATH][0][i], results[panel.ABC_AF_DEATH][1][i]],
+                                       expected[panel.ABC_AF_DEATH], rtol=1e-12)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import itertools
+import unittest
+
+import numpy as np
+
+from parameter_generator import *
+from acribis_scores.points import PointsTable, PointsMatrix, BooleanPoints, below
+
+
+class TestPointsTable(unittest.TestCase):
+    def test_bounds(self):
+        table = PointsTable((below(20), 24), (7, 6, 0))
+        self.assertEqual([table(value) for value in (19, 19.5, 20, 24, 24.5, 25)], [7, 7, 6, 6, 0, 0])
+        np.testing.assert_array_equal(table.columns(np.array([19, 19.5, 20, 24, 24.5, 25])), [7, 7, 6, 6, 0, 0])
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            PointsTable((1, 2), (0, 1))
+        with self.assertRaises(ValueError):
+            PointsMatrix((1,), (1, 2), ((0, 1, 2),))
+
+    def test_matrix(self):
+        self.assertEqual(maggic.AGE_POINTS(29, 80), 10)
+        self.assertEqual(maggic.AGE_POINTS(30, 80), 13)
+        self.assertEqual(maggic.AGE_POINTS(40, 54), 0)
+        np.testing.assert_array_equal(maggic.AGE_POINTS.columns(np.array([29, 30, 40]), np.array([80, 80, 54])),
+                                      [10, 13, 0])
+
+
+class TestBooleanPoints(unittest.TestCase):
+    def test_table(self):
+        points = BooleanPoints(('a', 'b', 'c'), (1, 2, 0), (0, 0, 4))
+        for values in itertools.product([False, True], repeat=3):
+            parameters = dict(zip('abc', values))
+            self.assertEqual(points(parameters), values[0] + 2 * values[1] + 4 * (not values[2]))
+        self.assertEqual(points.bit('c'), 4)
+
+    def test_columns(self):
+        for _ in range(100):
+            parameters = generate_has_bled_parameters()
+            columns = {name: np.array([value]) for name, value in parameters.items()}
+            self.assertEqual(has_bled.BOOLEAN_POINTS.columns(columns)[0], has_bled.calc_has_bled_score(parameters))
+
+    def test_single_field(self):
+        points = BooleanPoints(('a',), (3,))
+        self.assertEqual(points({'a': True}), 3)
+        self.assertEqual(points({'a': False}), 0)
+
+
+class TestBooleanScores(unittest.TestCase):
+    # Only the fields of 'Parameters' are scored: further fields are ignored and missing fields raise KeyError
+    def test_extra_fields(self):
+        for score, generate in ((chads_vasc.calc_chads_vasc_score, generate_chads_vasc_parameters),
+                                (has_bled.calc_has_bled_score, generate_has_bled_parameters)):
+            parameters = generate()
+            self.assertEqual(score(parameters | {'Patient ID': 'A-17', 'Smoker': True}), score(parameters))
+
+    def test_missing_fields(self):
+        for score, generate, name in ((chads_vasc.calc_chads_vasc_score, generate_chads_vasc_parameters,
+                                       'Hypertension'),
+                                      (has_bled.calc_has_bled_score, generate_has_bled_parameters, 'Drugs')):
+            parameters = generate()
+            del parameters[name]
+            with self.assertRaises(KeyError):
+                score(parameters)
+
+
+if __name__ == '__main__':
+    unittest.main()
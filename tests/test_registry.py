@@ -0,0 +1,47 @@
+import pickle
+import subprocess
+import sys
+import unittest
+
+from parameter_generator import *
+from acribis_scores.registry import SCORES, get_score
+
+
+class TestRegistry(unittest.TestCase):
+    def test_lazy_import(self):
+        code = ('import sys; from acribis_scores.registry import get_score; score = get_score("chads_vasc"); '
+                'score.calc({name: False for name in score.parameters.__annotations__}); '
+                'print("pandas" in sys.modules, "acribis_scores.barcelona_hf_v3" in sys.modules, '
+                '"numpy" in sys.modules)')
+        output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True).stdout
+        self.assertEqual(output.split(), ['False', 'False', 'False'])
+
+    def test_numpy_import(self):
+        # numpy is only imported by the batch functions (and the SMART-REACH and Barcelona Bio-HF scores)
+        modules = [score.module for score in SCORES.values()] + ['acribis_scores.panel']
+        code = (f'import importlib, sys; [importlib.import_module(module) for module in {modules!r}]; '
+                'print("numpy" in sys.modules)')
+        output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True).stdout
+        self.assertEqual(output.split(), ['False'])
+
+    def test_scores(self):
+        self.assertEqual(SCORES['CHA2DS2-VASc'].parameters, chads_vasc.Parameters)
+        self.assertIs(SCORES['MAGGIC'].calc, maggic.calc_maggic_score)
+        self.assertIs(SCORES['ABC-AF Death'].calc_batch, abc_af_death.calc_abc_af_death_score_batch)
+        for score in SCORES.values():
+            self.assertTrue(callable(score.calc) and callable(score.calc_batch))
+
+    def test_get_score(self):
+        self.assertIs(get_score('smart_reach'), SCORES['SMARTReach'])
+        self.assertIs(get_score('abc-af stroke'), SCORES['ABC-AF Stroke'])
+        with self.assertRaises(KeyError):
+            get_score('unknown')
+
+    def test_pickle(self):
+        score = SCORES['BARCELONA Bio-HF V3']
+        score.calc
+        self.assertEqual(pickle.loads(pickle.dumps(score)), score)
+
+
+if __name__ == '__main__':
+    unittest.main()
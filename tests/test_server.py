@@ -0,0 +1,102 @@
+import json
+import threading
+import unittest
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from parameter_generator import *
+from acribis_scores.server import ScoringServer
+
+
+class TestServer(unittest.TestCase):
+    def setUp(self):
+        self.server = ScoringServer(('127.0.0.1', 0), max_batch_size=16, max_delay=0.01, instrument=True)
+        self.thread = threading.Thread(target=self.server.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True)
+        self.thread.start()
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+
+    def post(self, path: str, body: bytes) -> tuple[int, dict]:
+        request = urllib.request.Request(self.url + path, body, {'Content-Type': 'application/json'})
+        try:
+            with urllib.request.urlopen(request) as response:
+                return response.status, json.load(response, parse_constant=self.fail)
+        except urllib.error.HTTPError as e:
+            return e.code, json.load(e, parse_constant=self.fail)
+
+    def test_score(self):
+        parameters = generate_maggic_parameters()
+        status, body = self.post('/score/MAGGIC', json.dumps(parameters).encode())
+        self.assertEqual(status, 200)
+        self.assertEqual(body['result'], maggic.calc_maggic_score(parameters))
+
+    def test_concurrent_requests(self):
+        patients = [generate_smart_reach_parameters() for _ in range(40)]
+        with ThreadPoolExecutor(8) as executor:
+            responses = list(executor.map(lambda patient: self.post('/score/smart_reach',
+                                                                    json.dumps(patient).encode()), patients))
+        for patient, (status, body) in zip(patients, responses):
+            self.assertEqual(status, 200)
+            for value, expected in zip(body['result'], smart_reach.calc_smart_reach_score(patient)):
+                self.assertAlmostEqual(value, expected, places=12)
+        self.assertEqual(self.server.stats.batch_rows, 40)
+        self.assertLess(self.server.stats.batches, 40)
+
+    def test_errors(self):
+        parameters = generate_maggic_parameters() | {'Age (years)': 200}
+        status, body = self.post('/score/MAGGIC', json.dumps(parameters).encode())
+        self.assertEqual(status, 400)
+        self.assertEqual(body['errors'][0]['field'], 'Age (years)')
+        status, _ = self.post('/score/MAGGIC', json.dumps({'Age (years)': 70}).encode())
+        self.assertEqual(status, 400)
+        status, _ = self.post('/score/MAGGIC', b'not json')
+        self.assertEqual(status, 400)
+        status, _ = self.post('/score/unknown', b'{}')
+        self.assertEqual(status, 404)
+        self.assertEqual(self.server.stats.invalid, 3)
+
+    def test_batched_results(self):
+        patients = [generate_barcelona_hf_v3_parameters() for _ in range(20)]
+        for patient in patients[::2]:
+            for biomarker in barcelona_hf_v3.BIOMARKERS:
+                patient.pop(biomarker, None)
+        bodies = [json.dumps(patient).encode() for patient in patients]
+        with ThreadPoolExecutor(8) as executor:
+            responses = list(executor.map(lambda body: self.post('/score/BARCELONA%20Bio-HF%20V3', body), bodies))
+        for patient, (status, body) in zip(patients, responses):
+            self.assertEqual(status, 200)
+            self.assertEqual(body['result'], barcelona_hf_v3.calc_barcelona_hf_score(patient))
+        self.assertNotIn('with_biomarkers', responses[0][1]['result'])
+        self.assertLess(self.server.stats.batches, 20)
+
+    def test_wrong_types(self):
+        patients = [generate_has_bled_parameters() for _ in range(10)]
+        patients[3]['Drugs'] = 'false'
+        with ThreadPoolExecutor(8) as executor:
+            responses = list(executor.map(lambda patient: self.post('/score/HAS-BLED', json.dumps(patient).encode()),
+                                          patients))
+        for i, (patient, (status, body)) in enumerate(zip(patients, responses)):
+            if i == 3:
+                self.assertEqual(status, 400)
+                self.assertEqual(body['errors'][0]['field'], 'Drugs')
+            else:
+                self.assertEqual((status, body['result']), (200, has_bled.calc_has_bled_score(patient)))
+
+    def test_scores_and_metrics(self):
+        with urllib.request.urlopen(self.url + '/scores') as response:
+            self.assertIn('BARCELONA Bio-HF V3', json.load(response))
+        self.post('/score/MAGGIC', json.dumps(generate_maggic_parameters()).encode())
+        with urllib.request.urlopen(self.url + '/metrics') as response:
+            text = response.read().decode()
+        self.assertIn('acribis_scores_server_requests_total 1', text)
+        self.assertIn('acribis_scores_server_queue_depth{score="MAGGIC"} 0', text)
+        self.assertIn('acribis_scores_stage_calls_total{score="maggic",stage="calculation"} 1', text)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,146 @@
+import io
+import math
+import unittest
+from contextlib import redirect_stdout
+
+import numpy as np
+
+from parameter_generator import generate_smart_reach_parameters
+from acribis_scores.batch_processing import to_columns
+from acribis_scores import smart_reach
+from acribis_scores.smart_reach import calc_smart_reach_score, calc_smart_reach_score_batch
+
+PATIENT = {
+    'Age in years': 60,
+    'Male': True,
+    'Current smoker': False,
+    'Diabetes mellitus': False,
+    'Systolic blood pressure in mmHg': 135,
+    'Total cholesterol in mmol/L': 5.2,
+    'Creatinine in µmol/L': 90.0,
+    'History of coronary artery disease': True,
+    'History of cerebrovascular disease': False,
+    'Peripheral artery disease': False,
+    'History of atrial fibrillation': False,
+    'History of congestive heart failure': False,
+    'Similar to the Dutch SMART population': True,
+    'Similar to the North American REACH population': False
+}
+
+SMOKER = PATIENT | {
+    'Age in years': 72,
+    'Male': False,
+    'Current smoker': True,
+    'Diabetes mellitus': True,
+    'Systolic blood pressure in mmHg': 160,
+    'Creatinine in µmol/L': 150.0,
+    'History of cerebrovascular disease': True,
+    'Peripheral artery disease': True,
+    'History of atrial fibrillation': True,
+    'Similar to the Dutch SMART population': False,
+    'Similar to the North American REACH population': True
+}
+
+
+def year_by_year(parameters: dict) -> tuple[float, float, float]:
+    # The original recursion over the years until age 90
+    new_parameters = smart_reach._derived_parameters(parameters)
+    cvd_free_survival = no_cv_event = 1.0
+    cvd_free_life_expectancy = new_parameters['Age in years']
+    ten_year_risk = 0.0
+    ten_years_later = new_parameters['Age in years'] + 10
+    while new_parameters['Age in years'] < 90:
+        model_b_weights = dict(smart_reach.MODEL_B_WEIGHTS)
+        if not new_parameters['Current smoker']:
+            model_b_weights['Age in years'] = 0
+        x_a = sum(new_parameters[name] * weight for name, weight in smart_reach.MODEL_A_WEIGHTS.items())
+        x_b = sum(new_parameters[name] * weight for name, weight in model_b_weights.items())
+        age = new_parameters['Age in years']
+        cv_risk = 1.0 - math.pow(smart_reach.MODEL_A_BASELINE_SURVIVALS[age], math.exp(x_a))
+        non_cv_risk = 1.0 - math.pow(smart_reach.MODEL_B_BASELINE_SURVIVALS[age], math.exp(x_b))
+        cvd_free_survival *= 1.0 - min(cv_risk + non_cv_risk, 1.0)
+        cvd_free_life_expectancy += cvd_free_survival
+        no_cv_event *= 1.0 - cv_risk
+        new_parameters['Age in years'] += 1
+        if new_parameters['Age in years'] == ten_years_later:
+            ten_year_risk = 1.0 - no_cv_event
+    return ten_year_risk, 1.0 - no_cv_event, cvd_free_life_expectancy
+
+
+class TestSMARTREACH(unittest.TestCase):
+    def test_silent(self):
+        with redirect_stdout(io.StringIO()) as stdout:
+            calc_smart_reach_score(generate_smart_reach_parameters())
+        self.assertEqual(stdout.getvalue(), '')
+
+    def test_trace(self):
+        parameters = generate_smart_reach_parameters()
+        curves = []
+        calc_smart_reach_score(parameters, trace=curves.append)
+        ages = [age for age, _ in curves[0]]
+        self.assertEqual(ages, list(range(parameters['Age in years'] + 1, 91)))
+        survivals = [survival for _, survival in curves[0]]
+        self.assertEqual(survivals, sorted(survivals, reverse=True))
+
+    def test_curves(self):
+        parameters = generate_smart_reach_parameters()
+        curves = []
+        ten_year_risk, lifetime_risk, life_expectancy, survival_curves = calc_smart_reach_score(
+            parameters, trace=curves.append, curves=True)
+        self.assertEqual((ten_year_risk, lifetime_risk, life_expectancy), calc_smart_reach_score(parameters))
+        self.assertEqual(survival_curves.ages.tolist(), [age for age, _ in curves[0]])
+        self.assertEqual(survival_curves.cvd_free_survival.tolist(), [survival for _, survival in curves[0]])
+        self.assertEqual(survival_curves.cv_event_risk[9], ten_year_risk)
+        self.assertEqual(survival_curves.cv_event_risk[-1], lifetime_risk)
+        self.assertAlmostEqual(parameters['Age in years'] + survival_curves.cvd_free_survival.sum(), life_expectancy)
+
+    def test_batch_curves(self):
+        parameters = [generate_smart_reach_parameters() for _ in range(20)]
+        *results, survival_curves = calc_smart_reach_score_batch(to_columns(parameters), curves=True)
+        for i, patient in enumerate(parameters):
+            expected = calc_smart_reach_score(patient, curves=True)
+            np.testing.assert_allclose([result[i] for result in results], expected[:3], rtol=1e-12)
+            n_years = 90 - patient['Age in years']
+            self.assertEqual(survival_curves.ages[i, :n_years].tolist(), expected[3].ages.tolist())
+            np.testing.assert_allclose(survival_curves.cvd_free_survival[i, :n_years],
+                                       expected[3].cvd_free_survival, rtol=1e-12)
+            np.testing.assert_allclose(survival_curves.cv_event_risk[i, :n_years],
+                                       expected[3].cv_event_risk, rtol=1e-12)
+            self.assertTrue(np.isnan(survival_curves.cv_event_risk[i, n_years:]).all())
+
+    def test_debug_log(self):
+        parameters = generate_smart_reach_parameters()
+        with self.assertLogs('acribis_scores.smart_reach', 'DEBUG') as logs:
+            ten_year_risk, _, _ = calc_smart_reach_score(parameters)
+        self.assertEqual(len(logs.records), 90 - parameters['Age in years'] + 3)
+        self.assertIn(f"Ten year risk of CV event: {ten_year_risk}", logs.output[-3])
+
+
+class TestLifeTable(unittest.TestCase):
+    def test_fixed_patients(self):
+        # Results of the year-by-year implementation before the life table
+        for parameters, expected in ((PATIENT, (0.14263827198854218, 0.588266051766297, 78.51855732771708)),
+                                     (SMOKER, (0.9364694382991996, 0.998772195502461, 74.36613390034415))):
+            np.testing.assert_allclose(calc_smart_reach_score(parameters), expected, rtol=1e-12)
+            np.testing.assert_allclose(year_by_year(parameters), expected, rtol=1e-12)
+
+    def test_matches_year_by_year(self):
+        # Down to the last year before 90, beyond the valid age range of the score
+        patients = [PATIENT | {'Age in years': age} for age in (45, 80, 85, 89)]
+        patients += [SMOKER | {'Age in years': age} for age in (45, 80, 85, 89)]
+        columns = {name: np.array([patient[name] for patient in patients]) for name in PATIENT}
+        age = columns['Age in years'].astype(float)
+        results = smart_reach._summarize(age, *smart_reach.life_table(age, *smart_reach._linear_predictors(columns)))
+        for i, parameters in enumerate(patients):
+            expected = year_by_year(parameters)
+            np.testing.assert_allclose([result[i] for result in results], expected, rtol=1e-12)
+
+    def test_one_year_survival(self):
+        new_parameters = smart_reach._derived_parameters(SMOKER)
+        x_b = sum(new_parameters[name] * weight for name, weight in smart_reach.MODEL_B_WEIGHTS.items())
+        self.assertAlmostEqual(smart_reach.calc_one_year_survival(new_parameters, smart_reach.Model.NON_CARDIOVASCULAR),
+                               math.pow(smart_reach.MODEL_B_BASELINE_SURVIVALS[72], math.exp(x_b)), places=14)
+
+
+if __name__ == '__main__':
+    unittest.main()
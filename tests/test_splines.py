@@ -0,0 +1,35 @@
+import unittest
+
+import numpy as np
+
+from parameter_generator import *
+from acribis_scores.splines import SplineBasis
+
+
+class TestSplineBasis(unittest.TestCase):
+    def test_scalar(self):
+        basis = SplineBasis(((66, 74, 82),))
+        self.assertEqual(basis((60,)), [60, 0.0, 0.0, 0.0])
+        self.assertEqual(basis((80,)), [80, 14 ** 3, 6 ** 3, 0.0])
+        self.assertEqual(len(basis), 4)
+
+    def test_columns(self):
+        basis = SplineBasis.from_terms(abc_af_death.MODEL_A_SPLINE_TERMS)
+        values = [np.array([65.0, 70.0, 90.0]), np.log([200.0, 1000.0, 20000.0]), np.log([400.0, 1500.0, 20000.0]),
+                  np.log([3.0, 20.0, 200.0])]
+        expected = np.array([basis([value[i] for value in values]) for i in range(3)]).T
+        np.testing.assert_allclose(basis.columns(values), expected)
+
+    def test_shared_biomarker_knots(self):
+        for biomarker in abc_af_death.BIOMARKERS:
+            self.assertEqual(abc_af_death.MODEL_A_SPLINE_TERMS[biomarker], abc_af_death.MODEL_B_SPLINE_TERMS[biomarker])
+
+    def test_parameters_unchanged(self):
+        parameters = generate_abc_af_death_parameters()
+        original = dict(parameters)
+        abc_af_death.calc_abc_af_death_score(parameters)
+        self.assertEqual(parameters, original)
+
+
+if __name__ == '__main__':
+    unittest.main()
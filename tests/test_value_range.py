@@ -0,0 +1,92 @@
+import unittest
+from typing import TypedDict, Annotated, NotRequired
+
+import numpy as np
+
+from acribis_scores import charge_af, barcelona_hf_v3
+from acribis_scores.value_range import RangeValidator, ValueRange, ParameterError, InvalidParametersError
+
+
+class TestRangeValidator(unittest.TestCase):
+    def setUp(self):
+        self.validator = RangeValidator.from_parameters(charge_af.Parameters)
+
+    def test_constrained_fields_only(self):
+        self.assertEqual(self.validator.fields, (('Age', 46, 94),
+                                                 ('Height', 122, 239),
+                                                 ('Weight', 32, 185),
+                                                 ('Systolic Blood Pressure', 71, 248),
+                                                 ('Diastolic Blood Pressure', 23, 136)))
+
+    def test_optional_fields(self):
+        validator = RangeValidator.from_parameters(barcelona_hf_v3.Parameters)
+        self.assertIn('NT-proBNP in pg/mL', validator.optional)
+        self.assertEqual([name for name, _, _ in validator.fields], ['NYHA Class', 'HF Duration in months'])
+
+    def test_scalar(self):
+        parameters = {'Age': 50, 'Height': 180, 'Weight': 80.0, 'Systolic Blood Pressure': 120,
+                      'Diastolic Blood Pressure': 80}
+        self.validator.validate(parameters)
+        parameters['Height'] = 100
+        with self.assertRaisesRegex(ValueError, r'Height \(100\) is not in range \[122, 239\]'):
+            self.validator.validate(parameters)
+
+    def test_collect_all(self):
+        parameters = {'Age': 20, 'Height': 180, 'Weight': 200.0, 'Systolic Blood Pressure': 120,
+                      'Diastolic Blood Pressure': 80}
+        with self.assertRaises(InvalidParametersError) as context:
+            self.validator.validate(parameters)
+        self.assertEqual(context.exception.errors, [ParameterError('Age', 20, ValueRange(46, 94), 'range'),
+                                                    ParameterError('Weight', 200.0, ValueRange(32, 185), 'range')])
+        self.assertEqual(str(context.exception),
+                         'Age (20) is not in range [46, 94]; Weight (200.0) is not in range [32, 185]')
+
+    def test_columns(self):
+        columns = {'Age': np.array([50.0, 40.0, 60.0]),
+                   'Height': np.array([180.0, 180.0, 300.0]),
+                   'Weight': np.array([80.0, 80.0, 20.0]),
+                   'Systolic Blood Pressure': np.array([120.0, 120.0, 120.0]),
+                   'Diastolic Blood Pressure': np.array([80.0, 80.0, 80.0])}
+        self.assertEqual(self.validator.mask(columns).tolist(), [True, False, False])
+        self.assertEqual(self.validator.errors(columns), {
+            1: [ParameterError('Age', 40.0, ValueRange(46, 94), 'range')],
+            2: [ParameterError('Height', 300.0, ValueRange(122, 239), 'range'),
+                ParameterError('Weight', 20.0, ValueRange(32, 185), 'range')]
+        })
+        with self.assertRaisesRegex(ValueError, r'Age \(40\.0\) is not in range \[46, 94\]'):
+            self.validator.validate_columns(columns)
+
+    def test_nan_columns(self):
+        columns = {'Age': np.array([50.0, np.nan]),
+                   'Height': np.array([180.0, 180.0]),
+                   'Weight': np.array([80.0, 80.0]),
+                   'Systolic Blood Pressure': np.array([120.0, 120.0]),
+                   'Diastolic Blood Pressure': np.array([80.0, 80.0])}
+        self.assertEqual(self.validator.mask(columns).tolist(), [True, False])
+        self.assertEqual(list(self.validator.errors(columns)), [1])
+        with self.assertRaisesRegex(ValueError, r'Age \(nan\) is not in range \[46, 94\]'):
+            self.validator.validate_columns(columns)
+        with self.assertRaises(ValueError):
+            self.validator.validate({name: values[1].item() for name, values in columns.items()})
+
+    def test_nan_optional_columns(self):
+        parameters = TypedDict('Parameters', {
+            'NYHA Class': Annotated[int, ValueRange(1, 4)],
+            'NT-proBNP in pg/mL': NotRequired[Annotated[int, ValueRange(38, 34800)]]
+        })
+        validator = RangeValidator.from_parameters(parameters)
+        validator.validate_columns({'NYHA Class': np.array([2.0]), 'NT-proBNP in pg/mL': np.array([np.nan])})
+
+    def test_check_ranges(self):
+        self.assertEqual(charge_af.calc_charge_af_score.__name__, 'calc_charge_af_score')
+        with self.assertRaises(ValueError):
+            charge_af.calc_charge_af_score({'Age': 20, 'Race (white)': True, 'Height': 180, 'Weight': 80.0,
+                                            'Systolic Blood Pressure': 120, 'Diastolic Blood Pressure': 80,
+                                            'Smoking (current)': False,
+                                            'Antihypertensive Medication Use (Yes)': False,
+                                            'Diabetes (Yes)': False, 'Heart failure (Yes)': False,
+                                            'Myocardial infarction (Yes)': False})
+
+
+if __name__ == '__main__':
+    unittest.main()